@@ -1,19 +1,52 @@
 import logging
 import os
 import asyncio
-import update
 from dotenv import load_dotenv
-from fastapi import FastAPI, Request
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes, MessageHandler, filters
-import random
-import json
+import uvicorn
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import PlainTextResponse, RedirectResponse
+from telegram import Update, InputFile
+from telegram.error import BadRequest, Forbidden
+from telegram.ext import (
+    Application, CommandHandler, CallbackQueryHandler, ContextTypes, MessageHandler, TypeHandler, filters
+)
+import shutil
 from pathlib import Path
 
+from content import LANGUAGES, lessons, quiz_questions
+from utils.ads import AdEngine, ads_from_catalog
+from utils.assets import AssetManager, referenced_paths
+from utils.broadcast import BLOCKED, SENT, BroadcastJobs, BroadcastRunner, describe, parse_texts
+from utils.ear_training import SESSION_LENGTH as EAR_SESSION_LENGTH, EarTrainingSet, ear_training_clips
+from utils.i18n import Catalog, best_locale, normalize_locale
+from utils.instrumentation import InstrumentedRequest, instrument_handlers
+from utils.keyboards import KeyboardCache, frozen_markup
+from utils.lesson_delivery import deliver_lesson_media, lesson_calls
+from utils.lesson_engine import LESSON_CALLBACKS, LessonEngine
+from utils.email_store import EmailStore, EmailTaken, PendingSet, normalize_email
+from utils.entitlements import EntitlementService
+from utils.media_cache import MediaCache, sent_file_id
+from utils.metrics import registry
+from utils.payments import SIGNATURE_HEADER, PaymentQueue, PaymentWorker, parse_event, verify_signature
+from utils.question_bank import DIFFICULTIES, SESSION_LENGTH as PRACTICE_SESSION_LENGTH, TOPICS, BankSet
+from utils.quiz_engine import QuizEngine
+from utils.rate_limit import PRIORITY_BULK, PRIORITY_INTERACTIVE, ChatRateLimiter, FloodControlLimiter, send_priority
+from utils.request_pool import build_request
+from utils.router import CallbackRouter, Codec
+from utils.score_store import create_score_store
+from utils.srs import SpacedRepetition
+from utils.synth import Clip, SynthEngine, duration as clip_duration
+from utils.update_processor import ChatOrderedUpdateProcessor
+from utils.user_registry import UserRegistry
+from utils.user_store import UserPreferenceStore
+
 # Load environment variables
 load_dotenv()
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+# Telegram echoes this in X-Telegram-Bot-Api-Secret-Token so /webhook can reject forged updates
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
 
 # Set up logging for debugging
 logging.basicConfig(
@@ -22,397 +55,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Texts are compiled once with their fallbacks (fa-IR -> fa -> en), see utils/i18n.py
+messages = Catalog(LANGUAGES)
+# lessons only some languages have are shown in whichever language has them
+lesson_catalog = Catalog(lessons, last_resort=True)
+
 def get_text(language_code, key):
     """Retrieve the text in the specified language."""
-    if language_code not in LANGUAGES:
-        logger.warning(f"Missing language support for: {language_code}")
-    return LANGUAGES.get(language_code, LANGUAGES["en"]).get(key, key)
-
-lessons = {
-    "en": {
-        "basics": {
-            "text": "Basics of music theory:\n"
-                    "- Note lengths: 1 Whole note = 2 Half notes = 4 Quarter notes = 8 Eighth notes = 16 Sixteenth notes\n"
-                    "- Note names: C (Do), D (Re), E (Mi), F (Fa), G (Sol), A (La), B (Si).\n"
-                    "\nListen to the note lengths and pay attention to the image:",
-            "files": [
-                ("audio/note_durations.ogg", "note_lengths_example"),
-                ("image/note_lengths_image.png", "note_lengths_image"),
-                ("audio/notes.ogg", "notes_example"),
-                ("image/notes_image.png", "notes_image"),
-            ],
-            "choose_lesson": "Choose another lesson:"
-        },
-
-        "rhythm": {
-            "text": "Rhythm concepts:\n"
-                    "- Time signatures:\n"
-                    "  * Simple Rhythms: Each beat is divided into two equal parts (e.g., 2/4, 3/4, 4/4).\n"
-                    "  * Compound Rhythms: Each beat is divided into three equal parts (e.g., 6/8, 9/8, 12/8).\n"
-                    "- Tempo: Beats per minute (BPM).\n"
-                    "- Syncopation: Offbeat emphasis.\n"
-                    "\nChoose another lesson:",
-            "files": [
-                ("audio/Simple_rhythm_example.ogg", "simple_rhythm_example"),
-                ("audio/Compound_rhythm_example.ogg", "compound_rhythm_example"),
-            ],
-            "choose_lesson": "Choose another lesson:"
-            }},
-
-    "Fa": {
-        "basics": {
-            "text": ":مبانی تئوری موسیقی:\n"
-                    "- 1 نت گرد = 2 نت سفید  = 4  سیاه = 8  یک لا چنگ = 16 دو لا چنگ \n"
-                    "- نام‌های نت ها و نماد های آن ها: C (Do)، D (Re)، E (Mi)، F (Fa)، G (Sol)، A (La)، B (sd).\n"
-                    "\nبه طول نت گوش دهید و به تصویر توجه کنید:",
-            "files": [
-                ("audio/Simple_rhythm_example.ogg", "simple_rhythm_example"),
-                ("audio/Compound_rhythm_example.ogg", "compound_rhythm_example"),
-            ],
-            "choose_lesson" : "یک درس دیگر انتخاب کنید"
-        },
-
-        "rhythm": {
-            "text": "مفاهیم ریتم:\n"
-                    "- ;کسر های میزان:\n"
-                    " * ریتم های ساده: هر ضرب به دو قسمت مساوی تقسیم می شود (به عنوان مثال، 2/4، 3/4، 4/4).\n"
-                    " * ریتم های مرکب: هر ضرب به سه قسمت مساوی تقسیم می شود (به عنوان مثال، 6/8، 9/8، 12/8).\n"
-                    "- سرعت، تمپو: ضرب در دقیقه (BPM).\n"
-                    "- سنکوپ: جابجایی تاکید ها.\n",
-            "files": [
-                ("audio/Simple_rhythm_example.ogg", "simple_rhythm_example"),
-                ("audio/Compound_rhythm_example.ogg", "compound_rhythm_example"),
-            ],
-            "choose_lesson": ":یک درس دیگر را انتخاب کنید"
-
-        },
-
-        "interval": {
-            "text": "- **Intervals**:\n"
-        "Here are the basic intervals from smallest to an octave:\n\n"
-        "🎵 **Minor Second (m2)** – 1 semitone (C → C# / Db)\n"
-        "🎵 **Major Second (M2)** – 2 semitones (C → D)\n"
-        "🎵 **Minor Third (m3)** – 3 semitones (C → Eb)\n"
-        "🎵 **Major Third (M3)** – 4 semitones (C → E)\n"
-        "🎵 **Perfect Fourth (P4)** – 5 semitones (C → F)\n"
-        "🎵 **Tritone (A4/d5)** – 6 semitones (C → F# / Gb)\n"
-        "🎵 **Perfect Fifth (P5)** – 7 semitones (C → G)\n"
-        "🎵 **Minor Sixth (m6)** – 8 semitones (C → Ab)\n"
-        "🎵 **Major Sixth (M6)** – 9 semitones (C → A)\n"
-        "🎵 **Minor Seventh (m7)** – 10 semitones (C → Bb)\n"
-        "🎵 **Major Seventh (M7)** – 11 semitones (C → B)\n"
-        "🎵 **Perfect Octave (P8)** – 12 semitones (C → C)\n"
-        "⬇️ Listen to the intervals below:",
-
-            "files":[
-                ("audio/Intervals.ogg", "Intervals Example")
-            ],
-            "choose_lesson": ":یک درس دیگر را انتخاب کنید"
-        },
-
-        "scales":{
-            "text": "major(ماژور): C (دو)-> D (ره)-> E (می)-> F (فا)-> G (سل)-> A (لا)-> B (سی)-> C (دو)\n "
-                "minor(مینور) : A -> B -> C -> D -> E -> F -> G -> A \n",
-            "files": [
-                ("audio/scales.ogg", "scales"),
-            ],
-            "choose_lesson" : "یک درس دیگر انتخاب کنید"
-        },
-
-        "chords":{"text": "\n آکورد های سه صدایی (Triad Chords):"
-                          "ماژور: فاصله نت اول و دوم دوپرده (سوم بزرگ)، فاصله نت اول و سوم سه و نیم پرده (پنجم درست)\n"
-                          " مثال: C, E, G آکورد دو ماژور\n"
-                          "مینور: فاصله نت اول و دوم یک و نیم (سوم کوچک)، فاصله نت اول و سوم سه و نیم پرده (پنجم درست)\n"
-                          " مثال: C, Eb, G آکورد دو مینور"
-            ,
-            "files": [
-                ("audio/chords.ogg", "chords"),
-            ],
-            "choose_lesson" : "یک درس دیگر انتخاب کنید"
-
-        }},
-
-    "es": {
-        "basics": {
-            "text": "Conceptos básicos de la teoría musical:\n"
-                    "- Duraciones de notas: 1 redonda = 2 blancas = 4 negras = 8 corcheas = 16 semicorcheas\n"
-                    "- Nombres de notas: C (Do), D (Re), E (Mi), F (Fa), G (Sol), A (La), B (Si).\n"
-                    "\nEscucha las duraciones de las notas y observa la imagen:",
-            "files": [
-                ("audio/note_durations.ogg", "ejemplo_duraciones_notas"),
-                ("image/note_lengths_image.png", "imagen_duraciones_notas"),
-                ("audio/notes.ogg", "ejemplo_notas"),
-                ("image/notes_image.png", "imagen_notas"),
-            ],
-            "choose_lesson": "Elige otra lección:"
-        },
-        "rhythm": {
-            "text": "Conceptos de ritmo:\n"
-                    "- Signaturas de tiempo:\n"
-                    "  * Ritmos simples: Cada pulso se divide en dos partes iguales (ej., 2/4, 3/4, 4/4).\n"
-                    "  * Ritmos compuestos: Cada pulso se divide en tres partes iguales (ej., 6/8, 9/8, 12/8).\n"
-                    "- Tempo: PPM (Pulsos por minuto).\n"
-                    "- Síncopa: Énfasis en el contratiempo.\n"
-                    "\nElige otra lección:",
-            "files": [
-                ("audio/Simple_rhythm_example.ogg", "ejemplo_ritmo_simple"),
-                ("audio/Compound_rhythm_example.ogg", "ejemplo_ritmo_compuesto"),
-            ],
-            "choose_lesson": "Elige otra lección:"
-            }},
-
-    "fr": {
-        "basics": {
-            "text": "Notions de base en théorie musicale:\n"
-                    "- Durées des notes: 1 ronde = 2 blanches = 4 noires = 8 croches = 16 double-croches\n"
-                    "- Noms des notes: C (Do), D (Ré), E (Mi), F (Fa), G (Sol), A (La), B (Si).\n"
-                    "\nÉcoutez les durées des notes et regardez l’image:",
-            "files": [
-                ("audio/note_durations.ogg", "exemple_durees_notes"),
-                ("image/note_lengths_image.png", "image_durees_notes"),
-                ("audio/notes.ogg", "exemple_notes"),
-                ("image/notes_image.png", "image_notes"),
-            ],
-            "choose_lesson": "Choisissez une autre leçon:"
-        },
-        "rhythm": {
-            "text": "Concepts du rythme:\n"
-                    "- Signatures temporelles:\n"
-                    "  * Rythmes simples : Chaque battement est divisé en deux parties égales (ex. : 2/4, 3/4, 4/4).\n"
-                    "  * Rythmes composés : Chaque battement est divisé en trois parties égales (ex. : 6/8, 9/8, 12/8).\n"
-                    "- Tempo : Battements par minute (BPM).\n"
-                    "- Syncopation : Accentuation hors temps.\n"
-                    "\nChoisissez une autre leçon:",
-            "files": [
-                ("audio/Simple_rhythm_example.ogg", "exemple_rythme_simple"),
-                ("audio/Compound_rhythm_example.ogg", "exemple_rythme_composé"),
-            ],
-            "choose_lesson": "Choisissez une autre leçon:"
-    }}
-}
-LANGUAGES = {
-    "en": {
-        "start": "Hello! Welcome to the Music Theory Bot. Choose a topic to start learning:",
-        "help": "Available commands:\n/start - Welcome and lesson menu\n/help - Show this help message\n/quiz - Take a music theory quiz",
-        "help_commands": "/start - Welcome and lesson menu\n/help - Show this help message\n/quiz - Take a music theory quiz",
-        "quiz_question": "Here is your question:",
-        "quiz_correct": "✅ Correct! You earned 1 point.",
-        "quiz_wrong": "❌ Incorrect. The correct answer is",
-        "quiz_done": "🎉 Quiz complete! Your score: {score}/{total}",
-        "support": "☕ Support us: Buy Me a Coffee - https://www.buymeacoffee.com/musicbot",
-        "basics": "Basics",
-        "rhythm": "Rhythm",
-        "intervals": "Intervals",
-        "scales": "Scales",
-        "chords": "Chords",
-        "quiz": "Quiz",
-        "basics_text": "Basics of music theory:\n- Note lengths...",
-        "note_lengths_example": "Note lengths example.",
-        "note_lengths_image": "Visual representation of note lengths.",
-        "notes_example": "Notes example.",
-        "notes_image": "Visual representation of notes.",
-        "choose_another_lesson": "Choose another lesson:"
-    },
-    "Fa": {
-        "start": "سلام! به ربات تئوری موسیقی خوش آمدید. موضوعی را برای شروع یادگیری انتخاب کنید:",
-        "help": "دستورات موجود:\n/start - خوش آمدید و منوی درس\n/help - نمایش این پیام راهنما\n/کویز - شرکت در آزمون تئوری موسیقی",
-        "quiz_question": "سوال شما اینجاست:",
-        "quiz_correct": "✅ درست است! شما 1 امتیاز کسب کردید.",
-        "quiz_wrong": "❌ نادرست است. پاسخ صحیح این است",
-        "quiz_done": "🎉 امتحان کامل شد! امتیاز شما: {score}/{total}",
-        "support": "☕ از ما حمایت کنید: برای من یک قهوه بخرید - https://www.buymeacoffee.com/musicbot",
-        "basics": "مبانی",
-        "rhythm": "ریتم",
-        "intervals": "فاصله ها",
-        "scales": "گام ها",
-        "chords": "آکورد",
-        "quiz": "مسابقه",
-        "basics_text": "\nمبانی تئوری موسیقی:" "طول نت...",
-        "note_lengths_example": "مثال طول یادداشت.",
-        "note_lengths_image": "نمایش بصری طول نت.",
-        "notes_example": "نمونه یادداشت.",
-        "notes_image": "نمایش بصری یادداشت‌ها.",
-        "choose_another_lesson": "یک درس دیگر را انتخاب کنید:",
-    },
-    "fr": {
-        "start": "Bonjour! Bienvenue sur le bot de théorie musicale. Choisissez un sujet pour commencer l'apprentissage :",
-        "help": "Commandes disponibles:\n/start - Accueil et menu des leçons\n/help - Afficher ce message d'aide\n/quiz - Faire un quiz de théorie musicale",
-        "help_commands": "/start - Accueil et menu des leçons\n/help - Afficher ce message d'aide\n/quiz - Faire un quiz de théorie musicale",
-        "quiz_question": "Voici votre question :",
-        "quiz_correct": "✅ Correct! Vous avez gagné 1 point.",
-        "quiz_wrong": "❌ Incorrect. La bonne réponse est",
-        "quiz_done": "🎉 Quiz terminé! Votre score: {score}/{total}",
-        "support": "☕ Soutenez-nous: Achetez-moi un café - https://www.buymeacoffee.com/musicbot",
-        "basics": "Bases",
-        "rhythm": "Rythme",
-        "intervals": "Intervalles",
-        "scales": "Gammes",
-        "chords": "Accords",
-        "quiz": "Quiz",
-        "basics_text": "Les bases de la théorie musicale:\n- Durées des notes...",
-        "note_lengths_example": "Exemple de durées des notes.",
-        "note_lengths_image": "Représentation visuelle des durées des notes.",
-        "notes_example": "Exemple de notes.",
-        "notes_image": "Représentation visuelle des notes.",
-        "choose_another_lesson": "Choisir une autre leçon:"
-    },
-    "es": {
-        "start": "¡Hola! Bienvenido al bot de teoría musical. Elige un tema para comenzar a aprender:",
-        "help": "Comandos disponibles:\n/start - Bienvenida y menú de lecciones\n/help - Mostrar este mensaje de ayuda\n/quiz - Realizar una prueba de teoría musical",
-        "help_commands": "/start - Bienvenida y menú de lecciones\n/help - Mostrar este mensaje de ayuda\n/quiz - Realizar una prueba de teoría musical",
-        "quiz_question": "Aquí está tu pregunta:",
-        "quiz_correct": "✅ ¡Correcto! Has ganado 1 punto.",
-        "quiz_wrong": "❌ Incorrecto. La respuesta correcta es",
-        "quiz_done": "🎉 ¡Prueba completada! Tu puntuación: {score}/{total}",
-        "support": "☕ Apóyanos: Cómprame un café - https://www.buymeacoffee.com/musicbot",
-        "basics": "Conceptos básicos",
-        "rhythm": "Ritmo",
-        "intervals": "Intervalos",
-        "scales": "Escalas",
-        "chords": "Acordes",
-        "quiz": "Cuestionario",
-        "basics_text": "Conceptos básicos de la teoría musical:\n- Duración de las notas...",
-        "note_lengths_example": "Ejemplo de duración de notas.",
-        "note_lengths_image": "Representación visual de la duración de las notas.",
-        "notes_example": "Ejemplo de notas.",
-        "notes_image": "Representación visual de las notas.",
-        "choose_another_lesson": "Elige otra lección:"
-    }
-}
-
-# Quiz Questions
-quiz_questions ={
-    "en":[
-    {
-        "question": "What is the time signature of a waltz?",
-        "options": ["2/4", "3/4", "4/4", "6/8"],
-        "correct": "3/4"
-    },
-    {
-        "question": "Which note is a whole step above C?",
-        "options": ["C#", "D", "E", "B"],
-        "correct": "D"
-    },
-    {
-        "question": "How many beats does a dotted half note get?",
-        "options": ["2", "3", "4", "6"],
-        "correct": "3"
-    },
-    {
-        "question": "What would be the name of the following scale (D -> E -> F# -> G -> A -> B -> C# -> D)?",
-        "options": ["D major", "E minor", "C major", "D minor"],
-        "correct": "D major"
-    },
-    {
-        "question": "What would be a trie tone major chord made from root note C?",
-        "options": ["C -> E -> G", "C -> D# -> G", "C -> E -> G#", "C -> D# -> F#"],
-        "correct": "C -> E -> G"
-    },
-    {
-        "question": "according to the mood, guess the chord is major or minor?",
-        "audio": "audio/minor_chord_q.ogg",
-        "options": ["major", "minor"],
-        "correct": "minor"
-    }
-    ],
-    "Fa":[
-    {
-        "question": "کسر میزان یک والس چه است؟",
-        "options": ["2/4", "3/4", "4/4", "6/8"],
-        "correct": "3/4"
-    },
-    {
-        "question": "کدام نت یک پله کامل بالاتر از C است؟",
-        "options": ["C#", "D", "E", "B"],
-        "correct": "ره"
-    },
-    {
-        "question": "یک نیم نت سفید نقطه دار چند ضرب می شود؟",
-        "options": ["2", "3", "4", "6"],
-        "correct": "3"
-    },
-    {
-        "question": "نام مقیاس زیر (D -> E -> F# -> G -> A -> B -> C# -> D) چه خواهد بود؟",
-        "options": ["ره ماژور", "لا مینور", "سی ماژور", "ره مینور"],
-        "correct": "ره ماژور"
-    },
-    {
-        "question": "آکورد ماژور سه صدایی ساخته شده از نت C چیست؟",
-        "options": ["C -> E -> G", "C -> D# -> G", "C -> E -> G#", "C -> D# -> F#"],
-        "correct": "C -> E -> G"
-    },
-    {
-        "question": "با توجه به خلق و خوی، حدس بزنید آکورد ماژور یا مینور است؟",
-        "audio": "audio/minor_chord_q.ogg",
-        "options": ["عمده", "جزئی"],
-        "correct": "صغیر"
-    }
-    ],
-    "fr":[
-    {
-        "question": "Quelle est la signature rythmique d'une valse ?",
-        "options": ["2/4", "3/4", "4/4", "6/8"],
-        "correct": "3/4"
-    },
-    {
-        "question": "Quelle note est un cran au dessus de C ?",
-        "options": ["C#", "D", "E", "B"],
-        "correct": "D"
-    },
-    {
-        "question": "Combien de battements obtient une blanche pointée ?",
-        "options": ["2", "3", "4", "6"],
-        "correct": "3"
-    },
-    {
-        "question": "Quel serait le nom de la gamme suivante (D -> E -> F# -> G -> A -> B -> C# -> D) ?",
-        "options": ["Ré majeur", "Mi mineur", "Do majeur", "Ré mineur"],
-        "correct": "ré majeur"
-    },
-    {
-        "question": "Que serait un accord majeur à trois tons composé de la note fondamentale C ?",
-        "options": ["C -> E -> G", "C -> D# -> G", "C -> E -> G#", "C -> D# -> F#"],
-        "correct": "C -> E -> G"
-    },
-    {
-        "question": "selon l'ambiance, devinez que l'accord est majeur ou mineur ?",
-        "audio": "audio/minor_chord_q.ogg",
-        "options": ["majeur", "mineur"],
-        "correct": "mineur"
-    }
-    ],
-    "es":[{
-        "question": "¿Cuál es el compás de un vals?",
-        "options": ["2/4", "3/4", "4/4", "6/8"],
-        "correct": "3/4"
-    },
-    {
-        "question": "¿Qué nota está un paso por encima de C?",
-        "options": ["C#", "D", "E", "B"],
-        "correct": "D"
-    },
-    {
-        "question": "¿Cuántos tiempos tiene una blanca con puntillo?",
-        "options": ["2", "3", "4", "6"],
-        "correct": "3"
-    },
-    {
-        "question": "¿Cuál sería el nombre de la siguiente escala (D -> E -> F# -> G -> A -> B -> C# -> D)?",
-        "options": ["Re mayor", "Mi menor", "Do mayor", "Re menor"],
-        "correct": "Re mayor"
-    },
-    {
-        "question": "¿Cuál sería un acorde mayor trie tono hecho a partir de la nota fundamental C?",
-        "options": ["C -> Mi -> Sol", "C -> Re# -> Sol", "C -> Mi -> Sol#", "C -> Re# -> Fa#"],
-        "correct": "C -> E -> G"
-    },
-    {
-        "question": "según el estado de ánimo, ¿adivinas que el acorde es mayor o menor?",
-        "audio": "audio/minor_chord_q.ogg",
-        "options": ["mayor", "menor"],
-        "correct": "menor"
-    }]
-    }
+    return messages.get(language_code, key)
 
 amazon_adz = {
     "guitar": [
@@ -425,56 +75,114 @@ amazon_adz = {
     ]
 }
 
+# Ads ride along on the question keyboards; a placement lists the categories it may show
+AD_PLACEMENTS = {"quiz": ("book_1",)}
+ad_engine = AdEngine(ads_from_catalog(amazon_adz), AD_PLACEMENTS)
+
+def ad_url(ad, placement):
+    """Ad buttons go through /go/<ad> to count clicks, when the bot has a public url."""
+    return f"{WEBHOOK_URL}/go/{ad.ad_id}?p={placement}" if WEBHOOK_URL else ad.url
+
+# audio/ and image/ are read into memory once; missing files stop the bot right here
+assets = AssetManager()
+assets.load()
+assets.validate(referenced_paths(lessons, quiz_questions))
+
+# Telegram file_ids of media we already uploaded once
+media_cache = MediaCache(digest=assets.digest)
+
 async def send_media(chat, file_path, caption="", is_quiz=False):
-    """Send OGG media files, handling quiz and lesson media separately."""
-    if not os.path.exists(file_path):
+    """Send OGG media files, handling quiz and lesson media separately.
+
+    After the first upload the file_id Telegram gave us is reused, so later
+    sends don't upload anything; first uploads come from memory.
+    """
+    if file_path not in assets:
         logger.error(f"File not found: {file_path}")
-        await chat.send_message("⚠️ Media file unavailable. Please try again later.")
+        # lessons pass the user's Message, quizzes the Chat; only a Chat has send_message
+        await getattr(chat, "chat", chat).send_message("⚠️ Media file unavailable. Please try again later.")
         return
 
-    with open(file_path, "rb") as media:
-        if file_path.endswith(".ogg"):
-            if is_quiz:
-                await chat.send_audio(audio=media, caption=caption or "🎵 Quiz Audio: Listen and answer.")
-            else:
-                await chat.reply_voice(voice=media, caption=caption or "🔊 Lesson Audio:")
-        elif file_path.endswith(".png"):  # Image handling
-            await chat.reply_photo(photo=media, caption=caption or "🖼️ Lesson Image:")
-        #else:
-            #await chat.send_message("⚠️ Unsupported file format. Only .ogg files are allowed.")
+    if file_path.endswith(".ogg"):
+        if is_quiz:
+            mode, send = "audio", chat.send_audio
+            caption = caption or "🎵 Quiz Audio: Listen and answer."
+        else:
+            mode, send = "voice", chat.reply_voice
+            caption = caption or "🔊 Lesson Audio:"
+    elif file_path.endswith(".png"):  # Image handling
+        mode, send = "photo", chat.reply_photo
+        caption = caption or "🖼️ Lesson Image:"
+    else:
+        #await chat.send_message("⚠️ Unsupported file format. Only .ogg files are allowed.")
+        return
+
+    file_id = media_cache.get(file_path, mode)
+    if file_id:
+        try:
+            return await send(file_id, caption=caption)
+        except BadRequest as e:
+            # the id expired or belongs to another bot, upload the file again
+            logger.warning(f"Cached file_id for {file_path} rejected: {e}")
+            media_cache.forget(file_path, mode)
+
+    # the duration from the audio manifest lets clients show the length before downloading
+    extra = {"duration": assets.duration(file_path)} if mode != "photo" and assets.duration(file_path) else {}
+    message = await send(assets.input_file(file_path), caption=caption, **extra)
+
+    file_id = sent_file_id(message, mode)
+    if file_id:
+        media_cache.put(file_path, mode, file_id)
+    return message
+
+# Keyboards that never change are built (and serialized) once
+USER_LANGUAGE_KEYBOARD = frozen_markup([
+    [("Persian", {"callback_data": "lang:fa"})],
+    [("English", {"callback_data": "lang:en"})],
+])
+SUPPORT_KEYBOARD = frozen_markup([
+    [("☕ Buy Me a Coffee (this is optional!! , if you want to be a premium as well, please use subscribe button"
+      ")", {"url": "https://www.buymeacoffee.com/musicbot"})],
+])
+SUBSCRIBE_KEYBOARD = frozen_markup([[("Subscribe", {"url": "https://www.buymeacoffee.com/musicbot"})]])
+QUIZ_DONE_KEYBOARD = frozen_markup([
+    [("🔄 Restart Quiz", {"callback_data": "nav:quiz"})],
+    [("📚 Lesson Menu", {"callback_data": "nav:menu"})],
+])
 
 def user_language():
-    return InlineKeyboardMarkup([
-        [InlineKeyboardButton( "Persian", callback_data="lang_fa")],
-        [InlineKeyboardButton("English", callback_data="lang_en")]
-    ])
+    return USER_LANGUAGE_KEYBOARD
 
-async def handle_user_language(update : Update, content : ContextTypes.DEFAULT_TYPE):
+# user -> language, loaded once and written back in the background
+user_prefs = UserPreferenceStore()
+
+async def handle_user_language(update : Update, content : ContextTypes.DEFAULT_TYPE, choice):
     query = update.callback_query
-    await query.answer()
 
     user_id = str(query.from_user.id)
-    selected_lang = "Fa" if query.data == "lang_fa" else "lang_en"
-
-    # load existing data
-    try:
-        with open("languages.json", "r") as f:
-            languages = json.load(f)
-    except:
-        languages = {}
+    selected_lang = "Fa" if choice == "fa" else "en"
 
-    # save nuw users' language
-    languages[user_id] = selected_lang # here we make ID the key and lang the value.
-    with open("languages.json", "w") as f:
-        json.dump(languages, f)
+    # save the users' language, the store writes it to bot.db later
+    user_prefs.set(user_id, selected_lang) # here we make ID the key and lang the value.
 
-    msg = "تبریک! زبان شما به فارسی تغییر یافت" if query.data == "FA" else "you are on English now!"
+    msg = "تبریک! زبان شما به فارسی تغییر یافت" if choice == "fa" else "you are on English now!"
     await query.edit_message_text(msg)
 
+def user_lesson_language(update: Update):
+    """The user's language: the saved choice, else the Telegram client language (e.g. "fa-IR")."""
+    lang = user_prefs.get(str(update.effective_user.id))
+    return lang or update.effective_user.language_code or "en"
+
+# everyone who talks to the bot, with their language: the recipient list of /broadcast
+user_registry = UserRegistry()
+
+async def track_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user is not None:
+        user_registry.seen(update.effective_user.id, user_lesson_language(update))
+
 # Start Command
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    await query.answer()
+    message = update.effective_message
 
    # logger.info(f"Received /start command from {update.effective_user.id}")
     #try:
@@ -482,40 +190,27 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
       #  logger.info("Successfully sent response.")
     #except Exception as e:
      #   logger.error(f"Error sending message: {e}")
-    chat_id = update.effective_chat.id
-    #user_points.setdefault(chat_id, 0)
-    if chat_id not in user_points:
-        user_points[chat_id] = 0  # Ensure user has a score
     # handles Persian users.
 
-    user_id = str(update.effective_chat.id)
-    language = handle_user_language()
-    lang = language.get(user_id, "en")
-    user_lang = "Fa" if lang == "Fa" else update.effective_user.language_code[:2]
-
-    # Inline button for support
-    support_keyboard = InlineKeyboardMarkup(
-        [[InlineKeyboardButton("☕ Buy Me a Coffee (this is optional!! , if you want to be a premium as well, please use subscribe button"
-                               ")", url="https://www.buymeacoffee.com/musicbot")]]
-    )
+    user_lang = user_lesson_language(update)
 
-    await query.message.reply_text(
-        LANGUAGES[user_lang],
+    await message.reply_text(
+        get_text(user_lang, "start"),
         reply_markup=lesson_menu(user_lang),
     )
 
-    await query.message.reply_text(
-        "Support us:", reply_markup=support_keyboard
+    await message.reply_text(
+        "Support us:", reply_markup=SUPPORT_KEYBOARD
     )
 
-    await query.message.reply_text(
+    await message.reply_text(
         "If you're language is Farsi, click the button below",
          reply_markup=user_language()
     )
 
 # Help Command
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_lang = update.effective_user.language_code[:2]  # Get the first two letters of the language code
+    user_lang = user_lesson_language(update)
     help_text = get_text(user_lang, "help")
     support_text = get_text(user_lang, "support")
 
@@ -528,177 +223,344 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 def subscribe_btn():
-    return InlineKeyboardMarkup(
-        [[InlineKeyboardButton("Subscribe"
-        , url="https://www.buymeacoffee.com/musicbot")]]
-    )
+    return SUBSCRIBE_KEYBOARD
 
-# in_memory dictionary to track users waiting to send emails
-awaiting_email = set() # it is a temporary container for data.
-EMAIL_PATH = "user_emails.json"
+# Emails for matching Buy Me a Coffee supporters, in bot.db
+email_store = EmailStore()
+# users /email is waiting on, forgotten after EMAIL_PROMPT_TTL seconds
+EMAIL_PROMPT_TTL = 600
+awaiting_email = PendingSet(ttl=EMAIL_PROMPT_TTL)
+
+class AwaitingEmail(filters.MessageFilter):
+    """Only messages of users /email is waiting on, so other text reaches other handlers."""
+
+    def filter(self, message):
+        return message.from_user is not None and message.from_user.id in awaiting_email
 
 # Ask for email
-async def ask_for_email (update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = str(update.effective_user.id)
-    awaiting_email.add(user_id)
+async def ask_for_email(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    awaiting_email.add(update.effective_user.id)
+    await update.message.reply_text(get_text(user_lesson_language(update), "email_prompt"))
 
 # Save email
-async def handle_email (update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = str(update.effective_user.id)
-
-    if user_id in awaiting_email:
-        email = update.message.text.strip()
+async def handle_email(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = update.effective_user.id
+    user_lang = user_lesson_language(update)
+
+    email = normalize_email(update.message.text)
+    if email is None:
+        # still waiting, the user can try again
+        await update.message.reply_text(get_text(user_lang, "email_invalid"))
+        return
+    try:
+        await email_store.set(user_id, email)
+    except EmailTaken:
+        await update.message.reply_text(get_text(user_lang, "email_taken"))
+        return
 
-        # load previous emails
+    awaiting_email.discard(user_id)
+    await update.message.reply_text(get_text(user_lang, "email_saved"))
+    # this supporter's payments that arrived before the email was known can be matched now
+    await payment_queue.requeue_unmatched(email)
+
+# Premium members, from bot.db; is_premium() never touches the disk
+entitlements = EntitlementService()
+
+# Buy Me a Coffee events: /bmc-webhook only queues them, payment_worker grants or revokes premium
+BMC_WEBHOOK_SECRET = os.getenv("BMC_WEBHOOK_SECRET")
+if not BMC_WEBHOOK_SECRET:
+    logger.warning("BMC_WEBHOOK_SECRET is not set, /bmc-webhook will reject every event")
+payment_queue = PaymentQueue()
+
+async def notify_premium(user_id, granted):
+    user_lang = user_prefs.get(str(user_id)) or "en"
+    await application.bot.send_message(user_id, get_text(user_lang, "premium_granted" if granted else "premium_revoked"))
+
+payment_worker = PaymentWorker(payment_queue, entitlements, email_store.user_for, notify_premium)
+
+PREMIUM_VIDEOS = [
+    ("videos/advanced_lessons/MyRecord_20250328152812.mp4", "🎸 Premium Guitar Lesson #1"),
+]
+# checked once at startup rather than on every /premium
+MISSING_PREMIUM_VIDEOS = frozenset(path for path, _ in PREMIUM_VIDEOS if not os.path.exists(path))
+for missing_video in MISSING_PREMIUM_VIDEOS:
+    logger.error(f"Premium video not found: {missing_video}")
+# path -> the first upload of a video in progress, other senders wait for its file_id
+video_uploads = {}
+
+async def upload_video(chat, file_path, caption):
+    # read off the event loop; the bytes are dropped once Telegram has the file
+    data = await asyncio.to_thread(Path(file_path).read_bytes)
+    message = await chat.send_video(
+        InputFile(data, filename=os.path.basename(file_path)), caption=caption, supports_streaming=True
+    )
+    file_id = sent_file_id(message, "video")
+    if file_id:
+        media_cache.put(file_path, "video", file_id)
+    return message
+
+async def send_video(chat, file_path, caption):
+    """Send a large video by file_id; a burst of first sends shares one upload."""
+    file_id = media_cache.get(file_path, "video")
+    if file_id:
         try:
-            with open (EMAIL_PATH , "r") as f:
-                data = json.load(f)
-        except FileNotFoundError:
-            data = {}
+            return await chat.send_video(file_id, caption=caption, supports_streaming=True)
+        except BadRequest as e:
+            logger.warning(f"Cached file_id for {file_path} rejected: {e}")
+            media_cache.forget(file_path, "video")
+
+    upload = video_uploads.get(file_path)
+    if upload is None:
+        upload = video_uploads[file_path] = asyncio.ensure_future(upload_video(chat, file_path, caption))
+        upload.add_done_callback(lambda _: video_uploads.pop(file_path, None))
+        return await upload
+
+    # if that upload fails, the uploader reports it and the retry below uploads again
+    await asyncio.wait([upload])
+    return await send_video(chat, file_path, caption)
+
+async def send_premium_content(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_lang = user_lesson_language(update)
+    if not entitlements.is_premium(update.effective_user.id):
+        await update.message.reply_text(get_text(user_lang, "premium_required"), reply_markup=SUBSCRIBE_KEYBOARD)
+        return
 
-        data[user_id] = email # here we are appointing the new user's email to the value of its ID (key) in data dict.
+    for file_path, caption in PREMIUM_VIDEOS:
+        if file_path in MISSING_PREMIUM_VIDEOS:
+            await update.message.reply_text("⚠️ Media file unavailable. Please try again later.")
+            continue
+        await send_video(update.effective_chat, file_path, caption)
+
+# **Broadcasts**: /broadcast, /broadcast_status and /broadcast_cancel, for ADMIN_IDS only
+ADMIN_IDS = frozenset(int(user_id) for user_id in os.getenv("ADMIN_IDS", "").split(",") if user_id.strip())
+BROADCAST_USAGE = (
+    "Usage: /broadcast [--dry-run] <text>\n"
+    "or one block per language, users get theirs (else English):\n"
+    "/broadcast\nen: New lesson on modes!\nfa: ...\nfr: ..."
+)
+broadcast_jobs = BroadcastJobs()
 
-        # save the data
-        with open(EMAIL_PATH, "w") as f:
-            json.dump(f)
+async def send_broadcast_message(user_id, text):
+    try:
+        # behind everything users are waiting for, see FloodControlLimiter
+        with send_priority(PRIORITY_BULK):
+            await application.bot.send_message(user_id, text)
+    except Forbidden:
+        # blocked the bot or deleted the account
+        return BLOCKED
+    except BadRequest as e:
+        if "chat not found" in str(e).lower():
+            return BLOCKED
+        raise
+    return SENT
+
+async def report_broadcast(job, final):
+    progress_message = (await broadcast_jobs.get(job.job_id)).progress_message
+    if progress_message is not None:
+        try:
+            await application.bot.edit_message_text(describe(job), chat_id=job.admin_chat, message_id=progress_message)
+        except BadRequest as e:
+            # "message is not modified" when nothing was sent since the last report
+            logger.debug(f"Could not update broadcast {job.job_id} progress: {e}")
+    if final:
+        await application.bot.send_message(job.admin_chat, describe(job))
+
+broadcast_runner = BroadcastRunner(broadcast_jobs, user_registry, send_broadcast_message, report_broadcast)
+
+async def start_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    parts = update.message.text.split(maxsplit=1)
+    body = parts[1] if len(parts) > 1 else ""
+    dry_run = body.startswith("--dry-run")
+    if dry_run:
+        body = body[len("--dry-run"):].strip()
+    texts = parse_texts(body, messages.locales)
+    if not texts:
+        await update.message.reply_text(BROADCAST_USAGE)
+        return
 
-        awaiting_email.remove(user_id)
-        await update.message.reply_text("✅ Email saved. Thank you!")
+    running = await broadcast_jobs.latest()
+    if running is not None and running.status == "running":
+        await update.message.reply_text(f"{describe(running)}\nWait for it or /broadcast_cancel it first.")
+        return
 
-PATH_PREMIUM = "premium_users.json"
+    # users seen in the last few seconds are still in memory
+    await user_registry.flush()
+    job = await broadcast_jobs.create(texts, update.effective_chat.id, user_registry.count(), dry_run)
+    progress = await update.message.reply_text(f"{describe(job)}\nLanguages: {', '.join(sorted(texts))}")
+    await broadcast_jobs.set_progress_message(job.job_id, progress.message_id)
+    broadcast_runner.wake.set()
+
+async def broadcast_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    job = await broadcast_jobs.latest()
+    await update.message.reply_text(describe(job) if job is not None else "No broadcasts yet.")
+
+async def cancel_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    job = await broadcast_jobs.latest()
+    if job is None or job.status != "running":
+        await update.message.reply_text("No broadcast is running.")
+        return
+    # the runner stops at its next checkpoint, at most one page later
+    await broadcast_jobs.cancel(job.job_id)
+    await update.message.reply_text(f"Cancelling broadcast #{job.job_id}.")
 
-def load_paid_users(user_id): #ypeError: load_paid_users() missing 1 required positional argument: 'user_id'
-    try:
-        with open("paid_users.json", "r") as f:
-            users = json.load(f)
-    except:
-        return str(user_id) in users
-
-user_id = str(update.effective_user.id)
-premium_users = load_paid_users(user_id)
-
-def save_paid_user(user_id):
-    users = load_paid_users()
-    users.add(str(user_id))
-    with open("paid_users.json", "w") as f:
-        json.dump(list(users), f)
-
-def add_premium_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = str(update.effective_user.id) # makes a str obj
-    premium_users[user_id]= True # checks if the entered id is matching with the user's id
-    save_paid_user(user_id) # saves it to the json (so it is safe!)
-                            # at first, it calls the save_paid_users function
-                            # then that itself calls the load_paid_users function
-
-# the function in which the matching of user subscribed and user paid will be understood!
-async def send_premium_content (update, context):
-    if load_paid_users(update.effective_user.id):
-        await context.bot.send_video(
-            chat_id = update.effective_chat.id,
-            video=open("videos/advanced_lessons/MyRecord_20250328152812.mp4", "rb"),
-            caption = "🎸 Premium Guitar Lesson #1"
-        )
+# Lesson Menu
+def lesson_menu_rows(user_lang):
+    return [
+        [(get_text(user_lang, "basics"), {"callback_data": "lesson:basics"})],
+        [(get_text(user_lang, "rhythm"), {"callback_data": "lesson:rhythm"})],
+        [(get_text(user_lang, "intervals"), {"callback_data": "lesson:intervals"})],
+        [(get_text(user_lang, "scales"), {"callback_data": "lesson:scales"})],
+        [(get_text(user_lang, "chords"), {"callback_data": "lesson:chords"})],
+        [(get_text(user_lang, "quiz"), {"callback_data": "nav:quiz"})],
+    ]
 
-#  Amazon ad sender
-def get_anazon_ad_keybord (category: "book_1"):
-    buttons = []
-    if category in amazon_adz:
-        ads = random.sample(amazon_adz[category], k=min(2, len(amazon_adz[category])))
-        for text, url in ads:
-            buttons.append([InlineKeyboardButton(text, url=url)])
-    return InlineKeyboardMarkup(buttons)
+# one lesson menu per language, unknown languages get the English one
+keyboards = KeyboardCache(messages.locales)
+keyboards.register("lesson_menu", lesson_menu_rows)
 
-# Lesson Menu
 def lesson_menu(user_lang):
-    keyboard = [
-        [InlineKeyboardButton(get_text(user_lang, "basics"), callback_data="basics")],
-        [InlineKeyboardButton(get_text(user_lang, "rhythm"), callback_data="rhythm")],
-        [InlineKeyboardButton(get_text(user_lang, "intervals"), callback_data="intervals")],
-        [InlineKeyboardButton(get_text(user_lang, "scales"), callback_data="scales")],
-        [InlineKeyboardButton(get_text(user_lang, "chords"), callback_data="chords")],
-        [InlineKeyboardButton(get_text(user_lang, "quiz"), callback_data="quiz")],
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return keyboards.get("lesson_menu", messages.locale(user_lang))
+
+# Quiz questions of every language, answers are checked from the button data alone
+quiz_engine = QuizEngine({normalize_locale(locale): questions for locale, questions in quiz_questions.items()})
+QUIZ_SETS = frozenset(quiz_engine.sets)
+# written questions come back on a spaced-repetition schedule per user, kept in bot.db
+srs = SpacedRepetition({set_id: len(quiz_engine.questions(set_id)) for set_id in QUIZ_SETS})
+
+def question_keyboard(set_id, question_id, question, ad=None):
+    rows = [[(option, {"callback_data": quiz_engine.encode(set_id, question_id, i)})] for i, option in enumerate(question.options)]
+    if ad is not None:
+        rows.append([(ad.text, {"url": ad_url(ad, "quiz")})])
+    return frozen_markup(rows)
+
+# answer buttons of the written questions never change, so each keyboard is built once, per ad
+QUESTION_KEYBOARDS = {
+    (set_id, question_id, ad_id): question_keyboard(set_id, question_id, question, ad_engine.ads.get(ad_id))
+    for set_id, questions in quiz_engine.sets.items()
+    for question_id, question in enumerate(questions)
+    for ad_id in [None, *ad_engine.ids("quiz")]
+}
 
-# Send Quiz
-async def send_quiz(update: Update, context: ContextTypes.DEFAULT_TYPE):
+# Ear training: generated questions whose audio is synthesized on demand (needs ffmpeg)
+synth = SynthEngine()
+SYNTH_AVAILABLE = shutil.which("ffmpeg") is not None
+for locale in messages.locales:
+    quiz_engine.add_set(
+        f"ear-{locale}",
+        EarTrainingSet({
+            "interval": messages.get(locale, "ear_training_interval"),
+            "triad": messages.get(locale, "ear_training_triad"),
+        }),
+        session_length=EAR_SESSION_LENGTH,
+    )
+EAR_SETS = frozenset(messages.locales)
+
+# Practice: theory questions generated by topic and level, e.g. "bank-fa-intervals-2"
+PRACTICE_TOPICS = ("all", *TOPICS)
+for locale in messages.locales:
+    for difficulty in DIFFICULTIES:
+        for topic in PRACTICE_TOPICS:
+            quiz_engine.add_set(
+                f"bank-{locale}-{topic}-{difficulty}",
+                BankSet(messages, locale, list(TOPICS) if topic == "all" else [topic], difficulty),
+                session_length=PRACTICE_SESSION_LENGTH,
+            )
+
+async def send_practice(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/practice [topic] [level]: a session of generated questions."""
+    user_lang = user_lesson_language(update)
+    topic, difficulty = "all", 1
+    for arg in context.args:
+        if arg in PRACTICE_TOPICS:
+            topic = arg
+        elif arg.isdigit() and int(arg) in DIFFICULTIES:
+            difficulty = int(arg)
+        else:
+            await update.message.reply_text(get_text(user_lang, "practice_usage"))
+            return
+    quiz_engine.start(context.user_data, f"bank-{messages.locale(user_lang)}-{topic}-{difficulty}")
+    await send_question(update, context)
 
-    # Send the question
-    user_id = str(update.effective_chat.id)
-    language = handle_user_language()
-    lang = language.get(user_id, "en")
-    user_lang = "Fa" if lang == "Fa" else "en"
+async def send_clip(chat, clip):
+    """Send a synthesized clip as quiz audio, reusing its file_id after the first upload."""
+    caption = "🎵 Quiz Audio: Listen and answer."
+    file_id = synth.file_id(clip)
+    if file_id:
+        try:
+            return await chat.send_audio(file_id, caption=caption)
+        except BadRequest as e:
+            logger.warning(f"Cached file_id for {clip} rejected: {e}")
+            synth.forget(clip)
+
+    data = await synth.get(clip)
+    message = await chat.send_audio(
+        InputFile(data, filename=f"{clip.kind}.ogg"), caption=caption, duration=clip_duration(clip)
+    )
+    file_id = sent_file_id(message, "audio")
+    if file_id:
+        synth.remember(clip, file_id)
+    return message
+
+async def send_ear_training(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if not SYNTH_AVAILABLE:
+        await update.message.reply_text("⚠️ Ear training is not available right now.")
+        return
+    locale = best_locale(user_lesson_language(update), EAR_SETS)
+    quiz_engine.start(context.user_data, f"ear-{locale}")
+    await send_question(update, context)
 
-    # Get the quiz questions for the user's language
-    context.user_data["quiz"] = {
-        "questions": quiz_questions[user_lang],
-        "current_index": 0,
-        "score": 0
-    }
+# Send Quiz
+async def send_quiz(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Start a session on the question set of the user's language, at the question due the longest
+    set_id = best_locale(user_lesson_language(update), QUIZ_SETS)
+    first = srs.next_due(update.effective_user.id, set_id)
+    if first is None:
+        message = update.callback_query.message if update.callback_query else update.message
+        await message.reply_text(get_text(user_lesson_language(update), "quiz_all_caught_up"))
+        return
+    quiz_engine.start(context.user_data, set_id, first)
 
     # Call send_question to show the first question
     await send_question(update, context)
 
-# User points system
-user_points = {}
+# User points system, kept in bot.db (SCORE_BACKEND=memory for local testing)
+score_store = create_score_store()
 
 # Send Question
 async def send_question(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if update.callback_query:
-        query = update.callback_query
-        await query.answer()
-        message = query.message
-        chat_id = query.message.chat_id
-    else:
-        message = update.message
-        chat_id = message.chat_id
-
-    quiz_data = context.user_data.get("quiz", {})
-    questions = quiz_data.get("questions", [])
-    current_index = quiz_data.get("current_index", 0)
+    message = update.callback_query.message if update.callback_query else update.message
 
-    if current_index >= len(questions):
-        score = user_points.get(chat_id, 0)
+    session = quiz_engine.session(context.user_data)
+    if session is None:
+        session = quiz_engine.start(context.user_data, best_locale(user_lesson_language(update), QUIZ_SETS))
+    question = quiz_engine.question(session)
 
-        # Create a combined reply markup with both "Restart Quiz" and "Lesson Menu"
-        keyboard = [
-            [InlineKeyboardButton("🔄 Restart Quiz", callback_data="quiz_restart")],
-            [InlineKeyboardButton("📚 Lesson Menu", callback_data="lesson_menu")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+    if question is None:
+        user_lang = user_lesson_language(update)
+        streak = score_store.streak(update.effective_user.id)
 
+        # Combined reply markup with both "Restart Quiz" and "Lesson Menu"
         await message.reply_text(
-            f"🎉 Quiz complete! Your score: {score}/{len(questions)}\n"
+            get_text(user_lang, "quiz_done").format(score=session.score, total=session.answered) + "\n"
+            + get_text(user_lang, "streak_text").format(current=streak.current, best=streak.best) + "\n"
             "Want to try again? Click below.\n"
             "If not, choose another lesson:",
-            reply_markup=reply_markup
+            reply_markup=QUIZ_DONE_KEYBOARD
         )
         return
 
-    # Store the current question in user_data / to be flexible do an if statement for it
-                                                # to be callable 1 via text 2 via button
-    question_data = questions[current_index]
-    context.user_data["current_question"] = question_data
+    # the ad is a row under the answers, not a message of its own
+    ad = ad_engine.pick(update.effective_user.id, "quiz")
+    keyboard = QUESTION_KEYBOARDS.get((session.set_id, session.index, ad.ad_id if ad else None))
+    if keyboard is None:
+        keyboard = question_keyboard(session.set_id, session.index, question, ad)
+    await message.reply_text(question.text, reply_markup=keyboard)
 
-    question_text = question_data["question"]
-    options = question_data["options"]
-
-    keyboard = [[InlineKeyboardButton(opt, callback_data=f"quiz_{i}")] for i, opt in enumerate(options)]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-
-    await message.reply_text(question_text, reply_markup=reply_markup)
-
-    # If the question has an audio file, send it
-    if "audio" in question_data:
-        audio_path = question_data["audio"]
-        await send_media(update.effective_chat, audio_path, is_quiz=True)
-
-    # Sending the ads
-    await message.reply_text(
-        "Recommended for you:",
-        reply_markup = get_anazon_ad_keybord("guitar")
-
-    )
+    # If the question has audio, send it: a synthesized clip or a file from audio/
+    if isinstance(question.audio, Clip):
+        await send_clip(update.effective_chat, question.audio)
+    elif question.audio:
+        await send_media(update.effective_chat, question.audio, is_quiz=True)
 
     # Subscribe
     #await update.message.reply_text(
@@ -707,279 +569,221 @@ async def send_question(update: Update, context: ContextTypes.DEFAULT_TYPE):
         #reply_markup = subscribe_btn()
     #)
 
-# Handle Button Clicks
-async def handle_button(update: Update, context: ContextTypes.DEFAULT_TYPE, user_lang="en"):
-    query = update.callback_query
-    await query.answer()
-
-    data = query.data
-    chat_id = update.effective_chat.id
-
-    if data == "intervals":
-        await interval(update, context)
-    elif data == "basics":
-        await basics(update, context)
-    elif data == "rhythm":
-        await rhythm(update, context)
-    elif data == "chords":
-        await chords(update, context)
-    elif data == "scales":
-        await scales(update, context)
-    elif data == "quiz":
-        await send_quiz(update, context)
-    elif data == "lesson_menu":
-        user_lang = update.effective_user.language_code[:2]
-        await query.message.reply_text("📚 Choose a lesson:", reply_markup=lesson_menu(user_lang))
-    elif data.startswith("quiz_"):
-        await query.answer()  # Ensure the query is answered
-        print(f"Received callback data: {data}")  # Debugging
-
-        callback_data = query.data  # Example: "quiz_1"
-        selected_option = data.replace("quiz_", "")
-
-        quiz_data = context.user_data.get("quiz", {})
-
-        questions = quiz_data.get("questions", [])
-        current_index = quiz_data.get("current_index", 0)
-
-        # ✅ Handle quiz restart separately
-        if selected_option == "restart":
-            await send_quiz(update, context)  # Function to restart the quiz
-            return
-
-        # Check if the selected option is actually a number
-        if not selected_option.isdigit():
-            print(f"Error: Invalid quiz callback data received: {selected_option}")  # Debugging
-            await query.answer("Invalid selection. Please try again.")
-            return
-
-        option_index = int(callback_data.replace("quiz_", ""))  # Converts "quiz_1" to 1
-        print(f"Option index: {option_index}")  # Debugging
-
-        question_data = context.user_data.get("current_question", {})
-
-        options = question_data.get("options", [])
-
-        if option_index < 0 or option_index >= len(options):
-            print("Invalid selection detected!")  # Debugging
-            await query.answer("Invalid selection. Please try again.")
-            return
-
-        answer_text = options[option_index]  # Retrieve the actual answer text
+# Leaderboard: ranks come from the score store's index, nothing is sorted per request
+LEADERBOARD_SIZE = 10
+MEDALS = ("🥇", "🥈", "🥉")
 
-        if current_index < len(questions):
-            answer_text = options[option_index].strip().lower()  # Convert to lowercase
-            correct_answer = questions[current_index]["correct"].strip().lower()  # Convert to lowercase
-
-            print(f"Selected answer: {answer_text}, Correct answer: {correct_answer}")
-
-            if answer_text == correct_answer:
-                user_points[chat_id] += 1
-                await query.message.reply_text(get_text(user_lang, "quiz_correct"))
-            else:
-                await query.message.reply_text(f"{get_text(user_lang, 'quiz_wrong')} {correct_answer}")
-
-            quiz_data["current_index"] += 1
-            context.user_data["quiz"] = quiz_data
-
-            await send_question(update, context)  # Move to next question
-
-async def basics(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    await query.answer()
-
-    user_id = str(update.effective_user.id)
-    language = handle_user_language()
-    lang = language.get(user_id, "en")
-    user_lang = "Fa" if lang == "Fa" else update.effective_user.language_code[:2]
+async def send_leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_lang = user_lesson_language(update)
+    leaders = score_store.top(LEADERBOARD_SIZE)
+    if not leaders:
+        await update.message.reply_text(get_text(user_lang, "leaderboard_empty"))
+        return
 
-    if lang == "Fa":
-        # Send Persian lessons by checking the dicts.
-        await query.message.edit_text(lessons["Fa"]["basics"])
-    else:
-        await query.message.edit_text(lessons[lang]["basics"])
-    # Get lesson data, fallback to English if unavailable
-    lesson_data = lessons.get(user_lang, lessons["en"]).get("basics", {})
-
-    # Send lesson text
-    await query.message.edit_text(lesson_data.get("text", "Lesson not available."))
-
-    # Send media files with their corresponding translations
-    for file_path, caption_key in lesson_data.get("files", []):
-        await send_media(query.message, file_path, get_text(user_lang, caption_key))
-        await asyncio.sleep(1)  # Pause between messages
-
-    # Show lesson menu again
-    await query.message.reply_text(
-        lesson_data.get("choose_lesson", "Choose another lesson:"),
-        reply_markup=lesson_menu(user_lang)
+    lines = [get_text(user_lang, "leaderboard_title")]
+    for position, leader in enumerate(leaders):
+        label = MEDALS[position] if position < len(MEDALS) else f"{position + 1}."
+        name = leader.name or get_text(user_lang, "leaderboard_anonymous")
+        lines.append(f"{label} {name} — {leader.points}")
+    user_id = update.effective_user.id
+    points = score_store.get(user_id)
+    if points:
+        lines.append("")
+        lines.append(get_text(user_lang, "leaderboard_you").format(rank=score_store.rank(user_id), points=points))
+    await update.message.reply_text("\n".join(lines))
+
+async def send_rank(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_lang = user_lesson_language(update)
+    user_id = update.effective_user.id
+    points = score_store.get(user_id)
+    if not points:
+        await update.message.reply_text(get_text(user_lang, "rank_none"))
+        return
+    streak = score_store.streak(user_id)
+    await update.message.reply_text(
+        get_text(user_lang, "rank_text").format(rank=score_store.rank(user_id), players=score_store.count(), points=points)
+        + "\n" + get_text(user_lang, "streak_text").format(current=streak.current, best=streak.best)
     )
 
-# Rhythm Lesson
-async def rhythm(update: Update, context: ContextTypes.DEFAULT_TYPE):
+# Quiz answer buttons ("quiz:<set>:<question>:<option>")
+async def handle_quiz_answer(update: Update, context: ContextTypes.DEFAULT_TYPE, set_id, question_id, option):
     query = update.callback_query
-    await query.answer()
-
-    user_id = str(update.effective_user.id)
-    language = handle_user_language()
-    lang = language.get(user_id, "en")
-    user_lang = "Fa" if lang == "Fa" else update.effective_user.language_code[:2]
-
-    if lang == "Fa":
-        # Send Persian lessons by checking the dicts.
-        await query.message.edit_text(lessons["Fa"]["rhythm"])
-    else:
-        await query.message.edit_text(lessons[lang]["rhythm"])
 
-    # Retrieve lesson data, fallback to English if unavailable
-    lesson_data = lessons.get(user_lang, lessons["en"]).get("rhythm", {})
+    result = quiz_engine.answer(context.user_data, set_id, question_id, option)
+    if result is None:
+        # a second tap, or a button of a question that was already answered
+        return
+    session, question, is_correct = result
+    if set_id in QUIZ_SETS:
+        # schedule the question's next review and continue with whatever is due now
+        srs.record(update.effective_user.id, set_id, question_id, is_correct)
+        quiz_engine.jump(session, srs.next_due(update.effective_user.id, set_id))
+
+    user_lang = user_lesson_language(update)
+    # feedback jumps the outbound queue
+    with send_priority(PRIORITY_INTERACTIVE):
+        if is_correct:
+            score_store.add(update.effective_user.id, name=update.effective_user.first_name)
+            await query.message.reply_text(get_text(user_lang, "quiz_correct"))
+        else:
+            await query.message.reply_text(f"{get_text(user_lang, 'quiz_wrong')} {question.correct_text}")
+
+    await send_question(update, context)  # Move to next question
+
+# Navigation buttons ("nav:quiz", "nav:menu")
+async def handle_navigation(update: Update, context: ContextTypes.DEFAULT_TYPE, target):
+    if target == "quiz":
+        await send_quiz(update, context)
+    elif target == "menu":
+        await update.callback_query.message.reply_text(
+            "📚 Choose a lesson:", reply_markup=lesson_menu(user_lesson_language(update))
+        )
 
-    # Send lesson text
-    await query.message.edit_text(lesson_data.get("text", "Lesson not available."))
+async def send_lesson_media(message, items):
+    await deliver_lesson_media(message, items, send_media, media_cache, assets)
 
-    # Send media files with localized captions
-    for file_path, caption_key in lesson_data.get("files", []):
-        await send_media(query.message, file_path, get_text(user_lang, caption_key))
-        await asyncio.sleep(1)  # Pause between messages
+# Every lesson (basics, rhythm, intervals, scales, chords) is rendered from the lessons table
+lesson_engine = LessonEngine(
+    lesson_catalog, LESSON_CALLBACKS, user_lesson_language, get_text, lesson_menu, send_lesson_media
+)
 
-    # Show lesson menu again
-    await query.message.reply_text(
-        lesson_data.get("choose_lesson", "Choose another lesson:"),
-        reply_markup=lesson_menu(user_lang)
+# All inline buttons go through one handler that dispatches on the "namespace:" prefix
+callback_router = CallbackRouter()
+callback_router.add("lesson", lesson_engine.show)
+callback_router.add("quiz", handle_quiz_answer, Codec(str, int, int))
+callback_router.add("lang", handle_user_language)
+callback_router.add("nav", handle_navigation)
+
+# **Building the bot**
+async def post_init(application: Application):
+    user_prefs.start()
+    if user_registry.count() == 0:
+        # first start with the registry: everyone we knew of before it
+        user_registry.seed(user_prefs.items())
+    user_registry.start()
+    score_store.start()
+    srs.start()
+    entitlements.start()
+    payment_worker.start()
+    # also resumes a broadcast that was running when the bot went down
+    broadcast_runner.start()
+    if SYNTH_AVAILABLE:
+        # warm the clip cache in the background, the first ear training questions then hit it
+        application.create_task(synth.prerender(ear_training_clips()))
+
+async def post_shutdown(application: Application):
+    # make sure the last language changes reach the disk
+    await user_prefs.stop()
+    await broadcast_runner.stop()
+    broadcast_jobs.close()
+    await user_registry.stop()
+    await score_store.stop()
+    email_store.close()
+    await srs.stop()
+    await payment_worker.stop()
+    payment_queue.close()
+    await entitlements.stop()
+
+# updates run concurrently (MAX_CONCURRENT_UPDATES), one at a time per chat
+update_processor = ChatOrderedUpdateProcessor()
+# a chat's bucket holds a whole lesson view, so a lesson never waits for tokens (1/s refill after)
+LESSON_BURST = max(3, *(lesson_calls(lesson.get("files", [])) for table in lessons.values() for lesson in table.values()))
+
+def build_application():
+    # every Bot API call is timed and counted, see /metrics; uploads get their own pool
+    request = InstrumentedRequest(build_request())
+    # no Updater: updates arrive through the FastAPI /webhook route below.
+    # Outbound calls are paced and retried on flood control by FloodControlLimiter.
+    application = (
+        Application.builder().token(BOT_TOKEN).request(request).updater(None)
+        .concurrent_updates(update_processor)
+        .rate_limiter(FloodControlLimiter(chats=ChatRateLimiter(burst=LESSON_BURST))).build()
     )
-# Interval Lesson
-async def interval(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    await query.answer()
-
-    user_id = str(update.effective_user.id)
-    language = handle_user_language()
-    lang = language.get(user_id, "en")
-    user_lang = "Fa" if lang == "Fa" else update.effective_user.language_code[:2]
-
-    if lang == "Fa":
-        # Send Persian lessons by checking the dicts.
-        await query.message.edit_text(lessons["Fa"]["interval"])
-    else:
-        await query.message.edit_text(lessons[lang]["interval"])
-
-    # Retrieve lesson data, fallback to English if unavailable
-    lesson_data = lessons.get(user_lang, lessons["en"]).get("interval", {})
-
-    # Send lesson text. If it wasn't there send an error!
-    await query.message.edit_text(lesson_data.get("text", "Lesson not available."))
-
-    # Send media files with localized captions
-    for file_path, caption_key in lesson_data.get("files", []):
-        await send_media(query.message, file_path, get_text(user_lang, caption_key))
-        await asyncio.sleep(1)  # Pause between messages
-
-    # Check if the audio file exists before sending
-    #for file_path, caption in files:
-     #   await send_media(query.message, file_path, caption)
-      #  await asyncio.sleep(1)  # Pause between messages
-
-    # Show lesson menu again
-    await query.message.reply_text(get_text(user_lang, "choose_another_lesson"), reply_markup=lesson_menu(user_lang))
-
-# Scales Lesson
-async def scales(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    await query.answer()
-
-    user_id = str(update.effective_user.id)
-    language = handle_user_language()
-    lang = language.get(user_id, "en")
-    user_lang = "Fa" if lang == "Fa" else update.effective_user.language_code[:2]
-
-    if lang == "Fa":
-        # Send Persian lessons by checking the dicts.
-        await query.message.edit_text(lessons["Fa"]["scales"])
-    else:
-        await query.message.edit_text(lessons[lang]["scales"])
-
-    # Retrieve lesson data, fallback to English if unavailable
-    lesson_data = lessons.get(user_lang, lessons["en"]).get("scales", {})
-
-    # Send lesson text. If it wasn't there send an error!
-    await query.message.edit_text(lesson_data.get("text", "Lesson not available."))
 
-    # Send media files with localized captions
-    for file_path, caption_key in lesson_data.get("files", []):
-        await send_media(query.message, file_path, get_text(user_lang, caption_key))
-        await asyncio.sleep(1)  # Pause between messages
-
-    # Show lesson menu again
-    await query.message.reply_text(get_text(user_lang, "choose_another_lesson"), reply_markup=lesson_menu(user_lang))
-
-# Chords Lesson
-async def chords(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    await query.answer()
-
-    user_id = str(update.effective_user.id)
-    language = handle_user_language()
-    lang = language.get(user_id, "en")
-    user_lang = "Fa" if lang == "Fa" else update.effective_user.language_code[:2]
-
-    if lang == "Fa":
-        # Send Persian lessons by checking the dicts.
-        await query.message.edit_text(lessons["Fa"]["chords"])
-    else:
-        await query.message.edit_text(lessons[lang]["chords"])
-
-    # Get lesson data, fallback to English if unavailable
-    lesson_data = lessons.get(user_lang, lessons["en"]).get("chords", {})
-
-    # Send lesson text
-    await query.message.edit_text(lesson_data.get("text", "Lesson not available."))
-
-    # Send media files with their corresponding translations
-    for file_path, caption_key in lesson_data.get("files", []):
-        await send_media(query.message, file_path, get_text(user_lang, caption_key))
-        await asyncio.sleep(1)  # Pause between messages
-
-    # Check if the audio file exists before sending
-    #for file_path, caption in files:
-     #   await send_media(query.message, file_path, caption)
-      #  await asyncio.sleep(1)  # Pause between messages
-
-    # Show lesson menu again
-    await query.message.reply_text(get_text(user_lang, "choose_another_lesson"), reply_markup=lesson_menu(user_lang))
+    # before every other handler: record who is using the bot
+    application.add_handler(TypeHandler(Update, track_user), group=-1)
+    admins = filters.User(user_id=ADMIN_IDS)
+    application.add_handler(CommandHandler("broadcast", start_broadcast, filters=admins))
+    application.add_handler(CommandHandler("broadcast_status", broadcast_status, filters=admins))
+    application.add_handler(CommandHandler("broadcast_cancel", cancel_broadcast, filters=admins))
+    application.add_handler(CommandHandler("email", ask_for_email))
+    application.add_handler(MessageHandler(AwaitingEmail() & filters.TEXT & ~filters.COMMAND, handle_email))
+    application.add_handler(CommandHandler("premium", send_premium_content))
+    application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("help", help_command))
+    application.add_handler(CommandHandler("quiz", send_quiz))
+    application.add_handler(CommandHandler("ear", send_ear_training))
+    application.add_handler(CommandHandler("practice", send_practice))
+    application.add_handler(CommandHandler("leaderboard", send_leaderboard))
+    application.add_handler(CommandHandler("rank", send_rank))
+    application.add_handler(CallbackQueryHandler(callback_router.dispatch))
+    instrument_handlers(application)
+    return application
+
+application = build_application()
+
+# **One ASGI app serves the Telegram webhook, /bmc-webhook and /metrics**
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await application.initialize()
+    await post_init(application)
+    await application.start()
+    if WEBHOOK_URL:
+        await application.bot.set_webhook(
+            url=f"{WEBHOOK_URL}/webhook", secret_token=WEBHOOK_SECRET, allowed_updates=Update.ALL_TYPES
+        )
+    yield
+    await application.stop()
+    await post_shutdown(application)
+    await application.shutdown()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.post("/webhook")
+async def telegram_webhook(request: Request):
+    """Hand Telegram updates to the PTB application, processing happens in the background."""
+    if WEBHOOK_SECRET and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != WEBHOOK_SECRET:
+        return Response(status_code=403)
+    update = Update.de_json(await request.json(), application.bot)
+    # backpressure: while MAX_PENDING_UPDATES are in flight Telegram waits for our answer
+    await update_processor.admit()
+    await application.update_queue.put(update)
+    return Response(status_code=200)
 
+@app.post("/bmc-webhook")
+async def handle_bmc_webhook(request: Request):
+    """Queue a signed Buy Me a Coffee event and answer at once; retries of an event are no-ops."""
+    body = await request.body()
+    if not verify_signature(body, request.headers.get(SIGNATURE_HEADER), BMC_WEBHOOK_SECRET):
+        registry.counter("payment_webhooks", outcome="bad_signature").inc()
+        return Response(status_code=401)
+    try:
+        event_id, event_type, payload = parse_event(body)
+    except ValueError:
+        registry.counter("payment_webhooks", outcome="malformed").inc()
+        return Response(status_code=400)
+    new = await payment_queue.enqueue(event_id, event_type, payload)
+    registry.counter("payment_webhooks", outcome="queued" if new else "duplicate").inc()
+    return {"status": "OK"}
+
+@app.get("/go/{ad_id}")
+async def ad_click(ad_id: str, p: str = ""):
+    """Count an ad click and send the user on to the shop."""
+    ad = ad_engine.click(ad_id, p)
+    if ad is None:
+        return Response(status_code=404)
+    return RedirectResponse(ad.url, status_code=302)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Handler latencies, Bot API calls and callback routes in Prometheus text format."""
+    return registry.render()
 
-# **Main function to start the bot**
 def main():
-    app = Application.builder().token(BOT_TOKEN).read_timeout(20).write_timeout(20).build()
-
-    app.add_handler(CallbackQueryHandler(handle_user_language, pattern="^lang_"))
-    app.add_handler(CommandHandler("email", ask_for_email))
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_email))
-    app.add_handler(CommandHandler("premium", send_premium_content))
-    app.add_handler(CommandHandler("start", start))
-    app.add_handler(CommandHandler("help", help_command))
-    app.add_handler(CommandHandler("quiz", send_quiz))
-    app.add_handler(CallbackQueryHandler(handle_button))
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_button))
-    app.add_handler(CallbackQueryHandler(handle_button, pattern=r"^quiz_\d+$"))
-
-    webhook_url = f"{WEBHOOK_URL}/webhook"
-    # Set webhook using bot's method (blocking or not, your choice)
-    app.bot.set_webhook(url=webhook_url)
-
-    app.run_webhook(
-        listen="0.0.0.0",
-        port=int(os.environ.get("PORT", 8080)),
-        url_path="webhook",
-        webhook_url=webhook_url
-    )
-
-app = FastAPI()
-@app.post("/bmc-webhook")
-async def handle_bmc_webhook (request: Request):
-    data = await request.json()
-    print("Webhook received:", data)  # Debugging
-    return {"status":"OK"}
+    # One process on purpose: sessions, caches, per-chat ordering and the 30 msg/s flood budget
+    # all live in it, so a second worker would double the budget and race the first on every store.
+    # Passing the app object (not "Music_Theory_bot:app") keeps uvicorn from importing this module again.
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,55 @@
+"""Ad picking cost: alias-table draws against random.choices, plus capped picks.
+
+random.choices walks the cumulative weights on every call (O(n), O(log n)
+with cum_weights); the alias table draws in O(1) whatever the number of
+ads. pick() adds the per-user frequency caps on top. Ads now ride on the
+question's keyboard, so a quiz question is one message instead of two.
+
+Run from the repo root: python benchmarks/bench_ads.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ads import AdEngine, AliasTable, ads_from_catalog
+
+DRAWS = 200_000
+USERS = 100_000
+
+
+def per_call_us(fn, count=DRAWS):
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return (time.perf_counter() - start) / count * 1_000_000
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'ads':>6} {'choices µs':>11} {'alias µs':>9} {'pick µs':>8} {'ads shown':>10}")
+    for count in (4, 50, 1000):
+        catalog = {"shop": [(f"ad {i}", f"https://example.com/{i}", rng.uniform(0.5, 5)) for i in range(count)]}
+        ads = ads_from_catalog(catalog)
+        weights = [ad.weight for ad in ads]
+        table = AliasTable(weights)
+        choices_us = per_call_us(lambda: rng.choices(ads, weights))
+        alias_us = per_call_us(lambda: ads[table.sample(rng)])
+
+        engine = AdEngine(ads, {"quiz": ("shop",)}, rng=rng)
+        users = iter(rng.randrange(USERS) for _ in range(DRAWS))
+        shown = 0
+
+        def pick():
+            nonlocal shown
+            shown += engine.pick(next(users), "quiz", now=0) is not None
+
+        pick_us = per_call_us(pick)
+        print(f"{count:>6} {choices_us:>11.2f} {alias_us:>9.2f} {pick_us:>8.2f} {shown / DRAWS:>10.1%}")
+    print("messages per quiz question: 2 before (question + ad message), 1 now")
+
+
+if __name__ == "__main__":
+    main()
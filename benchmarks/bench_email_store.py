@@ -0,0 +1,73 @@
+"""Cost of email capture as the number of stored addresses grows.
+
+Every text message pays for the pending-set check the /email filter does;
+a registration pays for validation and one write-through insert, whose
+UNIQUE constraint is the uniqueness check; a payment pays for one indexed
+lookup by email. None of them should depend on how many emails are stored.
+
+Run from the repo root: python benchmarks/bench_email_store.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.email_store import EmailStore, EmailTaken, PendingSet, normalize_email
+
+CALLS = 100_000
+REGISTRATIONS = 1000
+
+
+def per_call_us(fn, count=CALLS):
+    start = time.perf_counter()
+    for i in range(count):
+        fn(i)
+    return (time.perf_counter() - start) / count * 1_000_000
+
+
+async def measure(stored, directory):
+    legacy_path = os.path.join(directory, f"emails_{stored}.jsonl")
+    with open(legacy_path, "w") as f:
+        for user_id in range(stored):
+            f.write(f'{{"user_id": {user_id}, "email": "user{user_id}@example.com"}}\n')
+
+    start = time.perf_counter()
+    store = EmailStore(os.path.join(directory, f"bot_{stored}.db"), legacy_path=legacy_path)
+    import_s = time.perf_counter() - start
+
+    pending = PendingSet()
+    for user_id in range(0, stored, 100):
+        pending.add(user_id)
+    # most messages come from users who were never asked
+    filter_us = per_call_us(lambda i: (stored + i) in pending)
+
+    start = time.perf_counter()
+    for i in range(REGISTRATIONS):
+        await store.set(stored + i, normalize_email(f"New.User{i}@Example.com"))
+    register_us = (time.perf_counter() - start) / REGISTRATIONS * 1_000_000
+
+    try:
+        await store.set(stored + REGISTRATIONS, "user0@example.com")
+    except EmailTaken:
+        pass
+    else:
+        raise AssertionError("a taken address was accepted")
+
+    lookup_us = per_call_us(lambda i: store.user_for(f"user{i % max(1, stored)}@example.com"))
+    store.close()
+    return import_s, filter_us, register_us, lookup_us
+
+
+def main():
+    print(f"{'stored':>10} {'import s':>9} {'filter µs':>10} {'register µs':>12} {'lookup µs':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for stored in (1_000, 100_000, 1_000_000):
+            import_s, filter_us, register_us, lookup_us = asyncio.run(measure(stored, directory))
+            print(f"{stored:>10,} {import_s:>9.2f} {filter_us:>10.3f} {register_us:>12.1f} {lookup_us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Overhead of the handler/Bot API instrumentation under synthetic load.
+
+Runs the same fake handler with and without metrics.timed wrapped around the
+handler and its Bot API call, like the bot does. The fake call only does the
+CPU work every real call has (encode the request, decode the response), no
+network, so the CPU-bound numbers are an upper bound. The second scenario
+adds a simulated 20 ms Bot API round trip at a load the CPU keeps up with,
+closer to production, and compares CPU time spent per update.
+Run from the repo root: python benchmarks/bench_instrumentation.py
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.metrics import registry, timed
+
+UPDATES = 200_000
+CONCURRENCY = 100
+
+
+REQUEST = {
+    "chat_id": 123456789,
+    "text": "Which note is a whole step above C?",
+    "reply_markup": {"inline_keyboard": [[{"text": t, "callback_data": f"quiz:en:1:{i}"}] for i, t in enumerate("C# D E B".split())]},
+}
+RESPONSE = json.dumps({"ok": True, "result": {"message_id": 1, "date": 0, "chat": {"id": 123456789, "type": "private"}, **REQUEST}})
+
+
+API_LATENCY = 0.0
+
+
+async def fake_api_call():
+    json.dumps(REQUEST)
+    await asyncio.sleep(API_LATENCY)
+    return json.loads(RESPONSE)
+
+
+def make_handler(api_call):
+    async def handler(update):
+        # roughly what a handler does besides waiting: string work and a lookup
+        text = f"quiz:en:{update % 6}:{update % 4}".split(":")
+        await api_call()
+        return text
+
+    return handler
+
+
+async def run(handler, updates, concurrency):
+    queue = asyncio.Queue()
+    for update in range(updates):
+        queue.put_nowait(update)
+
+    async def worker():
+        while not queue.empty():
+            await handler(queue.get_nowait())
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, time.process_time() - cpu_start
+
+
+async def compare(updates, concurrency):
+    plain = make_handler(fake_api_call)
+    instrumented = timed("handler", make_handler(timed("bot_api", fake_api_call, method="sendMessage")), handler="fake")
+
+    # alternate runs so both see the same machine noise
+    results = {"plain": [], "instrumented": []}
+    for _ in range(3):
+        results["plain"].append(await run(plain, updates, concurrency))
+        results["instrumented"].append(await run(instrumented, updates, concurrency))
+
+    for name, runs in results.items():
+        wall, cpu = min(runs)
+        print(f"  {name:<13} {updates / wall:>9.0f} updates/s {cpu / updates * 1e6:>8.2f} us CPU/update")
+    plain_cpu = min(cpu for _, cpu in results["plain"])
+    instrumented_cpu = min(cpu for _, cpu in results["instrumented"])
+    print(f"  overhead      {(instrumented_cpu / plain_cpu - 1) * 100:>9.1f} % CPU")
+
+
+async def main():
+    global API_LATENCY
+    print("CPU bound, no API latency:")
+    await compare(UPDATES, CONCURRENCY)
+    API_LATENCY = 0.02
+    print("20 ms API latency, 100 concurrent updates:")
+    await compare(20_000, 100)
+    print(f"observed: {registry.histogram('handler_seconds', handler='fake').count} handler calls")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""Allocations and time per update for the lesson menu keyboard.
+
+"fresh" builds the InlineKeyboardMarkup and serializes it like PTB does on
+every send (the old lesson_menu), "cached" reuses one FrozenMarkup.
+Run from the repo root: python benchmarks/bench_keyboards.py
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from utils.keyboards import KeyboardCache
+
+LABELS = {
+    "en": ["Basics", "Rhythm", "Intervals", "Scales", "Chords", "Quiz"],
+    "fr": ["Bases", "Rythme", "Intervalles", "Gammes", "Accords", "Quiz"],
+}
+CALLBACKS = ["basics", "rhythm", "intervals", "scales", "chords", "quiz"]
+UPDATES = 10_000
+
+
+def fresh_menu(lang):
+    return InlineKeyboardMarkup(
+        [[InlineKeyboardButton(label, callback_data=data)] for label, data in zip(LABELS[lang], CALLBACKS)]
+    )
+
+
+keyboards = KeyboardCache(LABELS)
+keyboards.register("lesson_menu", lambda lang: [[(label, {"callback_data": data})] for label, data in zip(LABELS[lang], CALLBACKS)])
+
+
+def cached_menu(lang):
+    return keyboards.get("lesson_menu", lang)
+
+
+def measure(make_menu):
+    # one update = get the markup + serialize it for the request body; results
+    # are kept alive so every allocation made for them is counted
+    gc.collect()
+    tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    kept = [(menu, menu.to_dict()) for menu in (make_menu("en" if i % 2 else "fr") for i in range(1000))]
+    blocks = (sys.getallocatedblocks() - blocks_before) / 1000
+    size = tracemalloc.get_traced_memory()[0] / 1000
+    tracemalloc.stop()
+    del kept
+
+    start = time.perf_counter()
+    for i in range(UPDATES):
+        make_menu("en" if i % 2 else "fr").to_dict()
+    elapsed_us = (time.perf_counter() - start) / UPDATES * 1e6
+    return blocks, size, elapsed_us
+
+
+def main():
+    print(f"{'variant':<8} {'blocks/update':>14} {'bytes/update':>13} {'us/update':>10}")
+    for name, make_menu in (("fresh", fresh_menu), ("cached", cached_menu)):
+        blocks, size, us = measure(make_menu)
+        print(f"{name:<8} {blocks:>14.1f} {size:>13.0f} {us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Leaderboard queries at a million users: rank of a user and the top 10.
+
+Scores follow a long-tailed distribution (most users answer a few
+questions, a few answer thousands). Both score store backends are filled
+through their normal incremental path, then queried for random users; the
+baseline sorts all scores for every query, as a leaderboard without an
+index would.
+
+Run from the repo root: python benchmarks/bench_leaderboard.py [users]
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.score_store import MemoryScoreStore, SQLiteScoreStore
+
+QUERIES = 2000
+BATCH = 10_000
+
+
+def scores(users, seed=0):
+    rng = random.Random(seed)
+    return {user_id: int(rng.paretovariate(1.2) * 3) for user_id in range(users)}
+
+
+def timed_us(fn, args):
+    samples = []
+    for arg in args:
+        start = time.perf_counter()
+        fn(arg)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99)]
+
+
+def report(label, rank, top):
+    print(f"{label:<22} {rank[0]:>10.1f} {rank[1]:>10.1f} {top[0]:>10.1f} {top[1]:>10.1f}")
+
+
+async def fill_sqlite(store, points):
+    items = list(points.items())
+    for i in range(0, len(items), BATCH):
+        for user_id, value in items[i:i + BATCH]:
+            store.add(user_id, value, name=f"user{user_id}")
+        await store.flush()
+
+
+def main(users):
+    points = scores(users)
+    rng = random.Random(1)
+    sample = [rng.randrange(users) for _ in range(QUERIES)]
+    print(f"{users:,} users, {len(set(points.values())):,} distinct scores")
+    print(f"{'backend':<22} {'rank p50':>10} {'rank p99':>10} {'top10 p50':>10} {'top10 p99':>10}   (µs)")
+
+    memory = MemoryScoreStore()
+    start = time.perf_counter()
+    for user_id, value in points.items():
+        memory.add(user_id, value)
+    fill = time.perf_counter() - start
+    report("memory (Fenwick)", timed_us(memory.rank, sample), timed_us(lambda _: memory.top(10), sample))
+    print(f"  {fill / users * 1e6:.2f} µs per add")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteScoreStore(os.path.join(directory, "bench.db"))
+        start = time.perf_counter()
+        asyncio.run(fill_sqlite(store, points))
+        fill = time.perf_counter() - start
+        report("sqlite (Fenwick mirror)", timed_us(store.rank, sample), timed_us(lambda _: store.top(10), sample))
+        print(f"  {fill / users * 1e6:.2f} µs per add, flushed in batches of {BATCH:,}")
+        for user_id in sample[:100]:
+            (ahead,) = store._reader.execute(
+                "SELECT COALESCE(SUM(users), 0) FROM score_counts WHERE points > ?", (store.get(user_id),)
+            ).fetchone()
+            assert store.rank(user_id) == ahead + 1, "the tree disagrees with score_counts"
+        store._reader.close()
+        store._writer.close()
+
+    def sorted_rank(user_id):
+        ordered = sorted(points.values(), reverse=True)
+        return ordered.index(points[user_id]) + 1
+
+    def sorted_top(_):
+        return sorted(points.items(), key=lambda item: (-item[1], item[0]))[:10]
+
+    few = sample[:20]
+    report("baseline (sort)", timed_us(sorted_rank, few), timed_us(sorted_top, few))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,110 @@
+"""Bot API calls per lesson view, old per-lesson handlers vs LessonEngine.
+
+Uses fake Telegram objects that only count calls, no network.
+Run from the repo root: python benchmarks/bench_lesson_calls.py
+"""
+import asyncio
+import os
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.i18n import Catalog
+from utils.lesson_delivery import plan_lesson_media
+from utils.lesson_engine import LessonEngine
+
+LESSONS = {
+    "en": {
+        "basics": {
+            "text": "Basics of music theory",
+            "files": [
+                ("audio/note_durations.ogg", "note_lengths_example"),
+                ("image/note_lengths_image.png", "note_lengths_image"),
+                ("audio/notes.ogg", "notes_example"),
+                ("image/notes_image.png", "notes_image"),
+            ],
+            "choose_lesson": "Choose another lesson:",
+        },
+        "rhythm": {
+            "text": "Rhythm concepts",
+            "files": [
+                ("audio/Simple_rhythm_example.ogg", "simple_rhythm_example"),
+                ("audio/Compound_rhythm_example.ogg", "compound_rhythm_example"),
+            ],
+            "choose_lesson": "Choose another lesson:",
+        },
+    }
+}
+
+
+class Calls(Counter):
+    def fake(self, name):
+        async def call(*args, **kwargs):
+            self[name] += 1
+        return call
+
+
+class FakeMessage:
+    chat_id = 1
+
+    def __init__(self, calls):
+        for name in ("edit_text", "reply_text", "reply_voice", "reply_photo", "reply_media_group"):
+            setattr(self, name, calls.fake(name))
+
+
+class FakeQuery:
+    def __init__(self, data, calls):
+        self.data = data
+        self.answer = calls.fake("answer")
+        self.message = FakeMessage(calls)
+
+
+class FakeUpdate:
+    def __init__(self, data, calls):
+        self.callback_query = FakeQuery(data, calls)
+
+
+async def legacy_view(name, calls):
+    """The call pattern of the removed basics/rhythm/... handlers."""
+    query = FakeUpdate(name, calls).callback_query
+    await query.answer()  # handle_button
+    await query.answer()  # the lesson handler itself
+    lesson = LESSONS["en"][name]
+    await query.message.edit_text(lesson)  # the dict edit that always failed
+    await query.message.edit_text(lesson["text"])
+    for file_path, _ in lesson["files"]:
+        await (query.message.reply_photo if file_path.endswith(".png") else query.message.reply_voice)()
+    await query.message.reply_text(lesson["choose_lesson"])
+
+
+async def engine_view(name, calls):
+    async def send_lesson_media(message, items):
+        for mode, group in plan_lesson_media(items):
+            if mode is not None:
+                await message.reply_media_group()
+            else:
+                await (message.reply_photo if group[0][0].endswith(".png") else message.reply_voice)()
+
+    engine = LessonEngine(
+        Catalog(LESSONS), {"basics": "basics", "rhythm": "rhythm"},
+        lambda update: "en", lambda lang, key: key, lambda lang: None, send_lesson_media,
+    )
+    update = FakeUpdate(name, calls)
+    await update.callback_query.answer()  # done once by the callback router
+    await engine.show(update, None, name)
+
+
+async def main():
+    print(f"{'lesson':<10} {'before':>8} {'after':>8}")
+    for name in LESSONS["en"]:
+        before, after = Calls(), Calls()
+        await legacy_view(name, before)
+        await engine_view(name, after)
+        print(f"{name:<10} {sum(before.values()):>8} {sum(after.values()):>8}")
+        print(f"  before: {dict(before)}")
+        print(f"  after:  {dict(after)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,161 @@
+"""Load generator for /bmc-webhook: a burst of signed events, each replayed.
+
+Buy Me a Coffee retries deliveries it thinks failed, so every event is sent
+REPLAYS times, all at once. By default the webhook's work (signature check,
+parsing, queueing) runs in-process against a temporary bot.db, then the
+worker drains the queue; with --url the same burst is POSTed to a running
+bot, which must use the same BMC_WEBHOOK_SECRET.
+
+Run from the repo root:
+    python benchmarks/bench_payments.py [--events N] [--concurrency C] [--url http://localhost:8080]
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.entitlements import EntitlementService
+from utils.payments import SIGNATURE_HEADER, PaymentQueue, PaymentWorker, parse_event, verify_signature
+
+SECRET = os.getenv("BMC_WEBHOOK_SECRET", "bench-secret")
+REPLAYS = 3
+
+
+def make_events(count):
+    period_end = time.time() + 30 * 86400
+    bodies = []
+    for i in range(count):
+        event = {
+            "type": "membership.cancelled" if i % 10 == 9 else "membership.started",
+            "event_id": 10_000_000 + i,
+            "live_mode": False,
+            "data": {"supporter_email": f"fan{i % (count // 2 or 1)}@example.com", "status": "active",
+                     "current_period_end": period_end if i % 20 != 19 else None},
+        }
+        body = json.dumps(event).encode()
+        bodies.append((body, hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()))
+    return bodies
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50": statistics.median(samples) * 1000,
+        "p99": samples[int(len(samples) * 0.99)] * 1000,
+        "max": samples[-1] * 1000,
+    }
+
+
+async def burst(requests, concurrency, send):
+    latencies = []
+    queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+
+    async def client():
+        while not queue.empty():
+            request = queue.get_nowait()
+            start = time.perf_counter()
+            await send(*request)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+async def in_process(bodies, concurrency):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        payments = PaymentQueue(path)
+        entitlements = EntitlementService(path, legacy_path=None)
+        notified = []
+
+        async def notify(user_id, granted):
+            notified.append(user_id)
+
+        worker = PaymentWorker(payments, entitlements, lambda email: int(email[3:email.index("@")]), notify)
+
+        async def webhook(body, signature):
+            # what handle_bmc_webhook does before answering
+            if not verify_signature(body, signature, SECRET):
+                raise RuntimeError("bad signature")
+            await payments.enqueue(*parse_event(body))
+
+        latencies, elapsed = await burst(bodies * REPLAYS, concurrency, webhook)
+
+        start = time.perf_counter()
+        handled = 0
+        while batch := await worker.process_batch():
+            handled += batch
+        drained = time.perf_counter() - start
+
+        await entitlements.stop()
+        payments.close()
+        return latencies, elapsed, handled, drained, len(notified)
+
+
+async def over_http(bodies, concurrency, url):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    connections = asyncio.Queue()
+    for _ in range(concurrency):
+        connections.put_nowait(await asyncio.open_connection(host, port))
+
+    async def post(body, signature):
+        reader, writer = await connections.get()
+        writer.write(
+            f"POST /bmc-webhook HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"{SIGNATURE_HEADER}: {signature}\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        status = await reader.readline()
+        length = 0
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        await reader.readexactly(length)
+        connections.put_nowait((reader, writer))
+        if b" 200 " not in status:
+            raise RuntimeError(status.decode().strip())
+
+    latencies, elapsed = await burst(bodies * REPLAYS, concurrency, post)
+    while not connections.empty():
+        _, writer = connections.get_nowait()
+        writer.close()
+    return latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--url")
+    args = parser.parse_args()
+
+    bodies = make_events(args.events)
+    print(f"{args.events:,} events x {REPLAYS} deliveries, {args.concurrency} concurrent senders")
+    if args.url:
+        latencies, elapsed = asyncio.run(over_http(bodies, args.concurrency, args.url))
+    else:
+        latencies, elapsed, handled, drained, notified = asyncio.run(in_process(bodies, args.concurrency))
+    stats = percentiles(latencies)
+    print(f"webhook: p50 {stats['p50']:.2f} ms, p99 {stats['p99']:.2f} ms, max {stats['max']:.2f} ms, "
+          f"{len(latencies) / elapsed:,.0f} req/s")
+    if not args.url:
+        print(f"worker: {handled:,} unique events applied in {drained:.2f}s ({handled / drained:,.0f}/s), "
+              f"{notified:,} users notified")
+
+
+if __name__ == "__main__":
+    main()
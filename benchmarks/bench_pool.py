@@ -0,0 +1,96 @@
+"""Bot API throughput as the connection pool size varies, against a local stub.
+
+The stub is a keep-alive HTTP/1.1 server that answers every call with
+{"ok": true, "result": true} after `latency` ms, like a far away Bot API.
+Each run fires `calls` concurrent sendMessage calls through tuned_request().
+
+Run from the repo root:
+    python benchmarks/bench_pool.py [calls] [latency ms]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.error import TimedOut
+
+from utils.request_pool import tuned_request
+
+POOL_SIZES = (1, 4, 16, 64, 256)
+RESPONSE = b'{"ok":true,"result":true}'
+
+
+async def serve(latency):
+    connections = 0
+
+    async def handle(reader, writer):
+        nonlocal connections
+        connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":")[1])
+                await reader.readexactly(length)
+                await asyncio.sleep(latency)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: %d\r\n\r\n%s" % (len(RESPONSE), RESPONSE)
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, lambda: connections
+
+
+async def run(url, pool_size, calls):
+    # generous pool timeout: we want to see queueing, not failures
+    request = tuned_request(pool_size, http2=False, pool_timeout=60)
+    await request.initialize()
+    timeouts = 0
+
+    async def call():
+        nonlocal timeouts
+        try:
+            await request.do_request(url, "POST")
+        except TimedOut:
+            timeouts += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(calls)))
+    elapsed = time.perf_counter() - start
+    await request.shutdown()
+    return elapsed, timeouts
+
+
+async def main(calls, latency):
+    server, connections = await serve(latency)
+    port = server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/bot1:stub/sendMessage"
+
+    print(f"{calls} concurrent calls, {latency * 1000:.0f} ms per call")
+    print("pool size   calls/s   elapsed   connections   timeouts")
+    for pool_size in POOL_SIZES:
+        opened = connections()
+        elapsed, timeouts = await run(url, pool_size, calls)
+        print(
+            f"{pool_size:>9}   {calls / elapsed:>7.0f}   {elapsed:>6.2f}s"
+            f"   {connections() - opened:>11}   {timeouts:>8}"
+        )
+
+    server.close()
+    await server.wait_closed()
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+    asyncio.run(main(calls, latency))
@@ -0,0 +1,68 @@
+"""Cost of sampling a practice session from the question bank, by bank size.
+
+Besides the real topics, a synthetic topic with millions of questions shows
+that a session costs the same and the bank allocates nothing per question.
+Run from the repo root: python benchmarks/bench_question_bank.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from content import LANGUAGES
+from utils.i18n import Catalog
+from utils.question_bank import TOPICS, BankSet, Text
+from utils.quiz_engine import QuizEngine
+
+SESSIONS = 2000
+
+
+class Arithmetic:
+    """Stand-in topic of any size: "what is a + b?"."""
+
+    def __init__(self, size):
+        self.name = f"arithmetic_{size}"
+        self._size = size
+
+    def size(self, difficulty):
+        return self._size
+
+    def make(self, index, difficulty, rng):
+        a, b = divmod(index, 1000)
+        return Text("bank_meter", signature=f"{a} + {b}"), [str(a + b), str(a + b + 1)], 0
+
+
+def run(engine, set_id):
+    start = time.perf_counter()
+    for _ in range(SESSIONS):
+        user_data = {}
+        session = engine.start(user_data, set_id)
+        while (question := engine.question(session)) is not None:
+            engine.answer(user_data, set_id, session.index, question.correct)
+    return (time.perf_counter() - start) / SESSIONS * 1000
+
+
+def main():
+    messages = Catalog(LANGUAGES)
+    for size in (1_000, 1_000_000, 100_000_000):
+        topic = Arithmetic(size)
+        TOPICS[topic.name] = topic
+
+    print(f"{'set':<28} {'questions':>12} {'ms/session':>11} {'KiB held':>9}")
+    for topics in (list(TOPICS)[:5], ["arithmetic_1000"], ["arithmetic_1000000"], ["arithmetic_100000000"]):
+        tracemalloc.start()
+        engine = QuizEngine({})
+        bank = BankSet(messages, "en", topics, 3)
+        engine.add_set("bench", bank, session_length=10)
+        # the per-set lru_cache is bounded, so memory stays flat however large the bank is
+        ms = run(engine, "bench")
+        held = tracemalloc.get_traced_memory()[0] / 1024
+        tracemalloc.stop()
+        label = "all real topics" if len(topics) > 1 else topics[0]
+        print(f"{label:<28} {len(bank):>12,} {ms:>11.3f} {held:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Spaced repetition vs. the old "whole quiz every day", on simulated learners.
+
+Each simulated user forgets with a simple memory model: recall after t days
+is exp(-t / S), and a successful review multiplies the stability S by more
+the closer the item was to being forgotten; a lapse shrinks it. An item is
+mastered once S reaches MASTERED_DAYS. The baseline reviews every question
+every day, the scheduler only what ReviewState says is due. Both report how
+many answers it took until all questions were mastered.
+
+Run from the repo root: python benchmarks/bench_srs.py [users] [questions]
+"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.srs import QUALITY_CORRECT, QUALITY_WRONG, ReviewState
+
+DAY = 86400
+HORIZON_DAYS = 365
+MASTERED_DAYS = 30.0
+FIRST_STABILITY = 1.0
+GUESS = 0.25  # chance of getting an unseen question right (4 options)
+SECONDS_PER_ANSWER = 20
+
+
+def review(rng, stability, elapsed_days):
+    """One answer: (recalled, new stability)."""
+    recall = math.exp(-elapsed_days / stability)
+    if rng.random() < recall:
+        return True, stability * (1 + 4 * (1 - recall))
+    return False, max(FIRST_STABILITY, stability * 0.4)
+
+
+def baseline(rng, questions):
+    stability = [0.0] * questions
+    answers = 0
+    for day in range(HORIZON_DAYS):
+        for item in range(questions):
+            if stability[item] == 0:
+                stability[item] = FIRST_STABILITY
+            else:
+                stability[item] = review(rng, stability[item], 1)[1]
+        answers += questions
+        if min(stability) >= MASTERED_DAYS:
+            return answers, day + 1
+    return answers, None
+
+
+def scheduled(rng, questions, timings):
+    state = ReviewState(questions)
+    stability = [0.0] * questions
+    last_seen = [0] * questions
+    answers = 0
+    for day in range(HORIZON_DAYS):
+        now = day * DAY
+        while True:
+            start = time.perf_counter()
+            item = state.next_due(now)
+            timings[0] += time.perf_counter() - start
+            if item is None:
+                break
+            if stability[item] == 0:
+                recalled = rng.random() < GUESS
+                stability[item] = FIRST_STABILITY
+            else:
+                recalled, stability[item] = review(rng, stability[item], (now - last_seen[item]) / DAY)
+            last_seen[item] = now
+            start = time.perf_counter()
+            state.record(item, QUALITY_CORRECT if recalled else QUALITY_WRONG, now)
+            timings[0] += time.perf_counter() - start
+            answers += 1
+            now += SECONDS_PER_ANSWER
+        if min(stability) >= MASTERED_DAYS:
+            return answers, day + 1, state
+    return answers, None, state
+
+
+def summarize(label, results):
+    done = [days for _, days in results if days is not None]
+    answers = sum(count for count, _ in results) / len(results)
+    mean_days = sum(done) / len(done) if done else float("nan")
+    print(f"{label:<10} {answers:>14.1f} {mean_days:>14.1f} {len(done) / len(results):>9.1%}")
+    return answers
+
+
+def main(users, questions):
+    rng = random.Random(0)
+    timings = [0.0]
+    base, srs = [], []
+    blob_bytes = 0
+    start = time.perf_counter()
+    for _ in range(users):
+        base.append(baseline(rng, questions))
+        answers, days, state = scheduled(rng, questions, timings)
+        srs.append((answers, days))
+        blob_bytes = len(state.to_bytes())
+    elapsed = time.perf_counter() - start
+
+    print(f"{users:,} users, {questions} questions, mastery at {MASTERED_DAYS:.0f} days of stability")
+    print(f"{'schedule':<10} {'answers/user':>14} {'days/user':>14} {'mastered':>9}")
+    base_answers = summarize("daily", base)
+    srs_answers = summarize("srs", srs)
+    print(f"answers saved: {1 - srs_answers / base_answers:.0%}")
+    total = sum(count for count, _ in srs)
+    print(f"scheduler: {timings[0] / total * 1e6:.2f} µs per answer (record + next_due)")
+    print(f"state: {blob_bytes} bytes per user and set")
+    print(f"simulated in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 6,
+    )
@@ -0,0 +1,62 @@
+"""Clip synthesis speed: NumPy rendering, Opus encoding and cache hits.
+
+Run from the repo root: python benchmarks/bench_synth.py [repeats]
+
+Encoding is skipped when ffmpeg is not on PATH; cache hits are then measured
+with the raw PCM stored in the cache.
+"""
+import asyncio
+import os
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.synth import INTERVALS, SCALES, TRIADS, Clip, SynthEngine, encode_opus, render
+
+CLIPS = {
+    "interval, melodic": [Clip("interval", name, "C4", "melodic") for name in INTERVALS],
+    "interval, both": [Clip("interval", name, "C4", "both") for name in INTERVALS],
+    "triad, both": [Clip("triad", name, "A3", "both") for name in TRIADS],
+    "scale": [Clip("scale", name, "D4") for name in SCALES],
+}
+
+
+def per_clip_ms(fn, clips, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for clip in clips:
+            fn(clip)
+    return (time.perf_counter() - start) / (repeats * len(clips)) * 1000
+
+
+async def cache_hit_us(clips, repeats, encode):
+    engine = SynthEngine()
+    for clip in clips:
+        pcm = render(clip)
+        engine._store(clip, encode_opus(pcm) if encode else pcm.tobytes())
+    start = time.perf_counter()
+    for _ in range(repeats * 100):
+        for clip in clips:
+            await engine.get(clip)
+    return (time.perf_counter() - start) / (repeats * 100 * len(clips)) * 1_000_000
+
+
+def main(repeats):
+    encode = shutil.which("ffmpeg") is not None
+    print("clips                 render ms   render+encode ms")
+    for label, clips in CLIPS.items():
+        render(clips[0])  # warm up numpy
+        render_ms = per_clip_ms(render, clips, repeats)
+        encoded_ms = per_clip_ms(lambda clip: encode_opus(render(clip)), clips, 1) if encode else None
+        encoded = f"{encoded_ms:>16.1f}" if encoded_ms is not None else "   (no ffmpeg)"
+        print(f"{label:<20} {render_ms:>10.2f}   {encoded}")
+
+    all_clips = [clip for clips in CLIPS.values() for clip in clips]
+    hit = asyncio.run(cache_hit_us(all_clips, repeats, encode))
+    print(f"cache hit: {hit:.2f} µs per clip")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
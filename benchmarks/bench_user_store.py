@@ -0,0 +1,74 @@
+"""Language lookup cost per handler call as the number of users grows.
+
+Compares the old per-click languages.json read/write with UserPreferenceStore,
+whose flush only upserts the rows changed since the last one.
+Run from the repo root: python benchmarks/bench_user_store.py
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.user_store import UserPreferenceStore
+
+CALLS = 2000
+
+
+def old_lookup(path, user_id):
+    # what every lesson handler used to do
+    with open(path, "r") as f:
+        languages = json.load(f)
+    languages[user_id] = "en"
+    with open(path, "w") as f:
+        json.dump(languages, f)
+    return languages.get(user_id, "en")
+
+
+def populate(path, users):
+    with open(path, "w") as f:
+        json.dump({str(i): "en" if i % 3 else "Fa" for i in range(users)}, f)
+
+
+async def bench(users, tmp_dir):
+    path = os.path.join(tmp_dir, f"languages_{users}.json")
+    populate(path, users)
+
+    # languages.json is imported into bot.db on first start
+    store = UserPreferenceStore(os.path.join(tmp_dir, f"bot_{users}.db"), legacy_path=path)
+    start = time.perf_counter()
+    for i in range(CALLS):
+        user_id = str((i * 7919) % users)
+        store.get(user_id, "en")
+        store.set(user_id, "en" if i % 2 else "Fa")
+    store_us = (time.perf_counter() - start) / CALLS * 1e6
+
+    start = time.perf_counter()
+    await store.flush()
+    flush_ms = (time.perf_counter() - start) * 1000
+    await store.stop()
+
+    old_us = None
+    if users <= 10_000:
+        calls = 50
+        start = time.perf_counter()
+        for i in range(calls):
+            old_lookup(path, str(i % users))
+        old_us = (time.perf_counter() - start) / calls * 1e6
+
+    old = f"{old_us:12.1f}" if old_us is not None else f"{'-':>12}"
+    print(f"{users:>9} {old} {store_us:12.3f} {flush_ms:12.1f}")
+
+
+async def main():
+    print(f"{'users':>9} {'old us/call':>12} {'store us/call':>12} {'flush ms':>12}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for users in (1_000, 10_000, 100_000, 1_000_000):
+            await bench(users, tmp_dir)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""Load generator for the /webhook endpoint: how many updates/s one server accepts.
+
+Start the bot (python Music_Theory_bot.py, optionally with WEB_CONCURRENCY=N),
+then: python benchmarks/bench_webhook.py http://localhost:8080/webhook [updates] [concurrency]
+
+The synthetic updates are channel posts, which no handler matches, so the
+number measured is the ingestion ceiling without any Bot API traffic.
+Set WEBHOOK_SECRET to the same value as the server if it uses one.
+"""
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+
+def channel_post(update_id):
+    return {
+        "update_id": update_id,
+        "channel_post": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": -1000000000000 - update_id % 1000, "type": "channel", "title": "load test"},
+            "text": "load test",
+        },
+    }
+
+
+async def main(url, updates, concurrency):
+    headers = {}
+    if os.getenv("WEBHOOK_SECRET"):
+        headers["X-Telegram-Bot-Api-Secret-Token"] = os.environ["WEBHOOK_SECRET"]
+
+    latencies = []
+    failures = 0
+    next_id = iter(range(updates))
+
+    async def worker(client):
+        nonlocal failures
+        for update_id in next_id:
+            start = time.perf_counter()
+            response = await client.post(url, json=channel_post(update_id), headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                failures += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    print(f"{updates} updates in {elapsed:.2f}s: {updates / elapsed:.0f} updates/s, {failures} failed")
+    print(f"latency p50 {p(0.5):.1f} ms, p99 {p(0.99):.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    url = sys.argv[1]
+    updates = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    asyncio.run(main(url, updates, concurrency))
@@ -0,0 +1,140 @@
+"""Load test for update processing against a fake Bot API.
+
+Every chat sends a burst of text updates; the handler makes two Bot API calls
+that each take `latency` ms. Reports throughput, queueing-to-done latency
+(p50/p99/max) and checks that every chat's updates ran in the order sent.
+
+Run from the repo root:
+    python benchmarks/load_test.py [chats] [updates per chat] [latency ms] [ordered|sequential]
+
+Defaults: 1000 chats, 5 updates each, 50 ms per call, ordered
+(ChatOrderedUpdateProcessor). "sequential" is PTB's default processing, which
+is slow enough that it's best run with fewer chats, e.g. 50 5 50 sequential.
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Update
+from telegram.ext import Application, MessageHandler, filters
+from telegram.request import BaseRequest
+
+from utils.update_processor import ChatOrderedUpdateProcessor
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Load test", "username": "load_test_bot"}
+
+
+class FakeBotAPI(BaseRequest):
+    """Answers getMe and sendMessage after a fixed delay, counts calls."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self.message_id = 0
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, **timeouts):
+        self.calls += 1
+        endpoint = url.rpartition("/")[2]
+        if endpoint == "getMe":
+            result = BOT_USER
+        else:
+            await asyncio.sleep(self.latency)
+            parameters = request_data.parameters if request_data else {}
+            self.message_id += 1
+            result = {
+                "message_id": self.message_id,
+                "date": int(time.time()),
+                "chat": {"id": parameters.get("chat_id", 0), "type": "private"},
+                "from": BOT_USER,
+                "text": parameters.get("text", ""),
+            }
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+def text_update(update_id, chat_id, sequence):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private", "first_name": "user"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "user"},
+            "text": str(sequence),
+        },
+    }
+
+
+async def main(chats, per_chat, latency, mode):
+    total = chats * per_chat
+    api = FakeBotAPI(latency)
+    processor = ChatOrderedUpdateProcessor() if mode == "ordered" else None
+    builder = Application.builder().token("1:load-test").request(api).updater(None)
+    application = builder.concurrent_updates(processor or False).build()
+
+    queued_at = {}
+    latencies = []
+    seen = {}  # chat id -> sequence numbers in the order they were handled
+    done = asyncio.Event()
+
+    async def handle(update, context):
+        chat_id = update.effective_chat.id
+        seen.setdefault(chat_id, []).append(int(update.message.text))
+        # two calls, like an answer check followed by the next question
+        await update.message.reply_text("checked")
+        await update.message.reply_text("next")
+        latencies.append(time.perf_counter() - queued_at[update.update_id])
+        if len(latencies) == total:
+            done.set()
+
+    application.add_handler(MessageHandler(filters.TEXT, handle))
+    await application.initialize()
+    await application.start()
+
+    updates = [
+        Update.de_json(text_update(sequence * chats + chat, 10_000 + chat, sequence), application.bot)
+        for sequence in range(per_chat)
+        for chat in range(chats)
+    ]
+    start = time.perf_counter()
+    for update in updates:
+        if processor is not None:
+            await processor.admit()
+        queued_at[update.update_id] = time.perf_counter()
+        await application.update_queue.put(update)
+    await done.wait()
+    elapsed = time.perf_counter() - start
+
+    await application.stop()
+    await application.shutdown()
+
+    out_of_order = sum(1 for sequences in seen.values() if sequences != sorted(sequences))
+    latencies.sort()
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    print(f"{mode}: {chats} chats x {per_chat} updates, {latency * 1000:.0f} ms per Bot API call")
+    print(f"{total} updates in {elapsed:.2f}s: {total / elapsed:.0f} updates/s, {api.calls} Bot API calls")
+    print(f"latency p50 {p(0.5):.0f} ms, p99 {p(0.99):.0f} ms, max {latencies[-1] * 1000:.0f} ms")
+    print(f"chats handled out of order: {out_of_order}")
+
+
+if __name__ == "__main__":
+    chats = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    per_chat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    latency = (int(sys.argv[3]) if len(sys.argv) > 3 else 50) / 1000
+    mode = sys.argv[4] if len(sys.argv) > 4 else "ordered"
+    if mode not in ("ordered", "sequential"):
+        sys.exit(__doc__)
+    asyncio.run(main(chats, per_chat, latency, mode))
@@ -0,0 +1,15 @@
+"""Report missing or broken translations in content.py.
+
+Usage: python check_translations.py   (exits with 1 when problems are found)
+"""
+import sys
+
+from content import LANGUAGES, lessons, quiz_questions
+from utils.i18n import validate
+
+if __name__ == "__main__":
+    problems = validate(LANGUAGES, lessons, quiz_questions)
+    for problem in problems:
+        print(problem)
+    print(f"{len(problems)} problem(s) found")
+    sys.exit(1 if problems else 0)
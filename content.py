@@ -0,0 +1,523 @@
+"""Lesson texts, UI strings and quiz questions for every supported language."""
+
+lessons = {
+    "en": {
+        "basics": {
+            "text": "Basics of music theory:\n"
+                    "- Note lengths: 1 Whole note = 2 Half notes = 4 Quarter notes = 8 Eighth notes = 16 Sixteenth notes\n"
+                    "- Note names: C (Do), D (Re), E (Mi), F (Fa), G (Sol), A (La), B (Si).\n"
+                    "\nListen to the note lengths and pay attention to the image:",
+            "files": [
+                ("audio/note_durations.ogg", "note_lengths_example"),
+                ("image/note_lengths_image.png", "note_lengths_image"),
+                ("audio/notes.ogg", "notes_example"),
+                ("image/notes_image.png", "notes_image"),
+            ],
+            "choose_lesson": "Choose another lesson:"
+        },
+
+        "rhythm": {
+            "text": "Rhythm concepts:\n"
+                    "- Time signatures:\n"
+                    "  * Simple Rhythms: Each beat is divided into two equal parts (e.g., 2/4, 3/4, 4/4).\n"
+                    "  * Compound Rhythms: Each beat is divided into three equal parts (e.g., 6/8, 9/8, 12/8).\n"
+                    "- Tempo: Beats per minute (BPM).\n"
+                    "- Syncopation: Offbeat emphasis.\n"
+                    "\nChoose another lesson:",
+            "files": [
+                ("audio/Simple_rhythm_example.ogg", "simple_rhythm_example"),
+                ("audio/Compound_rhythm_example.ogg", "compound_rhythm_example"),
+            ],
+            "choose_lesson": "Choose another lesson:"
+            }},
+
+    "Fa": {
+        "basics": {
+            "text": ":مبانی تئوری موسیقی:\n"
+                    "- 1 نت گرد = 2 نت سفید  = 4  سیاه = 8  یک لا چنگ = 16 دو لا چنگ \n"
+                    "- نام‌های نت ها و نماد های آن ها: C (Do)، D (Re)، E (Mi)، F (Fa)، G (Sol)، A (La)، B (sd).\n"
+                    "\nبه طول نت گوش دهید و به تصویر توجه کنید:",
+            "files": [
+                ("audio/Simple_rhythm_example.ogg", "simple_rhythm_example"),
+                ("audio/Compound_rhythm_example.ogg", "compound_rhythm_example"),
+            ],
+            "choose_lesson" : "یک درس دیگر انتخاب کنید"
+        },
+
+        "rhythm": {
+            "text": "مفاهیم ریتم:\n"
+                    "- ;کسر های میزان:\n"
+                    " * ریتم های ساده: هر ضرب به دو قسمت مساوی تقسیم می شود (به عنوان مثال، 2/4، 3/4، 4/4).\n"
+                    " * ریتم های مرکب: هر ضرب به سه قسمت مساوی تقسیم می شود (به عنوان مثال، 6/8، 9/8، 12/8).\n"
+                    "- سرعت، تمپو: ضرب در دقیقه (BPM).\n"
+                    "- سنکوپ: جابجایی تاکید ها.\n",
+            "files": [
+                ("audio/Simple_rhythm_example.ogg", "simple_rhythm_example"),
+                ("audio/Compound_rhythm_example.ogg", "compound_rhythm_example"),
+            ],
+            "choose_lesson": ":یک درس دیگر را انتخاب کنید"
+
+        },
+
+        "interval": {
+            "text": "- **Intervals**:\n"
+        "Here are the basic intervals from smallest to an octave:\n\n"
+        "🎵 **Minor Second (m2)** – 1 semitone (C → C# / Db)\n"
+        "🎵 **Major Second (M2)** – 2 semitones (C → D)\n"
+        "🎵 **Minor Third (m3)** – 3 semitones (C → Eb)\n"
+        "🎵 **Major Third (M3)** – 4 semitones (C → E)\n"
+        "🎵 **Perfect Fourth (P4)** – 5 semitones (C → F)\n"
+        "🎵 **Tritone (A4/d5)** – 6 semitones (C → F# / Gb)\n"
+        "🎵 **Perfect Fifth (P5)** – 7 semitones (C → G)\n"
+        "🎵 **Minor Sixth (m6)** – 8 semitones (C → Ab)\n"
+        "🎵 **Major Sixth (M6)** – 9 semitones (C → A)\n"
+        "🎵 **Minor Seventh (m7)** – 10 semitones (C → Bb)\n"
+        "🎵 **Major Seventh (M7)** – 11 semitones (C → B)\n"
+        "🎵 **Perfect Octave (P8)** – 12 semitones (C → C)\n"
+        "⬇️ Listen to the intervals below:",
+
+            "files":[
+                ("audio/Intervals.ogg", "Intervals Example")
+            ],
+            "choose_lesson": ":یک درس دیگر را انتخاب کنید"
+        },
+
+        "scales":{
+            "text": "major(ماژور): C (دو)-> D (ره)-> E (می)-> F (فا)-> G (سل)-> A (لا)-> B (سی)-> C (دو)\n "
+                "minor(مینور) : A -> B -> C -> D -> E -> F -> G -> A \n",
+            "files": [
+                ("audio/scales.ogg", "scales"),
+            ],
+            "choose_lesson" : "یک درس دیگر انتخاب کنید"
+        },
+
+        "chords":{"text": "\n آکورد های سه صدایی (Triad Chords):"
+                          "ماژور: فاصله نت اول و دوم دوپرده (سوم بزرگ)، فاصله نت اول و سوم سه و نیم پرده (پنجم درست)\n"
+                          " مثال: C, E, G آکورد دو ماژور\n"
+                          "مینور: فاصله نت اول و دوم یک و نیم (سوم کوچک)، فاصله نت اول و سوم سه و نیم پرده (پنجم درست)\n"
+                          " مثال: C, Eb, G آکورد دو مینور"
+            ,
+            "files": [
+                ("audio/chords.ogg", "chords"),
+            ],
+            "choose_lesson" : "یک درس دیگر انتخاب کنید"
+
+        }},
+
+    "es": {
+        "basics": {
+            "text": "Conceptos básicos de la teoría musical:\n"
+                    "- Duraciones de notas: 1 redonda = 2 blancas = 4 negras = 8 corcheas = 16 semicorcheas\n"
+                    "- Nombres de notas: C (Do), D (Re), E (Mi), F (Fa), G (Sol), A (La), B (Si).\n"
+                    "\nEscucha las duraciones de las notas y observa la imagen:",
+            "files": [
+                ("audio/note_durations.ogg", "ejemplo_duraciones_notas"),
+                ("image/note_lengths_image.png", "imagen_duraciones_notas"),
+                ("audio/notes.ogg", "ejemplo_notas"),
+                ("image/notes_image.png", "imagen_notas"),
+            ],
+            "choose_lesson": "Elige otra lección:"
+        },
+        "rhythm": {
+            "text": "Conceptos de ritmo:\n"
+                    "- Signaturas de tiempo:\n"
+                    "  * Ritmos simples: Cada pulso se divide en dos partes iguales (ej., 2/4, 3/4, 4/4).\n"
+                    "  * Ritmos compuestos: Cada pulso se divide en tres partes iguales (ej., 6/8, 9/8, 12/8).\n"
+                    "- Tempo: PPM (Pulsos por minuto).\n"
+                    "- Síncopa: Énfasis en el contratiempo.\n"
+                    "\nElige otra lección:",
+            "files": [
+                ("audio/Simple_rhythm_example.ogg", "ejemplo_ritmo_simple"),
+                ("audio/Compound_rhythm_example.ogg", "ejemplo_ritmo_compuesto"),
+            ],
+            "choose_lesson": "Elige otra lección:"
+            }},
+
+    "fr": {
+        "basics": {
+            "text": "Notions de base en théorie musicale:\n"
+                    "- Durées des notes: 1 ronde = 2 blanches = 4 noires = 8 croches = 16 double-croches\n"
+                    "- Noms des notes: C (Do), D (Ré), E (Mi), F (Fa), G (Sol), A (La), B (Si).\n"
+                    "\nÉcoutez les durées des notes et regardez l’image:",
+            "files": [
+                ("audio/note_durations.ogg", "exemple_durees_notes"),
+                ("image/note_lengths_image.png", "image_durees_notes"),
+                ("audio/notes.ogg", "exemple_notes"),
+                ("image/notes_image.png", "image_notes"),
+            ],
+            "choose_lesson": "Choisissez une autre leçon:"
+        },
+        "rhythm": {
+            "text": "Concepts du rythme:\n"
+                    "- Signatures temporelles:\n"
+                    "  * Rythmes simples : Chaque battement est divisé en deux parties égales (ex. : 2/4, 3/4, 4/4).\n"
+                    "  * Rythmes composés : Chaque battement est divisé en trois parties égales (ex. : 6/8, 9/8, 12/8).\n"
+                    "- Tempo : Battements par minute (BPM).\n"
+                    "- Syncopation : Accentuation hors temps.\n"
+                    "\nChoisissez une autre leçon:",
+            "files": [
+                ("audio/Simple_rhythm_example.ogg", "exemple_rythme_simple"),
+                ("audio/Compound_rhythm_example.ogg", "exemple_rythme_composé"),
+            ],
+            "choose_lesson": "Choisissez une autre leçon:"
+    }}
+}
+LANGUAGES = {
+    "en": {
+        "start": "Hello! Welcome to the Music Theory Bot. Choose a topic to start learning:",
+        "help": "Available commands:\n/start - Welcome and lesson menu\n/help - Show this help message\n/quiz - Take a music theory quiz\n/ear - Ear training: name what you hear\n/practice - Practice questions by topic and level\n/leaderboard - Top players\n/rank - Your rank and daily streak",
+        "help_commands": "/start - Welcome and lesson menu\n/help - Show this help message\n/quiz - Take a music theory quiz\n/ear - Ear training: name what you hear\n/practice - Practice questions by topic and level\n/leaderboard - Top players\n/rank - Your rank and daily streak",
+        "ear_training_interval": "Listen: which interval is this?",
+        "ear_training_triad": "Listen: which chord is this?",
+        "bank_interval": "What is the interval from {low} up to {high}?",
+        "bank_key_signature": "How many sharps or flats does {key} have?",
+        "key_major": "{tonic} major",
+        "key_minor": "{tonic} minor",
+        "bank_duration": "How many {small} notes fit in a {big} note?",
+        "duration_whole": "whole", "duration_half": "half", "duration_quarter": "quarter", "duration_eighth": "eighth", "duration_sixteenth": "sixteenth",
+        "duration_whole_many": "whole", "duration_half_many": "half", "duration_quarter_many": "quarter", "duration_eighth_many": "eighth", "duration_sixteenth_many": "sixteenth",
+        "duration_dotted": "dotted {name}", "duration_dotted_many": "dotted {name}",
+        "bank_chord": "Which notes make up the {chord} chord?",
+        "bank_meter": "What kind of meter is {signature}?",
+        "meter_simple_duple": "Simple duple",
+        "meter_simple_triple": "Simple triple",
+        "meter_simple_quadruple": "Simple quadruple",
+        "meter_compound_duple": "Compound duple",
+        "meter_compound_triple": "Compound triple",
+        "meter_compound_quadruple": "Compound quadruple",
+        "practice_usage": "Usage: /practice [topic] [level 1-3]\nTopics: all, intervals, key_signatures, note_durations, chord_spelling, time_signatures",
+        "quiz_question": "Here is your question:",
+        "quiz_correct": "✅ Correct! You earned 1 point.",
+        "quiz_all_caught_up": "✅ You're all caught up! Come back later for your next review, or try /practice.",
+        "quiz_wrong": "❌ Incorrect. The correct answer is",
+        "quiz_done": "🎉 Quiz complete! Your score: {score}/{total}",
+        "leaderboard_title": "🏆 Top players:",
+        "leaderboard_empty": "No scores yet. Answer a /quiz question to get on the board!",
+        "leaderboard_anonymous": "Player",
+        "leaderboard_you": "You: #{rank} with {points} points",
+        "rank_text": "🏅 You're #{rank} of {players} players with {points} points.",
+        "rank_none": "You have no points yet. Try /quiz!",
+        "streak_text": "🔥 Daily streak: {current} (best: {best})",
+        "support": "☕ Support us: Buy Me a Coffee - https://www.buymeacoffee.com/musicbot",
+        "premium_required": "🔒 This lesson is for premium members. Subscribe below to unlock it!",
+        "premium_granted": "🎉 Your premium membership is active. Send /premium to watch the premium lessons!",
+        "premium_revoked": "Your premium membership has ended. Thank you for your support!",
+        "email_prompt": "📧 Please send the email address you use on Buy Me a Coffee.",
+        "email_invalid": "⚠️ That doesn't look like an email address. Please try again.",
+        "email_taken": "⚠️ That email is already registered by another user.",
+        "email_saved": "✅ Email saved. Thank you!",
+        "basics": "Basics",
+        "rhythm": "Rhythm",
+        "intervals": "Intervals",
+        "scales": "Scales",
+        "chords": "Chords",
+        "quiz": "Quiz",
+        "basics_text": "Basics of music theory:\n- Note lengths...",
+        "note_lengths_example": "Note lengths example.",
+        "note_lengths_image": "Visual representation of note lengths.",
+        "notes_example": "Notes example.",
+        "notes_image": "Visual representation of notes.",
+        "choose_another_lesson": "Choose another lesson:"
+    },
+    "Fa": {
+        "start": "سلام! به ربات تئوری موسیقی خوش آمدید. موضوعی را برای شروع یادگیری انتخاب کنید:",
+        "help": "دستورات موجود:\n/start - خوش آمدید و منوی درس\n/help - نمایش این پیام راهنما\n/کویز - شرکت در آزمون تئوری موسیقی\n/ear - تمرین گوش: آنچه را می‌شنوید نام ببرید\n/practice - تمرین سوال‌ها بر اساس موضوع و سطح\n/leaderboard - برترین بازیکنان\n/rank - رتبه و روزهای پیاپی شما",
+        "ear_training_interval": "گوش کنید: این کدام فاصله است؟",
+        "ear_training_triad": "گوش کنید: این کدام آکورد است؟",
+        "bank_interval": "فاصله از {low} تا {high} (رو به بالا) چیست؟",
+        "bank_key_signature": "{key} چند دیز یا بمل دارد؟",
+        "key_major": "{tonic} ماژور",
+        "key_minor": "{tonic} مینور",
+        "bank_duration": "چند {small} در یک {big} جا می‌شود؟",
+        "duration_whole": "گرد", "duration_half": "سفید", "duration_quarter": "سیاه", "duration_eighth": "چنگ", "duration_sixteenth": "دولاچنگ",
+        "duration_whole_many": "گرد", "duration_half_many": "سفید", "duration_quarter_many": "سیاه", "duration_eighth_many": "چنگ", "duration_sixteenth_many": "دولاچنگ",
+        "duration_dotted": "{name} نقطه‌دار", "duration_dotted_many": "{name} نقطه‌دار",
+        "bank_chord": "آکورد {chord} از چه نت‌هایی تشکیل شده است؟",
+        "bank_meter": "میزان {signature} از چه نوعی است؟",
+        "meter_simple_duple": "ساده دوضربی",
+        "meter_simple_triple": "ساده سه‌ضربی",
+        "meter_simple_quadruple": "ساده چهارضربی",
+        "meter_compound_duple": "ترکیبی دوضربی",
+        "meter_compound_triple": "ترکیبی سه‌ضربی",
+        "meter_compound_quadruple": "ترکیبی چهارضربی",
+        "practice_usage": "استفاده: /practice [موضوع] [سطح ۱ تا ۳]\nموضوع‌ها: all, intervals, key_signatures, note_durations, chord_spelling, time_signatures",
+        "quiz_question": "سوال شما اینجاست:",
+        "quiz_correct": "✅ درست است! شما 1 امتیاز کسب کردید.",
+        "quiz_all_caught_up": "✅ همه مرورها را انجام داده‌اید! بعداً برای مرور بعدی برگردید، یا /practice را امتحان کنید.",
+        "quiz_wrong": "❌ نادرست است. پاسخ صحیح این است",
+        "quiz_done": "🎉 امتحان کامل شد! امتیاز شما: {score}/{total}",
+        "leaderboard_title": "🏆 برترین بازیکنان:",
+        "leaderboard_empty": "هنوز امتیازی ثبت نشده است. با پاسخ به یک سوال /quiz وارد جدول شوید!",
+        "leaderboard_anonymous": "بازیکن",
+        "leaderboard_you": "شما: رتبه {rank} با {points} امتیاز",
+        "rank_text": "🏅 شما در رتبه {rank} از {players} بازیکن با {points} امتیاز هستید.",
+        "rank_none": "هنوز امتیازی ندارید. /quiz را امتحان کنید!",
+        "streak_text": "🔥 روزهای پیاپی: {current} (بهترین: {best})",
+        "support": "☕ از ما حمایت کنید: برای من یک قهوه بخرید - https://www.buymeacoffee.com/musicbot",
+        "premium_required": "🔒 این درس مخصوص اعضای ویژه است. برای دسترسی، از دکمه زیر مشترک شوید!",
+        "premium_granted": "🎉 عضویت ویژه شما فعال شد. برای دیدن درس‌های ویژه /premium را بفرستید!",
+        "premium_revoked": "عضویت ویژه شما به پایان رسید. از حمایت شما سپاسگزاریم!",
+        "email_prompt": "📧 لطفاً ایمیلی را که در Buy Me a Coffee استفاده می‌کنید بفرستید.",
+        "email_invalid": "⚠️ این یک آدرس ایمیل معتبر به نظر نمی‌رسد. لطفاً دوباره امتحان کنید.",
+        "email_taken": "⚠️ این ایمیل قبلاً توسط کاربر دیگری ثبت شده است.",
+        "email_saved": "✅ ایمیل ذخیره شد. متشکریم!",
+        "basics": "مبانی",
+        "rhythm": "ریتم",
+        "intervals": "فاصله ها",
+        "scales": "گام ها",
+        "chords": "آکورد",
+        "quiz": "مسابقه",
+        "basics_text": "\nمبانی تئوری موسیقی:" "طول نت...",
+        "note_lengths_example": "مثال طول یادداشت.",
+        "note_lengths_image": "نمایش بصری طول نت.",
+        "notes_example": "نمونه یادداشت.",
+        "notes_image": "نمایش بصری یادداشت‌ها.",
+        "choose_another_lesson": "یک درس دیگر را انتخاب کنید:",
+    },
+    "fr": {
+        "start": "Bonjour! Bienvenue sur le bot de théorie musicale. Choisissez un sujet pour commencer l'apprentissage :",
+        "help": "Commandes disponibles:\n/start - Accueil et menu des leçons\n/help - Afficher ce message d'aide\n/quiz - Faire un quiz de théorie musicale\n/ear - Entraînement de l'oreille : nommez ce que vous entendez\n/practice - Questions d'entraînement par sujet et niveau\n/leaderboard - Meilleurs joueurs\n/rank - Votre rang et votre série quotidienne",
+        "help_commands": "/start - Accueil et menu des leçons\n/help - Afficher ce message d'aide\n/quiz - Faire un quiz de théorie musicale\n/ear - Entraînement de l'oreille : nommez ce que vous entendez\n/practice - Questions d'entraînement par sujet et niveau\n/leaderboard - Meilleurs joueurs\n/rank - Votre rang et votre série quotidienne",
+        "ear_training_interval": "Écoutez : quel est cet intervalle ?",
+        "ear_training_triad": "Écoutez : quel est cet accord ?",
+        "bank_interval": "Quel est l'intervalle ascendant de {low} à {high} ?",
+        "bank_key_signature": "Combien de dièses ou de bémols a {key} ?",
+        "key_major": "{tonic} majeur",
+        "key_minor": "{tonic} mineur",
+        "bank_duration": "Combien de {small} tiennent dans une {big} ?",
+        "duration_whole": "ronde", "duration_half": "blanche", "duration_quarter": "noire", "duration_eighth": "croche", "duration_sixteenth": "double croche",
+        "duration_whole_many": "rondes", "duration_half_many": "blanches", "duration_quarter_many": "noires", "duration_eighth_many": "croches", "duration_sixteenth_many": "doubles croches",
+        "duration_dotted": "{name} pointée", "duration_dotted_many": "{name} pointées",
+        "bank_chord": "Quelles notes forment l'accord {chord} ?",
+        "bank_meter": "Quel type de mesure est {signature} ?",
+        "meter_simple_duple": "Simple à 2 temps",
+        "meter_simple_triple": "Simple à 3 temps",
+        "meter_simple_quadruple": "Simple à 4 temps",
+        "meter_compound_duple": "Composée à 2 temps",
+        "meter_compound_triple": "Composée à 3 temps",
+        "meter_compound_quadruple": "Composée à 4 temps",
+        "practice_usage": "Utilisation : /practice [sujet] [niveau 1-3]\nSujets : all, intervals, key_signatures, note_durations, chord_spelling, time_signatures",
+        "quiz_question": "Voici votre question :",
+        "quiz_correct": "✅ Correct! Vous avez gagné 1 point.",
+        "quiz_all_caught_up": "✅ Vous êtes à jour ! Revenez plus tard pour votre prochaine révision, ou essayez /practice.",
+        "quiz_wrong": "❌ Incorrect. La bonne réponse est",
+        "quiz_done": "🎉 Quiz terminé! Votre score: {score}/{total}",
+        "leaderboard_title": "🏆 Meilleurs joueurs :",
+        "leaderboard_empty": "Aucun score pour l'instant. Répondez à une question de /quiz pour entrer au classement !",
+        "leaderboard_anonymous": "Joueur",
+        "leaderboard_you": "Vous : n°{rank} avec {points} points",
+        "rank_text": "🏅 Vous êtes n°{rank} sur {players} joueurs avec {points} points.",
+        "rank_none": "Vous n'avez pas encore de points. Essayez /quiz !",
+        "streak_text": "🔥 Série quotidienne : {current} (record : {best})",
+        "support": "☕ Soutenez-nous: Achetez-moi un café - https://www.buymeacoffee.com/musicbot",
+        "premium_required": "🔒 Cette leçon est réservée aux membres premium. Abonnez-vous ci-dessous pour la débloquer !",
+        "premium_granted": "🎉 Votre abonnement premium est actif. Envoyez /premium pour voir les leçons premium !",
+        "premium_revoked": "Votre abonnement premium est terminé. Merci pour votre soutien !",
+        "email_prompt": "📧 Envoyez l'adresse e-mail que vous utilisez sur Buy Me a Coffee.",
+        "email_invalid": "⚠️ Cela ne ressemble pas à une adresse e-mail. Veuillez réessayer.",
+        "email_taken": "⚠️ Cette adresse e-mail est déjà enregistrée par un autre utilisateur.",
+        "email_saved": "✅ E-mail enregistré. Merci !",
+        "basics": "Bases",
+        "rhythm": "Rythme",
+        "intervals": "Intervalles",
+        "scales": "Gammes",
+        "chords": "Accords",
+        "quiz": "Quiz",
+        "basics_text": "Les bases de la théorie musicale:\n- Durées des notes...",
+        "note_lengths_example": "Exemple de durées des notes.",
+        "note_lengths_image": "Représentation visuelle des durées des notes.",
+        "notes_example": "Exemple de notes.",
+        "notes_image": "Représentation visuelle des notes.",
+        "choose_another_lesson": "Choisir une autre leçon:"
+    },
+    "es": {
+        "start": "¡Hola! Bienvenido al bot de teoría musical. Elige un tema para comenzar a aprender:",
+        "help": "Comandos disponibles:\n/start - Bienvenida y menú de lecciones\n/help - Mostrar este mensaje de ayuda\n/quiz - Realizar una prueba de teoría musical\n/ear - Entrenamiento auditivo: nombra lo que escuchas\n/practice - Preguntas de práctica por tema y nivel\n/leaderboard - Mejores jugadores\n/rank - Tu posición y tu racha diaria",
+        "help_commands": "/start - Bienvenida y menú de lecciones\n/help - Mostrar este mensaje de ayuda\n/quiz - Realizar una prueba de teoría musical\n/ear - Entrenamiento auditivo: nombra lo que escuchas\n/practice - Preguntas de práctica por tema y nivel\n/leaderboard - Mejores jugadores\n/rank - Tu posición y tu racha diaria",
+        "ear_training_interval": "Escucha: ¿qué intervalo es este?",
+        "ear_training_triad": "Escucha: ¿qué acorde es este?",
+        "bank_interval": "¿Qué intervalo ascendente hay de {low} a {high}?",
+        "bank_key_signature": "¿Cuántos sostenidos o bemoles tiene {key}?",
+        "key_major": "{tonic} mayor",
+        "key_minor": "{tonic} menor",
+        "bank_duration": "¿Cuántas {small} caben en una {big}?",
+        "duration_whole": "redonda", "duration_half": "blanca", "duration_quarter": "negra", "duration_eighth": "corchea", "duration_sixteenth": "semicorchea",
+        "duration_whole_many": "redondas", "duration_half_many": "blancas", "duration_quarter_many": "negras", "duration_eighth_many": "corcheas", "duration_sixteenth_many": "semicorcheas",
+        "duration_dotted": "{name} con puntillo", "duration_dotted_many": "{name} con puntillo",
+        "bank_chord": "¿Qué notas forman el acorde {chord}?",
+        "bank_meter": "¿Qué tipo de compás es {signature}?",
+        "meter_simple_duple": "Binario simple",
+        "meter_simple_triple": "Ternario simple",
+        "meter_simple_quadruple": "Cuaternario simple",
+        "meter_compound_duple": "Binario compuesto",
+        "meter_compound_triple": "Ternario compuesto",
+        "meter_compound_quadruple": "Cuaternario compuesto",
+        "practice_usage": "Uso: /practice [tema] [nivel 1-3]\nTemas: all, intervals, key_signatures, note_durations, chord_spelling, time_signatures",
+        "quiz_question": "Aquí está tu pregunta:",
+        "quiz_correct": "✅ ¡Correcto! Has ganado 1 punto.",
+        "quiz_all_caught_up": "✅ ¡Estás al día! Vuelve más tarde para tu próximo repaso, o prueba /practice.",
+        "quiz_wrong": "❌ Incorrecto. La respuesta correcta es",
+        "quiz_done": "🎉 ¡Prueba completada! Tu puntuación: {score}/{total}",
+        "leaderboard_title": "🏆 Mejores jugadores:",
+        "leaderboard_empty": "Aún no hay puntuaciones. ¡Responde una pregunta de /quiz para entrar en la tabla!",
+        "leaderboard_anonymous": "Jugador",
+        "leaderboard_you": "Tú: n.º {rank} con {points} puntos",
+        "rank_text": "🏅 Estás en el puesto {rank} de {players} jugadores con {points} puntos.",
+        "rank_none": "Aún no tienes puntos. ¡Prueba /quiz!",
+        "streak_text": "🔥 Racha diaria: {current} (mejor: {best})",
+        "support": "☕ Apóyanos: Cómprame un café - https://www.buymeacoffee.com/musicbot",
+        "premium_required": "🔒 Esta lección es para miembros premium. ¡Suscríbete abajo para desbloquearla!",
+        "premium_granted": "🎉 Tu membresía premium está activa. ¡Envía /premium para ver las lecciones premium!",
+        "premium_revoked": "Tu membresía premium ha terminado. ¡Gracias por tu apoyo!",
+        "email_prompt": "📧 Envía la dirección de correo que usas en Buy Me a Coffee.",
+        "email_invalid": "⚠️ Eso no parece una dirección de correo. Inténtalo de nuevo.",
+        "email_taken": "⚠️ Ese correo ya está registrado por otro usuario.",
+        "email_saved": "✅ Correo guardado. ¡Gracias!",
+        "basics": "Conceptos básicos",
+        "rhythm": "Ritmo",
+        "intervals": "Intervalos",
+        "scales": "Escalas",
+        "chords": "Acordes",
+        "quiz": "Cuestionario",
+        "basics_text": "Conceptos básicos de la teoría musical:\n- Duración de las notas...",
+        "note_lengths_example": "Ejemplo de duración de notas.",
+        "note_lengths_image": "Representación visual de la duración de las notas.",
+        "notes_example": "Ejemplo de notas.",
+        "notes_image": "Representación visual de las notas.",
+        "choose_another_lesson": "Elige otra lección:"
+    }
+}
+
+# Quiz Questions
+quiz_questions ={
+    "en":[
+    {
+        "question": "What is the time signature of a waltz?",
+        "options": ["2/4", "3/4", "4/4", "6/8"],
+        "correct": "3/4"
+    },
+    {
+        "question": "Which note is a whole step above C?",
+        "options": ["C#", "D", "E", "B"],
+        "correct": "D"
+    },
+    {
+        "question": "How many beats does a dotted half note get?",
+        "options": ["2", "3", "4", "6"],
+        "correct": "3"
+    },
+    {
+        "question": "What would be the name of the following scale (D -> E -> F# -> G -> A -> B -> C# -> D)?",
+        "options": ["D major", "E minor", "C major", "D minor"],
+        "correct": "D major"
+    },
+    {
+        "question": "What would be a trie tone major chord made from root note C?",
+        "options": ["C -> E -> G", "C -> D# -> G", "C -> E -> G#", "C -> D# -> F#"],
+        "correct": "C -> E -> G"
+    },
+    {
+        "question": "according to the mood, guess the chord is major or minor?",
+        "audio": "audio/minor_chord_q.ogg",
+        "options": ["major", "minor"],
+        "correct": "minor"
+    }
+    ],
+    "Fa":[
+    {
+        "question": "کسر میزان یک والس چه است؟",
+        "options": ["2/4", "3/4", "4/4", "6/8"],
+        "correct": "3/4"
+    },
+    {
+        "question": "کدام نت یک پله کامل بالاتر از C است؟",
+        "options": ["C#", "D", "E", "B"],
+        "correct": "D"
+    },
+    {
+        "question": "یک نیم نت سفید نقطه دار چند ضرب می شود؟",
+        "options": ["2", "3", "4", "6"],
+        "correct": "3"
+    },
+    {
+        "question": "نام مقیاس زیر (D -> E -> F# -> G -> A -> B -> C# -> D) چه خواهد بود؟",
+        "options": ["ره ماژور", "لا مینور", "سی ماژور", "ره مینور"],
+        "correct": "ره ماژور"
+    },
+    {
+        "question": "آکورد ماژور سه صدایی ساخته شده از نت C چیست؟",
+        "options": ["C -> E -> G", "C -> D# -> G", "C -> E -> G#", "C -> D# -> F#"],
+        "correct": "C -> E -> G"
+    },
+    {
+        "question": "با توجه به خلق و خوی، حدس بزنید آکورد ماژور یا مینور است؟",
+        "audio": "audio/minor_chord_q.ogg",
+        "options": ["ماژور", "مینور"],
+        "correct": "مینور"
+    }
+    ],
+    "fr":[
+    {
+        "question": "Quelle est la signature rythmique d'une valse ?",
+        "options": ["2/4", "3/4", "4/4", "6/8"],
+        "correct": "3/4"
+    },
+    {
+        "question": "Quelle note est un cran au dessus de C ?",
+        "options": ["C#", "D", "E", "B"],
+        "correct": "D"
+    },
+    {
+        "question": "Combien de battements obtient une blanche pointée ?",
+        "options": ["2", "3", "4", "6"],
+        "correct": "3"
+    },
+    {
+        "question": "Quel serait le nom de la gamme suivante (D -> E -> F# -> G -> A -> B -> C# -> D) ?",
+        "options": ["Ré majeur", "Mi mineur", "Do majeur", "Ré mineur"],
+        "correct": "ré majeur"
+    },
+    {
+        "question": "Que serait un accord majeur à trois tons composé de la note fondamentale C ?",
+        "options": ["C -> E -> G", "C -> D# -> G", "C -> E -> G#", "C -> D# -> F#"],
+        "correct": "C -> E -> G"
+    },
+    {
+        "question": "selon l'ambiance, devinez que l'accord est majeur ou mineur ?",
+        "audio": "audio/minor_chord_q.ogg",
+        "options": ["majeur", "mineur"],
+        "correct": "mineur"
+    }
+    ],
+    "es":[{
+        "question": "¿Cuál es el compás de un vals?",
+        "options": ["2/4", "3/4", "4/4", "6/8"],
+        "correct": "3/4"
+    },
+    {
+        "question": "¿Qué nota está un paso por encima de C?",
+        "options": ["C#", "D", "E", "B"],
+        "correct": "D"
+    },
+    {
+        "question": "¿Cuántos tiempos tiene una blanca con puntillo?",
+        "options": ["2", "3", "4", "6"],
+        "correct": "3"
+    },
+    {
+        "question": "¿Cuál sería el nombre de la siguiente escala (D -> E -> F# -> G -> A -> B -> C# -> D)?",
+        "options": ["Re mayor", "Mi menor", "Do mayor", "Re menor"],
+        "correct": "Re mayor"
+    },
+    {
+        "question": "¿Cuál sería un acorde mayor trie tono hecho a partir de la nota fundamental C?",
+        "options": ["C -> Mi -> Sol", "C -> Re# -> Sol", "C -> Mi -> Sol#", "C -> Re# -> Fa#"],
+        "correct": "C -> Mi -> Sol"
+    },
+    {
+        "question": "según el estado de ánimo, ¿adivinas que el acorde es mayor o menor?",
+        "audio": "audio/minor_chord_q.ogg",
+        "options": ["mayor", "menor"],
+        "correct": "menor"
+    }]
+    }
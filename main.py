@@ -6,6 +6,9 @@ from telegram.ext import Application, CommandHandler, CallbackQueryHandler
 from handlers.start import start, help_command
 from handlers.callbacks import handle_button
 from utils.logging_setup import setup_logger
+from utils.rate_limit import FloodControlLimiter
+from utils.request_pool import build_get_updates_request, build_request
+from utils.update_processor import ChatOrderedUpdateProcessor
 
 # Load environment variables
 load_dotenv()
@@ -24,7 +27,11 @@ async def main():
     logger.info("Starting bot...")
 
     # ✅ Build the Application correctly
-    app = Application.builder().token(BOT_TOKEN).build()
+    app = (
+        Application.builder().token(BOT_TOKEN).concurrent_updates(ChatOrderedUpdateProcessor())
+        .rate_limiter(FloodControlLimiter())
+        .request(build_request()).get_updates_request(build_get_updates_request()).build()
+    )
 
     # Add command handlers
     app.add_handler(CommandHandler("start", start))
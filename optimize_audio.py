@@ -0,0 +1,128 @@
+"""Transcode audio/ to Telegram voice-note variants (Ogg/Opus) and record them in a manifest.
+
+Usage: python optimize_audio.py [--bitrate 48k] [--force]
+
+Needs ffmpeg and ffprobe on PATH. Every audio/*.ogg is encoded to mono Opus
+in audio/opus/ and described in audio_manifest.json (source hash, output,
+duration, sizes). Files whose content and settings haven't changed since the
+last run are skipped. The bot serves the Opus variant in place of the
+original when the manifest entry matches the original's hash.
+
+Most of the "*.ogg" files in audio/ are really M4A or MP3, which Telegram
+won't show as voice notes; the Opus variants are.
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.assets import AUDIO_MANIFEST_PATH
+
+SOURCE_DIR = "audio"
+OUTPUT_DIR = "audio/opus"
+
+
+def sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def transcode(source, output, bitrate):
+    subprocess.run(
+        [
+            "ffmpeg", "-v", "error", "-y", "-i", source,
+            "-vn", "-map_metadata", "-1", "-ac", "1", "-ar", "48000",
+            "-c:a", "libopus", "-b:a", bitrate, "-application", "audio",
+            output,
+        ],
+        check=True,
+    )
+
+
+def duration(path):
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+        check=True, capture_output=True, text=True,
+    )
+    return round(float(result.stdout.strip()))
+
+
+def build(source, entry, settings, force):
+    """Return the manifest entry for `source`, transcoding only when needed."""
+    source_sha = sha256(source)
+    if (
+        not force
+        and entry
+        and entry["source_sha256"] == source_sha
+        and entry["settings"] == settings
+        and os.path.exists(entry["output"])
+    ):
+        return entry, False
+
+    output = f"{OUTPUT_DIR}/{source_sha[:16]}-{settings['bitrate']}.ogg"
+    transcode(source, output, settings["bitrate"])
+    return {
+        "source_sha256": source_sha,
+        "settings": settings,
+        "output": output,
+        "output_sha256": sha256(output),
+        "duration": duration(output),
+        "source_bytes": os.path.getsize(source),
+        "output_bytes": os.path.getsize(output),
+    }, True
+
+
+def main(bitrate, force):
+    settings = {"codec": "opus", "bitrate": bitrate, "channels": 1}
+    try:
+        with open(AUDIO_MANIFEST_PATH) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {}
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    sources = sorted(
+        f"{SOURCE_DIR}/{entry.name}" for entry in os.scandir(SOURCE_DIR)
+        if entry.is_file() and entry.name.endswith(".ogg")
+    )
+    with ThreadPoolExecutor(os.cpu_count()) as pool:
+        results = list(pool.map(lambda source: build(source, manifest.get(source), settings, force), sources))
+
+    new_manifest = {source: entry for source, (entry, _) in zip(sources, results)}
+    tmp_path = f"{AUDIO_MANIFEST_PATH}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(new_manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, AUDIO_MANIFEST_PATH)
+
+    # outputs no entry points at any more (old settings, changed sources)
+    kept = {entry["output"] for entry in new_manifest.values()}
+    for entry in os.scandir(OUTPUT_DIR):
+        if f"{OUTPUT_DIR}/{entry.name}" not in kept:
+            os.remove(entry.path)
+
+    total_before = total_after = 0
+    for source, (entry, built) in zip(sources, results):
+        before, after = entry["source_bytes"], entry["output_bytes"]
+        total_before += before
+        total_after += after
+        status = "built" if built else "unchanged"
+        print(
+            f"{source:<40} {before / 1024:>7.0f} KiB -> {after / 1024:>6.0f} KiB"
+            f" ({1 - after / before:>4.0%} smaller, {entry['duration']}s) {status}"
+        )
+    if sources:
+        print(f"total {total_before / 1024:.0f} KiB -> {total_after / 1024:.0f} KiB ({1 - total_after / total_before:.0%} smaller)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bitrate", default="48k", help="Opus bitrate, e.g. 32k for speech, 48k for music")
+    parser.add_argument("--force", action="store_true", help="transcode everything again")
+    args = parser.parse_args()
+    try:
+        main(args.bitrate, args.force)
+    except FileNotFoundError as e:
+        sys.exit(f"{e}; is ffmpeg installed?")
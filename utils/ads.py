@@ -0,0 +1,121 @@
+import random
+import time
+from collections import OrderedDict, namedtuple
+
+from utils.metrics import registry
+
+Ad = namedtuple("Ad", "ad_id category text url weight")
+
+
+def ads_from_catalog(catalog):
+    """Ads from {category: [(text, url) or (text, url, weight)]}, with ids like "guitar-0"."""
+    ads = []
+    for category, entries in catalog.items():
+        for i, entry in enumerate(entries):
+            text, url, *rest = entry
+            ads.append(Ad(f"{category}-{i}", category, text, url, float(rest[0]) if rest else 1.0))
+    return ads
+
+
+class AliasTable:
+    """Vose's alias method: O(n) to build, O(1) to draw an index by weight."""
+
+    __slots__ = ("probability", "alias")
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = sum(weights)
+        if n == 0 or total <= 0:
+            raise ValueError("an alias table needs at least one positive weight")
+        scaled = [weight * n / total for weight in weights]
+        self.probability = [0.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # what is left is 1 up to rounding
+        for i in small + large:
+            self.probability[i] = 1.0
+
+    def sample(self, rng=random):
+        i = int(rng.random() * len(self.probability))
+        return i if rng.random() < self.probability[i] else self.alias[i]
+
+
+class AdEngine:
+    """Picks the ad row attached to a message, by weight and within frequency caps.
+
+    Each placement (e.g. "quiz") names the categories it may show and gets
+    its alias table up front, so a pick is a few O(1) draws. A user sees at
+    most `user_cap` ads and the same ad at most `ad_cap` times per `window`
+    seconds; a draw that hits a cap is retried `retries` times, then the
+    pick falls back to a weighted choice among the ads still under their
+    cap (a scan, but only for users who saw most ads already). Caps are
+    tracked for the `max_users` most recently seen users.
+    """
+
+    def __init__(self, ads, placements, user_cap=6, ad_cap=2, window=3600, retries=3, max_users=100_000, rng=random):
+        self.ads = {ad.ad_id: ad for ad in ads}
+        self.user_cap = user_cap
+        self.ad_cap = ad_cap
+        self.window = window
+        self.retries = retries
+        self.max_users = max_users
+        self.rng = rng
+        self._placements = {}  # placement -> (ads, alias table)
+        for placement, categories in placements.items():
+            chosen = [ad for ad in ads if ad.category in categories]
+            unknown = set(categories) - {ad.category for ad in ads}
+            if unknown or not chosen:
+                raise ValueError(f"Placement {placement!r} asks for unknown ad categories {sorted(unknown)}")
+            self._placements[placement] = (chosen, AliasTable([ad.weight for ad in chosen]))
+        self._seen = OrderedDict()  # user id -> (window start, ads shown, {ad id: times shown})
+
+    def ids(self, placement):
+        return [ad.ad_id for ad in self._placements[placement][0]]
+
+    def _caps(self, user_id, now):
+        caps = self._seen.get(user_id)
+        if caps is None or now - caps[0] >= self.window:
+            caps = [now, 0, {}]
+            self._seen[user_id] = caps
+            if len(self._seen) > self.max_users:
+                self._seen.popitem(last=False)
+        self._seen.move_to_end(user_id)
+        return caps
+
+    def pick(self, user_id, placement, now=None):
+        """The ad to attach for this user, or None; counts the impression."""
+        now = time.monotonic() if now is None else now
+        caps = self._caps(user_id, now)
+        if caps[1] >= self.user_cap:
+            registry.counter("ad_capped", placement=placement).inc()
+            return None
+        ads, table = self._placements[placement]
+        shown = caps[2]
+        for _ in range(self.retries):
+            ad = ads[table.sample(self.rng)]
+            if shown.get(ad.ad_id, 0) < self.ad_cap:
+                break
+        else:
+            eligible = [ad for ad in ads if shown.get(ad.ad_id, 0) < self.ad_cap]
+            if not eligible:
+                registry.counter("ad_capped", placement=placement).inc()
+                return None
+            ad = self.rng.choices(eligible, [ad.weight for ad in eligible])[0]
+        caps[1] += 1
+        shown[ad.ad_id] = shown.get(ad.ad_id, 0) + 1
+        registry.counter("ad_impressions", ad=ad.ad_id, placement=placement).inc()
+        return ad
+
+    def click(self, ad_id, placement):
+        """Count a click on an ad button; returns the ad, or None for an unknown id."""
+        ad = self.ads.get(ad_id)
+        if ad is not None:
+            registry.counter("ad_clicks", ad=ad_id, placement=placement if placement in self._placements else "unknown").inc()
+        return ad
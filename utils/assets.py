@@ -0,0 +1,99 @@
+import hashlib
+import json
+import logging
+import os
+
+from telegram import InputFile
+
+logger = logging.getLogger(__name__)
+
+ASSET_DIRS = ("audio", "image")
+# written by optimize_audio.py: original path -> Opus variant, its hash and duration
+AUDIO_MANIFEST_PATH = os.getenv("AUDIO_MANIFEST_PATH", "audio_manifest.json")
+
+
+def referenced_paths(lessons, quiz_questions):
+    """Every media path the lessons and quiz questions point at."""
+    paths = set()
+    for language_lessons in lessons.values():
+        for lesson in language_lessons.values():
+            paths.update(file_path for file_path, _ in lesson.get("files", ()))
+    for questions in quiz_questions.values():
+        paths.update(question["audio"] for question in questions if question.get("audio"))
+    return paths
+
+
+class AssetManager:
+    """The media files in audio/ and image/, read once at startup.
+
+    Sends get an InputFile over the shared bytes object (bytes are immutable,
+    so nothing is copied per send), and content hashes come from memory, so
+    no file is opened on the event loop. Where the audio manifest has an
+    Opus variant of a file, that variant is served under the original path.
+    """
+
+    def __init__(self, directories=ASSET_DIRS, manifest_path=AUDIO_MANIFEST_PATH):
+        self.directories = directories
+        self.manifest_path = manifest_path
+        self._data = {}  # "audio/notes.ogg" -> bytes
+        self._digests = {}
+        self._durations = {}
+
+    def load(self):
+        for directory in self.directories:
+            for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+                if not entry.is_file():
+                    continue
+                path = f"{directory}/{entry.name}"
+                with open(entry.path, "rb") as f:
+                    self._data[path] = f.read()
+                self._digests[path] = hashlib.sha256(self._data[path]).hexdigest()
+        self._load_variants()
+        logger.info(f"Loaded {len(self._data)} media files ({self.size / 1024:.0f} KiB)")
+
+    def _load_variants(self):
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return
+        for path, entry in manifest.items():
+            if self._digests.get(path) != entry["source_sha256"]:
+                logger.warning(f"{path} changed since optimize_audio.py ran, sending the original")
+                continue
+            try:
+                with open(entry["output"], "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                logger.warning(f"Optimized variant {entry['output']} of {path} is missing, sending the original")
+                continue
+            self._data[path] = data
+            self._digests[path] = entry["output_sha256"]
+            self._durations[path] = entry["duration"]
+
+    def validate(self, paths):
+        """Fail fast when content refers to files we don't have."""
+        missing = sorted(path for path in paths if path not in self._data)
+        if missing:
+            raise FileNotFoundError(f"Media files referenced by the content are missing: {', '.join(missing)}")
+
+    def __contains__(self, path):
+        return path in self._data
+
+    @property
+    def size(self):
+        return sum(len(data) for data in self._data.values())
+
+    def data(self, path):
+        return self._data[path]
+
+    def digest(self, path):
+        """sha256 of a loaded file, None for files outside the asset directories."""
+        return self._digests.get(path)
+
+    def duration(self, path):
+        """Seconds of audio, when the manifest knows it."""
+        return self._durations.get(path)
+
+    def input_file(self, path):
+        return InputFile(self._data[path], filename=os.path.basename(path))
@@ -0,0 +1,313 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import socket
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.i18n import FALLBACK_LOCALE, best_locale, normalize_locale
+from utils.rate_limit import TokenBucket
+from utils.score_store import BOT_DB_PATH, connect
+
+logger = logging.getLogger(__name__)
+
+# the Bot API allows about 30 messages a second; leave room for users being answered meanwhile
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", 25))
+PAGE_SIZE = 200  # recipients per checkpoint: a crash resends at most this many
+LEASE_SECONDS = 120  # a job whose runner stopped checkpointing this long is taken over
+REPORT_INTERVAL = 60.0
+
+# outcomes of one send
+SENT, BLOCKED, FAILED = "sent", "blocked", "failed"
+
+BroadcastJob = namedtuple(
+    "BroadcastJob",
+    "job_id texts admin_chat status dry_run cursor sent blocked failed total progress_message created_at",
+)
+_COLUMNS = ", ".join(BroadcastJob._fields)
+_LOCALE_LINE = re.compile(r"([A-Za-z]{2,3}(?:[-_][A-Za-z]{2})?):\s*(.*)")
+
+
+def parse_texts(body, locales, fallback=FALLBACK_LOCALE):
+    """{locale: text} from "en: ...\\nfr: ..." blocks; a body without them goes to `fallback`.
+
+    Only prefixes naming one of `locales` start a block, so "Note: ..." stays text.
+    """
+    texts, current = {}, None
+    for line in body.splitlines():
+        match = _LOCALE_LINE.match(line)
+        locale = normalize_locale(match.group(1)) if match else None
+        if locale in locales:
+            current = locale
+            texts[current] = match.group(2)
+        elif current is not None:
+            texts[current] += "\n" + line
+        elif line.strip():
+            return {fallback: body.strip()}
+    return {locale: text.strip() for locale, text in texts.items() if text.strip()}
+
+
+def describe(job, rate=BROADCAST_RATE):
+    """One-line progress report for the admin chat."""
+    done = job.sent + job.blocked + job.failed
+    line = (
+        f"📣 Broadcast #{job.job_id}{' (dry run)' if job.dry_run else ''}: {job.status}, "
+        f"{done:,}/{job.total:,} — sent {job.sent:,}, blocked {job.blocked:,}, failed {job.failed:,}"
+    )
+    if job.status == "running" and rate:
+        line += f", about {max(0, job.total - done) / rate / 60:.0f} min left"
+    return line
+
+
+async def dry_run_send(user_id, text):
+    """Stands in for the Bot API in dry runs: every message "arrives"."""
+    return SENT
+
+
+class BroadcastJobs:
+    """Broadcast jobs in bot.db: texts, progress counters and the checkpointed cursor.
+
+    The cursor is the last user id whose page was fully sent. A runner holds
+    a lease that every checkpoint renews, so after a crash (or in another
+    worker process) the job is picked up again from its cursor. The admin
+    commands and the runner share one connection, so every method runs on
+    a single thread and their transactions never interleave.
+    """
+
+    def __init__(self, path=BOT_DB_PATH):
+        self._db = connect(path)  # only used on the jobs thread after setup
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS broadcasts (
+                job_id INTEGER PRIMARY KEY,
+                texts TEXT NOT NULL,
+                admin_chat INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'running',
+                dry_run INTEGER NOT NULL DEFAULT 0,
+                cursor INTEGER NOT NULL DEFAULT 0,
+                sent INTEGER NOT NULL DEFAULT 0,
+                blocked INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                total INTEGER NOT NULL DEFAULT 0,
+                progress_message INTEGER,
+                created_at REAL NOT NULL,
+                owner TEXT,
+                lease_until REAL
+            );
+        """)
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="broadcast-jobs")
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._thread, func, *args)
+
+    def _job(self, row):
+        if row is None:
+            return None
+        job = BroadcastJob(*row)
+        return job._replace(texts=json.loads(job.texts), dry_run=bool(job.dry_run))
+
+    def _get(self, job_id):
+        return self._job(self._db.execute(f"SELECT {_COLUMNS} FROM broadcasts WHERE job_id = ?", (job_id,)).fetchone())
+
+    def _latest(self):
+        return self._job(self._db.execute(f"SELECT {_COLUMNS} FROM broadcasts ORDER BY job_id DESC LIMIT 1").fetchone())
+
+    def _create(self, texts, admin_chat, total, dry_run):
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            cursor = self._db.execute(
+                "INSERT INTO broadcasts (texts, admin_chat, dry_run, total, created_at) VALUES (?, ?, ?, ?, ?)",
+                (json.dumps(texts), admin_chat, int(dry_run), total, time.time()),
+            )
+        return self._get(cursor.lastrowid)
+
+    def _claim(self, owner, lease):
+        now = time.time()
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            row = self._db.execute(
+                "SELECT job_id, lease_until FROM broadcasts WHERE status = 'running' ORDER BY job_id LIMIT 1"
+            ).fetchone()
+            # one job at a time, whichever process runs it, so the flood limit is shared by nobody else
+            if row is None or (row[1] is not None and row[1] >= now):
+                return None
+            self._db.execute(
+                "UPDATE broadcasts SET owner = ?, lease_until = ? WHERE job_id = ?", (owner, now + lease, row[0])
+            )
+        return self._get(row[0])
+
+    def _checkpoint(self, job, owner, lease):
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            updated = self._db.execute(
+                "UPDATE broadcasts SET cursor = ?, sent = ?, blocked = ?, failed = ?, lease_until = ? "
+                "WHERE job_id = ? AND owner = ?",
+                (job.cursor, job.sent, job.blocked, job.failed, time.time() + lease, job.job_id, owner),
+            )
+            if not updated.rowcount:
+                return "lost"
+            (status,) = self._db.execute("SELECT status FROM broadcasts WHERE job_id = ?", (job.job_id,)).fetchone()
+        return status
+
+    def _finish(self, job_id, status):
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.execute(
+                "UPDATE broadcasts SET status = ?, lease_until = NULL WHERE job_id = ? AND status = 'running'",
+                (status, job_id),
+            )
+
+    def _set_progress_message(self, job_id, message_id):
+        with self._db:
+            self._db.execute("UPDATE broadcasts SET progress_message = ? WHERE job_id = ?", (message_id, job_id))
+
+    async def create(self, texts, admin_chat, total, dry_run=False):
+        return await self._run(self._create, texts, admin_chat, total, dry_run)
+
+    async def get(self, job_id):
+        return await self._run(self._get, job_id)
+
+    async def latest(self):
+        return await self._run(self._latest)
+
+    async def claim(self, owner, lease=LEASE_SECONDS):
+        """Take the oldest running job if nobody holds a live lease on it, or None."""
+        return await self._run(self._claim, owner, lease)
+
+    async def checkpoint(self, job, owner, lease=LEASE_SECONDS):
+        """Save a job's cursor and counters and renew the lease.
+
+        Returns the job's status, which /broadcast_cancel may have changed,
+        or "lost" if another runner took the job over after our lease ran out.
+        """
+        return await self._run(self._checkpoint, job, owner, lease)
+
+    async def finish(self, job_id, status="done"):
+        await self._run(self._finish, job_id, status)
+
+    async def cancel(self, job_id):
+        await self.finish(job_id, "cancelled")
+
+    async def set_progress_message(self, job_id, message_id):
+        await self._run(self._set_progress_message, job_id, message_id)
+
+    def close(self):
+        self._thread.submit(self._db.close).result()
+        self._thread.shutdown()
+
+
+class BroadcastRunner:
+    """Sends broadcast jobs to every user in the registry, one page at a time.
+
+    `send(user_id, text)` returns SENT, BLOCKED or FAILED; blocked users are
+    pruned from the registry. Dry-run jobs go through `dry_send` instead and
+    are otherwise identical. `workers` sends run at once, paced by a token
+    bucket at `rate` messages a second (None: unpaced). Only one page of
+    recipients is held at a time, so memory stays flat however many users
+    there are. `report(job, final)` is called every `report_interval`
+    seconds and when the job ends.
+    """
+
+    def __init__(self, jobs, registry, send, report, rate=BROADCAST_RATE, workers=16, page_size=PAGE_SIZE,
+                 report_interval=REPORT_INTERVAL, lease=LEASE_SECONDS, owner=None, dry_send=dry_run_send):
+        self.jobs = jobs
+        self.registry = registry
+        self.send = send
+        self.dry_send = dry_send
+        self.report = report
+        self.rate = rate
+        self.workers = workers
+        self.page_size = page_size
+        self.report_interval = report_interval
+        self.lease = lease
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.wake = asyncio.Event()  # set when a job is created here
+        self._task = None
+
+    async def _send_page(self, page, texts, send, bucket):
+        outcomes = Counter()
+        blocked = []
+        recipients = iter(page)
+        locales = frozenset(texts)
+        fallback = FALLBACK_LOCALE if FALLBACK_LOCALE in locales else min(locales)
+
+        async def worker():
+            for user_id, language in recipients:
+                if bucket is not None:
+                    await bucket.acquire()
+                try:
+                    outcome = await send(user_id, texts[best_locale(language, locales, fallback)])
+                except Exception as e:
+                    logger.warning(f"Broadcast to {user_id} failed: {e}")
+                    outcome = FAILED
+                outcomes[outcome] += 1
+                if outcome == BLOCKED:
+                    blocked.append(user_id)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, len(page)))))
+        return outcomes, blocked
+
+    async def run(self, job):
+        """Send a claimed job from its cursor to the end; returns the final job."""
+        send = self.dry_send if job.dry_run else self.send
+        bucket = TokenBucket(self.rate, max(1.0, self.rate / 10)) if self.rate else None
+        reported = time.monotonic()
+        status = "running"
+        while status == "running":
+            page = await asyncio.to_thread(self.registry.page, job.cursor, self.page_size)
+            if not page:
+                await self.jobs.finish(job.job_id)
+                status = "done"
+                break
+            outcomes, blocked = await self._send_page(page, job.texts, send, bucket)
+            await self.registry.block(blocked)
+            job = job._replace(
+                cursor=page[-1][0],
+                sent=job.sent + outcomes[SENT],
+                blocked=job.blocked + outcomes[BLOCKED],
+                failed=job.failed + outcomes[FAILED],
+            )
+            status = await self.jobs.checkpoint(job, self.owner, self.lease)
+            if time.monotonic() - reported >= self.report_interval:
+                reported = time.monotonic()
+                await self._report(job, False)
+        job = job._replace(status=status)
+        if status != "lost":
+            await self._report(job, True)
+        return job
+
+    async def _report(self, job, final):
+        try:
+            await self.report(job, final)
+        except Exception as e:
+            logger.warning(f"Could not report broadcast {job.job_id} progress: {e}")
+
+    async def _loop(self, poll_interval):
+        while True:
+            try:
+                while (job := await self.jobs.claim(self.owner, self.lease)) is not None:
+                    logger.info(f"Broadcast {job.job_id} running from user {job.cursor}")
+                    await self.run(job)
+            except Exception as e:
+                logger.error(f"Broadcast runner failed, retrying: {e}")
+            self.wake.clear()
+            try:
+                await asyncio.wait_for(self.wake.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, poll_interval=30.0):
+        """Run jobs as they are created, resuming any left running by a crash."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(poll_interval))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,70 @@
+import functools
+import random
+
+from utils.quiz_engine import Question
+from utils.synth import INTERVALS, TRIADS, Clip
+
+ROOTS = ("C4", "C#4", "D4", "Eb4", "E4", "F4", "F#4", "G4", "Ab3", "A3", "Bb3", "B3")
+VOICINGS = ("melodic", "harmonic", "both")
+# chord symbols read the same in every language, e.g. Cm, C°
+TRIAD_SYMBOLS = {"major": "", "minor": "m", "diminished": "°", "augmented": "+"}
+SESSION_LENGTH = 10
+OPTIONS = 4
+
+
+class EarTrainingSet:
+    """An endless-looking sequence of "what do you hear?" questions.
+
+    Question i is generated from i alone (its own seeded RNG), so any worker
+    can check an answer to it and nothing is stored. `texts` holds the
+    localized question for "interval" and "triad".
+    """
+
+    def __init__(self, texts, length=1_000_000):
+        self.texts = texts
+        self.length = length
+        # per set, so the cache goes away with it
+        self._questions = functools.lru_cache(maxsize=1024)(self._question)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        return self._questions(index)
+
+    def _question(self, index):
+        if not 0 <= index < self.length:
+            raise IndexError(index)
+        rng = random.Random(index)
+        root = rng.choice(ROOTS)
+        voicing = rng.choice(VOICINGS)
+
+        if rng.random() < 0.6:
+            answer = rng.choice(tuple(INTERVALS))
+            others = rng.sample([name for name in INTERVALS if name != answer], OPTIONS - 1)
+            labels = {name: name for name in (answer, *others)}
+            clip = Clip("interval", answer, root, voicing)
+            text = self.texts["interval"]
+        else:
+            answer = rng.choice(tuple(TRIADS))
+            others = [name for name in TRIADS if name != answer]
+            letter = root[:-1]
+            labels = {name: letter + TRIAD_SYMBOLS[name] for name in TRIADS}
+            clip = Clip("triad", answer, root, voicing)
+            text = self.texts["triad"]
+
+        options = [answer, *others]
+        rng.shuffle(options)
+        return Question(text, [labels[name] for name in options], options.index(answer), clip)
+
+
+def ear_training_clips():
+    """Every clip EarTrainingSet can ask for (576, roughly 7 MiB encoded), most likely first.
+
+    Roots and voicings are drawn uniformly, so there is no smaller hot set;
+    a triad name comes up about twice as often as an interval name.
+    """
+    clips = []
+    for kind, names in (("triad", TRIADS), ("interval", INTERVALS)):
+        clips += [Clip(kind, name, root, voicing) for name in names for voicing in VOICINGS for root in ROOTS]
+    return clips
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.score_store import BOT_DB_PATH, connect
+
+logger = logging.getLogger(__name__)
+
+# where emails were kept before the emails table, imported once
+LEGACY_EMAILS_PATH = os.getenv("EMAILS_PATH", "user_emails.jsonl")
+LEGACY_JSON_EMAILS_PATH = "user_emails.json"
+
+# RFC 5321 limits plus the shape every real address has: local@label.label
+MAX_EMAIL_LENGTH = 254
+MAX_LOCAL_LENGTH = 64
+EMAIL_PATTERN = re.compile(
+    r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*"
+    r"@(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63}"
+)
+
+
+def normalize_email(text):
+    """The address in canonical (lowercase) form, or None if it doesn't look like one."""
+    email = text.strip()
+    if len(email) > MAX_EMAIL_LENGTH or not EMAIL_PATTERN.fullmatch(email):
+        return None
+    if len(email.rpartition("@")[0]) > MAX_LOCAL_LENGTH:
+        return None
+    return email.lower()
+
+
+class EmailTaken(ValueError):
+    """The address already belongs to another user."""
+
+
+class PendingSet:
+    """Users we asked for something, each forgotten `ttl` seconds after being added.
+
+    Every entry lives the same ttl, so insertion order is expiry order and
+    expired entries are dropped from the front: add, discard and membership
+    are O(1) amortized, and `max_size` bounds memory under a flood of asks.
+    """
+
+    def __init__(self, ttl=600, max_size=100_000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._expires = OrderedDict()  # user id -> expiry (monotonic), oldest first
+
+    def _purge(self, now):
+        while self._expires:
+            user_id = next(iter(self._expires))
+            if self._expires[user_id] > now and len(self._expires) <= self.max_size:
+                return
+            del self._expires[user_id]
+
+    def add(self, user_id):
+        now = time.monotonic()
+        self._expires[user_id] = now + self.ttl
+        self._expires.move_to_end(user_id)  # re-adding moves the user to the back
+        self._purge(now)
+
+    def discard(self, user_id):
+        self._expires.pop(user_id, None)
+
+    def __contains__(self, user_id):
+        expires = self._expires.get(user_id)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            del self._expires[user_id]
+            return False
+        return True
+
+    def __len__(self):
+        return len(self._expires)
+
+
+class EmailStore:
+    """Users' email addresses in the emails table of bot.db.
+
+    The table's UNIQUE constraint decides who owns an address, whichever
+    process registers it first, so set() writes through and a user is only
+    told their address is saved once it is. Writes run on one writer
+    thread, so concurrent registrations never share a transaction.
+    Lookups are primary key or index reads, never a scan, and always see
+    what other processes wrote. user_emails.jsonl, or the older
+    user_emails.json, is imported on first start.
+    """
+
+    def __init__(self, path=BOT_DB_PATH, legacy_path=LEGACY_EMAILS_PATH, legacy_json_path=LEGACY_JSON_EMAILS_PATH):
+        self._reader = connect(path)
+        self._writer = connect(path)  # only used on the writer thread after setup
+        self._reader.executescript("""
+            CREATE TABLE IF NOT EXISTS emails (
+                user_id INTEGER PRIMARY KEY,
+                email TEXT NOT NULL UNIQUE,
+                updated_at REAL NOT NULL
+            );
+        """)
+        self._import_legacy(legacy_path, legacy_json_path)
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="email-store")
+
+    def __len__(self):
+        (count,) = self._reader.execute("SELECT COUNT(*) FROM emails").fetchone()
+        return count
+
+    def _import_legacy(self, legacy_path, legacy_json_path):
+        if self._reader.execute("SELECT 1 FROM emails LIMIT 1").fetchone():
+            return
+        emails = {}  # user id -> email, the latest record wins
+        try:
+            if legacy_path and os.path.exists(legacy_path):
+                source = legacy_path
+                with open(legacy_path, "rb") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                            emails[int(record["user_id"])] = record["email"]
+                        except (ValueError, KeyError, TypeError):
+                            continue  # a torn or damaged line
+            elif legacy_json_path and os.path.exists(legacy_json_path):
+                source = legacy_json_path
+                with open(legacy_json_path, "r") as f:
+                    for user_id, text in json.load(f).items():
+                        emails[int(user_id)] = normalize_email(str(text))
+            else:
+                return
+        except (OSError, ValueError, AttributeError) as e:
+            logger.error(f"Could not import legacy emails: {e}")
+            return
+        now = time.time()
+        with self._writer:
+            self._writer.execute("BEGIN IMMEDIATE")
+            # OR IGNORE: an address claimed twice stays with whoever comes first
+            self._writer.executemany(
+                "INSERT OR IGNORE INTO emails (user_id, email, updated_at) VALUES (?, ?, ?)",
+                [(user_id, email, now) for user_id, email in emails.items() if email],
+            )
+        logger.info(f"Imported {len(self)} emails from {source}")
+
+    def get(self, user_id):
+        row = self._reader.execute("SELECT email FROM emails WHERE user_id = ?", (int(user_id),)).fetchone()
+        return row[0] if row else None
+
+    def user_for(self, email):
+        """Who registered `email` (any case), or None."""
+        row = self._reader.execute("SELECT user_id FROM emails WHERE email = ?", (email.strip().lower(),)).fetchone()
+        return row[0] if row else None
+
+    def _write(self, user_id, email):
+        try:
+            with self._writer:
+                self._writer.execute("BEGIN IMMEDIATE")
+                self._writer.execute(
+                    "INSERT INTO emails (user_id, email, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET email = excluded.email, updated_at = excluded.updated_at",
+                    (user_id, email, time.time()),
+                )
+        except sqlite3.IntegrityError:
+            # the email column's UNIQUE constraint: another user has it
+            raise EmailTaken(email) from None
+
+    async def set(self, user_id, email):
+        """Register a normalized address; EmailTaken if another user has it."""
+        await asyncio.get_running_loop().run_in_executor(self._thread, self._write, int(user_id), email)
+
+    def close(self):
+        self._reader.close()
+        self._thread.submit(self._writer.close).result()
+        self._thread.shutdown()
@@ -0,0 +1,153 @@
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+
+from utils.score_store import BOT_DB_PATH, connect
+
+logger = logging.getLogger(__name__)
+
+LEGACY_PAID_USERS_PATH = "paid_users.json"
+
+
+class EntitlementService:
+    """Who has premium, kept in bot.db and mirrored in a dict.
+
+    Every grant or revoke bumps a per-row version taken from a counter that
+    only moves inside the write transaction, so refresh() can fetch just the
+    rows changed since the last version it saw (by this or another process).
+    is_premium() is a dict lookup; a heap ordered by expiry drops lapsed
+    subscriptions from the dict without scanning it.
+    """
+
+    def __init__(self, path=BOT_DB_PATH, refresh_interval=30.0, legacy_path=LEGACY_PAID_USERS_PATH):
+        self.refresh_interval = refresh_interval
+        self._premium = {}  # user id -> expires_at (None = never)
+        self._expiry = []  # heap of (expires_at, user id), may hold superseded entries
+        self._version = 0
+        self._task = None
+        self._refresh_lock = asyncio.Lock()
+        self._reader = connect(path)
+        self._writer = connect(path)
+        self._reader.executescript("""
+            CREATE TABLE IF NOT EXISTS entitlements (
+                user_id INTEGER PRIMARY KEY,
+                expires_at REAL,
+                active INTEGER NOT NULL,
+                source TEXT,
+                version INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entitlements_by_version ON entitlements (version);
+        """)
+        self._import_legacy(legacy_path)
+        self._apply(self._changes())
+
+    def _import_legacy(self, legacy_path):
+        # paid_users.json (a list of ids) predates the table, carry it over once
+        if not legacy_path or not os.path.exists(legacy_path):
+            return
+        if self._reader.execute("SELECT 1 FROM entitlements LIMIT 1").fetchone():
+            return
+        try:
+            with open(legacy_path, "r") as f:
+                user_ids = [int(user_id) for user_id in json.load(f)]
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Could not import {legacy_path}: {e}")
+            return
+        self._write(user_ids, True, None, legacy_path)
+        logger.info(f"Imported {len(user_ids)} premium users from {legacy_path}")
+
+    def __len__(self):
+        return len(self._premium)
+
+    def is_premium(self, user_id, now=None):
+        user_id = int(user_id)
+        if user_id not in self._premium:
+            return False
+        expires_at = self._premium[user_id]
+        return expires_at is None or expires_at > (time.time() if now is None else now)
+
+    def expires_at(self, user_id):
+        return self._premium.get(int(user_id))
+
+    def _changes(self):
+        return self._reader.execute(
+            "SELECT user_id, expires_at, active, version FROM entitlements WHERE version > ? ORDER BY version",
+            (self._version,),
+        ).fetchall()
+
+    def _apply(self, rows):
+        for user_id, expires_at, active, version in rows:
+            if active:
+                self._premium[user_id] = expires_at
+                if expires_at is not None:
+                    heapq.heappush(self._expiry, (expires_at, user_id))
+            else:
+                self._premium.pop(user_id, None)
+            self._version = max(self._version, version)
+        self.expire()
+
+    def expire(self, now=None):
+        """Drop subscriptions that ran out; returns their user ids."""
+        now = time.time() if now is None else now
+        expired = []
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, user_id = heapq.heappop(self._expiry)
+            # a renewal pushed a later entry, this one is stale
+            if user_id in self._premium and self._premium[user_id] == expires_at:
+                del self._premium[user_id]
+                expired.append(user_id)
+        return expired
+
+    def _write(self, user_ids, active, expires_at, source):
+        now = time.time()
+        with self._writer:
+            self._writer.execute("BEGIN IMMEDIATE")
+            (version,) = self._writer.execute("SELECT COALESCE(MAX(version), 0) FROM entitlements").fetchone()
+            self._writer.executemany(
+                "INSERT INTO entitlements (user_id, expires_at, active, source, version, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET expires_at = excluded.expires_at, active = excluded.active, "
+                "source = excluded.source, version = excluded.version, updated_at = excluded.updated_at",
+                [(user_id, expires_at, int(active), source, version + i + 1, now) for i, user_id in enumerate(user_ids)],
+            )
+
+    async def grant(self, user_ids, expires_at=None, source=None):
+        """Give premium to some users, until `expires_at` (unix time) or for good."""
+        await asyncio.to_thread(self._write, [int(user_id) for user_id in user_ids], True, expires_at, source)
+        await self.refresh()
+
+    async def revoke(self, user_ids, source=None):
+        await asyncio.to_thread(self._write, [int(user_id) for user_id in user_ids], False, None, source)
+        await self.refresh()
+
+    async def refresh(self):
+        """Pick up rows changed since the last refresh, here or in another process."""
+        async with self._refresh_lock:
+            self._apply(self._changes())
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Could not refresh entitlements: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._reader.close()
+        self._writer.close()
@@ -0,0 +1,123 @@
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_LOCALE = "en"
+
+
+def normalize_locale(code):
+    """'fa_IR', 'Fa-ir' -> 'fa-ir'. Empty or missing codes become ''."""
+    return (code or "").strip().replace("_", "-").lower()
+
+
+def locale_chain(code, fallback=FALLBACK_LOCALE):
+    """Locales to try for a code, most specific first: fa-ir -> fa -> en."""
+    chain = []
+    code = normalize_locale(code)
+    while code:
+        chain.append(code)
+        code = code.rpartition("-")[0]
+    if fallback not in chain:
+        chain.append(fallback)
+    return chain
+
+
+@lru_cache(maxsize=1024)
+def best_locale(code, supported, fallback=FALLBACK_LOCALE):
+    """First locale of the chain that is in `supported` (a frozenset of normalized codes)."""
+    for locale in locale_chain(code, fallback):
+        if locale in supported:
+            return locale
+    return fallback
+
+
+class Catalog:
+    """Message catalog compiled from {locale: {key: value}} tables.
+
+    Every (locale, key) pair is resolved through its fallback chain once, when
+    the catalog is built, so get() is a memoized locale lookup plus one dict
+    index. Missing keys are logged once each, not on every call.
+    """
+
+    def __init__(self, tables, fallback=FALLBACK_LOCALE, last_resort=False):
+        self.fallback = fallback
+        tables = {normalize_locale(locale): strings for locale, strings in tables.items()}
+        self.locales = frozenset(tables)
+        keys = set()
+        for strings in tables.values():
+            keys.update(strings)
+
+        self._compiled = {}
+        for locale in tables:
+            compiled = {}
+            for key in keys:
+                for candidate in locale_chain(locale, fallback):
+                    if key in tables.get(candidate, {}):
+                        compiled[key] = tables[candidate][key]
+                        break
+                else:
+                    # with last_resort, use whatever language has it rather than nothing
+                    if last_resort:
+                        donor = next(loc for loc in sorted(tables) if key in tables[loc])
+                        compiled[key] = tables[donor][key]
+            self._compiled[locale] = compiled
+        self._warned = set()
+
+    def locale(self, code):
+        """The supported locale used for a user's language code."""
+        return best_locale(code, self.locales, self.fallback)
+
+    def has(self, code, key):
+        return key in self._compiled[self.locale(code)]
+
+    def get(self, code, key, default=None):
+        value = self._compiled[self.locale(code)].get(key)
+        if value is None:
+            warn_key = (self.locale(code), key)
+            if warn_key not in self._warned:
+                self._warned.add(warn_key)
+                logger.warning(f"Missing translation for {key!r} in {warn_key[0]!r}")
+            return key if default is None else default
+        return value
+
+
+def validate(languages, lessons, quiz_questions, fallback=FALLBACK_LOCALE):
+    """List human readable problems in the translation tables."""
+    problems = []
+
+    def missing_keys(table_name, table):
+        all_keys = set()
+        for entries in table.values():
+            all_keys.update(entries)
+        for locale, entries in sorted(table.items()):
+            for key in sorted(all_keys - set(entries)):
+                problems.append(f"{table_name}[{locale!r}] is missing {key!r}")
+
+    missing_keys("LANGUAGES", languages)
+    missing_keys("lessons", lessons)
+
+    strings = Catalog(languages, fallback)
+    for locale, locale_lessons in sorted(lessons.items()):
+        for name, lesson in sorted(locale_lessons.items()):
+            for field in ("text", "files"):
+                if field not in lesson:
+                    problems.append(f"lessons[{locale!r}][{name!r}] has no {field!r}")
+            for _, caption_key in lesson.get("files", []):
+                if not strings.has(locale, caption_key):
+                    problems.append(f"lessons[{locale!r}][{name!r}] caption {caption_key!r} is not in LANGUAGES")
+
+    counts = {locale: len(questions) for locale, questions in quiz_questions.items()}
+    expected = counts.get(fallback, max(counts.values(), default=0))
+    for locale, questions in sorted(quiz_questions.items()):
+        if len(questions) != expected:
+            problems.append(f"quiz_questions[{locale!r}] has {len(questions)} questions, {fallback!r} has {expected}")
+        for i, question in enumerate(questions):
+            options = [option.strip().lower() for option in question.get("options", [])]
+            if question.get("correct", "").strip().lower() not in options:
+                problems.append(f"quiz_questions[{locale!r}][{i}] answer {question.get('correct')!r} is not one of its options")
+
+    for locale in sorted(set(lessons) | set(quiz_questions)):
+        if normalize_locale(locale) not in strings.locales:
+            problems.append(f"{locale!r} has content but no LANGUAGES strings")
+    return problems
@@ -0,0 +1,80 @@
+import time
+
+from telegram.request import BaseRequest
+
+from utils.metrics import registry, timed
+
+
+def request_size(request_data):
+    """Bytes of the files uploaded by one Bot API call, 0 for plain JSON calls.
+
+    Measuring JSON calls would mean serializing every request body a second
+    time; uploads are rare and their size is already in memory.
+    """
+    if request_data is None or not request_data.contains_files:
+        return 0
+    size = 0
+    for value in request_data.multipart_data.values():
+        # (filename, content, mimetype); content is bytes unless PTB streams a file handle
+        content = value[1]
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            size += len(content)
+    return size
+
+
+class InstrumentedRequest(BaseRequest):
+    """Wraps PTB's request object and records every Bot API call.
+
+    Per method: latency histogram, error count, file bytes uploaded and the
+    number of flood-control (429) answers.
+    """
+
+    def __init__(self, request):
+        self._request = request
+        self._metrics = {}
+
+    @property
+    def read_timeout(self):
+        return self._request.read_timeout
+
+    async def initialize(self):
+        await self._request.initialize()
+
+    async def shutdown(self):
+        await self._request.shutdown()
+
+    def _method_metrics(self, method):
+        metrics = self._metrics.get(method)
+        if metrics is None:
+            metrics = self._metrics[method] = (
+                registry.histogram("bot_api_seconds", method=method),
+                registry.counter("bot_api_errors", method=method),
+                registry.counter("bot_api_bytes_uploaded", method=method),
+                registry.counter("bot_api_flood_waits", method=method),
+            )
+        return metrics
+
+    async def do_request(self, url, method, request_data=None, **timeouts):
+        latency, errors, uploaded, flood_waits = self._method_metrics(url.rpartition("/")[2])
+        uploaded.inc(request_size(request_data))
+        start = time.perf_counter()
+        try:
+            code, payload = await self._request.do_request(url, method, request_data, **timeouts)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            latency.observe(time.perf_counter() - start)
+        if code == 429:
+            flood_waits.inc()
+        elif code >= 400:
+            errors.inc()
+        return code, payload
+
+
+def instrument_handlers(application):
+    """Time every registered handler's callback (call after all add_handler calls)."""
+    for group, handlers in application.handlers.items():
+        for handler in handlers:
+            name = getattr(handler.callback, "__qualname__", repr(handler.callback))
+            handler.callback = timed("handler", handler.callback, handler=name)
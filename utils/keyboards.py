@@ -0,0 +1,48 @@
+import json
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+
+class FrozenMarkup(InlineKeyboardMarkup):
+    """InlineKeyboardMarkup that is serialized once, when it is built.
+
+    PTB turns reply_markup into a dict on every send by walking all buttons;
+    this returns the dict computed up front instead. The cached dict is shared,
+    treat it as read only.
+    """
+
+    __slots__ = ("_dict_cache", "_json_cache")
+
+    def __init__(self, inline_keyboard, **kwargs):
+        super().__init__(inline_keyboard, **kwargs)
+        with self._unfrozen():
+            self._dict_cache = super().to_dict()
+            self._json_cache = json.dumps(self._dict_cache)
+
+    def to_dict(self, recursive=True):
+        return self._dict_cache
+
+    def to_json(self):
+        return self._json_cache
+
+
+def frozen_markup(rows):
+    """Build a FrozenMarkup from rows of (text, {button kwargs}) pairs."""
+    return FrozenMarkup([[InlineKeyboardButton(text, **kwargs) for text, kwargs in row] for row in rows])
+
+
+class KeyboardCache:
+    """Per-language keyboards, built once for every supported language."""
+
+    def __init__(self, languages, fallback="en"):
+        self.languages = list(languages)
+        self.fallback = fallback
+        self._markups = {}
+
+    def register(self, name, build_rows):
+        """build_rows(language) returns the rows passed to frozen_markup."""
+        self._markups[name] = {lang: frozen_markup(build_rows(lang)) for lang in self.languages}
+
+    def get(self, name, language):
+        markups = self._markups[name]
+        return markups.get(language) or markups[self.fallback]
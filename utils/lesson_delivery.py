@@ -0,0 +1,84 @@
+import logging
+
+from telegram import InputMediaAudio, InputMediaPhoto
+from telegram.error import BadRequest
+
+from utils.media_cache import sent_file_id
+
+logger = logging.getLogger(__name__)
+
+# Telegram only lets these types share an album, and 2 to 10 items per album
+GROUPABLE = {".ogg": ("audio", InputMediaAudio), ".png": ("photo", InputMediaPhoto)}
+MAX_GROUP_SIZE = 10
+
+
+def plan_lesson_media(items):
+    """Split (file_path, caption) pairs into sends, in lesson order.
+
+    Each send is (mode, items): an album for a run of consecutive files of
+    one groupable type, or (None, [item]) for a file sent on its own.
+    Albums never reach across another file, so nothing arrives out of order.
+    """
+    sends = []
+    for item in items:
+        mode = next((mode for suffix, (mode, _) in GROUPABLE.items() if item[0].endswith(suffix)), None)
+        last = sends[-1] if sends else None
+        if mode is not None and last is not None and last[0] == mode and len(last[1]) < MAX_GROUP_SIZE:
+            last[1].append(item)
+        else:
+            sends.append((mode, [item]))
+    # a run of one is a plain single send
+    return [(mode if len(group) > 1 else None, group) for mode, group in sends]
+
+
+def lesson_calls(items):
+    """Bot API calls a lesson view makes: the text edit, its media sends and the menu."""
+    return 2 + len(plan_lesson_media(items))
+
+
+async def send_media_group(message, mode, items, media_cache, assets):
+    """Send same-type media as one album, reusing cached file_ids where we have them."""
+    media_class = dict(GROUPABLE.values())[mode]
+    cached = [media_cache.get(file_path, mode) for file_path, _ in items]
+
+    if all(cached):
+        try:
+            return await message.reply_media_group(
+                [media_class(file_id, caption=caption) for file_id, (_, caption) in zip(cached, items)]
+            )
+        except BadRequest as e:
+            logger.warning(f"Cached {mode} album rejected, uploading again: {e}")
+            for file_path, _ in items:
+                media_cache.forget(file_path, mode)
+            cached = [None] * len(items)
+
+    media = []
+    for file_id, (file_path, caption) in zip(cached, items):
+        extra = {"duration": assets.duration(file_path)} if mode == "audio" and assets.duration(file_path) else {}
+        media.append(media_class(file_id or assets.input_file(file_path), caption=caption, **extra))
+    sent = await message.reply_media_group(media)
+
+    for sent_message, (file_path, _) in zip(sent, items):
+        file_id = sent_file_id(sent_message, mode)
+        if file_id:
+            media_cache.put(file_path, mode, file_id)
+    return sent
+
+
+async def deliver_lesson_media(message, items, send_single, media_cache, assets):
+    """Send a lesson's media in order, runs of the same type as albums.
+
+    `send_single(message, file_path, caption)` handles files sent on their
+    own. Each send waits for the previous one so the lesson arrives as it is
+    written; pacing is left to the Application's rate limiter
+    (utils/rate_limit.py) instead of fixed sleeps.
+    """
+    for mode, group in plan_lesson_media(items):
+        try:
+            if mode is None:
+                file_path, caption = group[0]
+                await send_single(message, file_path, caption)
+            else:
+                await send_media_group(message, mode, group, media_cache, assets)
+        except Exception as e:
+            logger.error(f"Failed to send lesson media: {e}")
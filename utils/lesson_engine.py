@@ -0,0 +1,58 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# payload of the lesson menu buttons ("lesson:<payload>") -> key in the lessons table
+LESSON_CALLBACKS = {
+    "basics": "basics",
+    "rhythm": "rhythm",
+    "intervals": "interval",
+    "scales": "scales",
+    "chords": "chords",
+}
+
+
+class LessonEngine:
+    """One handler for every lesson in the lessons table.
+
+    Adding a lesson means adding it to the lessons table (and LESSON_CALLBACKS if it
+    gets a menu button), no new coroutine. Behind the callback router's single
+    answer, a view costs one edit with the lesson text, the media sends and
+    one menu message.
+    """
+
+    def __init__(self, lessons, callbacks, user_language, get_text, menu, send_lesson_media):
+        self.lessons = lessons  # Catalog of lesson name -> lesson data
+        self.user_language = user_language  # update -> language code
+        self.get_text = get_text
+        self.menu = menu  # language code -> reply markup
+        self.send_lesson_media = send_lesson_media  # (message, [(path, caption)]) -> coroutine
+        self.index = dict(callbacks)
+
+    def lesson(self, user_lang, name):
+        """Lesson data in the user's language, or the closest one the catalog has."""
+        return self.lessons.get(user_lang, name, default={})
+
+    async def show(self, update, context, lesson_id):
+        query = update.callback_query
+        name = self.index.get(lesson_id)
+        if name is None:
+            logger.warning(f"No lesson registered for {lesson_id!r}")
+            return
+
+        user_lang = self.user_language(update)
+        lesson = self.lesson(user_lang, name)
+
+        await query.message.edit_text(lesson.get("text", "Lesson not available."))
+
+        files = lesson.get("files", [])
+        if files:
+            await self.send_lesson_media(
+                query.message,
+                [(file_path, self.get_text(user_lang, caption_key)) for file_path, caption_key in files],
+            )
+
+        await query.message.reply_text(
+            lesson.get("choose_lesson") or self.get_text(user_lang, "choose_another_lesson"),
+            reply_markup=self.menu(user_lang),
+        )
@@ -0,0 +1,90 @@
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+MEDIA_CACHE_PATH = os.getenv("MEDIA_CACHE_PATH", "media_cache.json")
+
+
+def sent_file_id(message, mode):
+    """Pull the file_id Telegram assigned to the media inside a sent message."""
+    if mode == "photo":
+        # Telegram returns several sizes, the last one is the original
+        return message.photo[-1].file_id if message.photo else None
+    media = getattr(message, mode, None)
+    return media.file_id if media else None
+
+
+class MediaCache:
+    """Remembers the file_id Telegram returns for every uploaded media file.
+
+    Entries are keyed by send mode (voice, audio, photo), path and content hash,
+    so editing a file on disk forces a fresh upload. `digest` supplies the
+    hashes of preloaded files (see utils/assets.py); files it doesn't know,
+    like large videos, are keyed by size and mtime instead, read with one
+    stat the first time they are used, so nothing is hashed on the event loop.
+    Saves happen on a single background thread, in order.
+    """
+
+    def __init__(self, path=MEDIA_CACHE_PATH, digest=None):
+        self.path = path
+        self._ids = {}
+        self._fingerprints = {}  # file path -> "size-mtime" of files `digest` doesn't know
+        self._digest = digest
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="media-cache")
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                self._ids = json.load(f)
+        except FileNotFoundError:
+            self._ids = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable media cache {self.path}: {e}")
+            self._ids = {}
+
+    def save(self):
+        self._writer.submit(self._write, json.dumps(self._ids))
+
+    def _write(self, data):
+        # write to a temp file first so a crash never leaves half a json behind
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def digest(self, file_path):
+        """Content hash of a preloaded file, else its size and mtime when first seen."""
+        if self._digest is not None:
+            sha = self._digest(file_path)
+            if sha:
+                return sha
+        fingerprint = self._fingerprints.get(file_path)
+        if fingerprint is None:
+            stat = os.stat(file_path)
+            fingerprint = self._fingerprints[file_path] = f"{stat.st_size}-{stat.st_mtime_ns}"
+        return fingerprint
+
+    def key(self, file_path, mode):
+        return f"{mode}:{file_path}:{self.digest(file_path)}"
+
+    def get(self, file_path, mode):
+        return self._ids.get(self.key(file_path, mode))
+
+    def put(self, file_path, mode, file_id):
+        key = self.key(file_path, mode)
+        if self._ids.get(key) == file_id:
+            return
+        # drop ids that belong to an older version of the same file
+        prefix = f"{mode}:{file_path}:"
+        for stale in [k for k in self._ids if k.startswith(prefix)]:
+            del self._ids[stale]
+        self._ids[key] = file_id
+        self.save()
+
+    def forget(self, file_path, mode):
+        if self._ids.pop(self.key(file_path, mode), None) is not None:
+            self.save()
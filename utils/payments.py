@@ -0,0 +1,275 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import registry
+from utils.score_store import BOT_DB_PATH, connect
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "x-signature-sha256"
+# Buy Me a Coffee membership events; donations don't change premium
+GRANT_EVENTS = frozenset({"membership.started", "membership.updated"})
+REVOKE_EVENTS = frozenset({"membership.cancelled", "membership.ended"})
+CLAIM_TIMEOUT = 300  # seconds before a batch claimed by a crashed worker is handed out again
+# the supporter email of a stored event as membership_change() reads it, indexed for unmatched events
+_UNMATCHED_EMAIL = "lower(trim(json_extract(payload, '$.data.supporter_email')))"
+
+
+def verify_signature(body, signature, secret):
+    """Check the HMAC-SHA256 of the raw body against the signature header."""
+    if not signature or not secret:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature.strip().lower())
+
+
+def parse_event(body):
+    """(event id, type, payload) of a webhook body; ValueError if it isn't one."""
+    payload = json.loads(body)
+    if not isinstance(payload, dict) or "type" not in payload:
+        raise ValueError("not a webhook event")
+    data = payload.get("data") or {}
+    event_id = payload.get("event_id") or payload.get("id") or data.get("id")
+    if event_id is None:
+        raise ValueError("event without an id")
+    return str(event_id), str(payload["type"]), payload
+
+
+def membership_change(event_type, payload, now=None):
+    """What an event means for premium: ("grant"|"revoke", email, expires_at), or None."""
+    data = payload.get("data") or {}
+    email = (data.get("supporter_email") or "").strip().lower()
+    if not email:
+        return None
+    now = time.time() if now is None else now
+    period_end = data.get("current_period_end")
+    period_end = float(period_end) if period_end else None
+    if event_type in GRANT_EVENTS and data.get("status", "active") == "active":
+        return "grant", email, period_end
+    if event_type in REVOKE_EVENTS or event_type in GRANT_EVENTS:
+        # a cancelled membership stays paid for until the end of its period
+        if period_end and period_end > now:
+            return "grant", email, period_end
+        return "revoke", email, None
+    return None
+
+
+class PaymentQueue:
+    """Durable queue of payment events in bot.db, deduplicated by event id.
+
+    enqueue() resolves once the event is committed, so a webhook can answer
+    right away and a retry of the same event is a no-op. Events arriving
+    together are committed in one transaction on a single writer thread
+    (group commit), so a burst doesn't pay one commit per request.
+    """
+
+    def __init__(self, path=BOT_DB_PATH):
+        self._db = connect(path)  # only used on the writer thread after setup
+        self._db.executescript(f"""
+            CREATE TABLE IF NOT EXISTS payment_events (
+                seq INTEGER PRIMARY KEY,
+                event_id TEXT NOT NULL UNIQUE,
+                type TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                received_at REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                claimed_at REAL,
+                processed_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS payment_events_open ON payment_events (status, seq)
+                WHERE status IN ('pending', 'processing', 'unmatched');
+            CREATE INDEX IF NOT EXISTS payment_events_unmatched ON payment_events ({_UNMATCHED_EMAIL})
+                WHERE status = 'unmatched';
+        """)
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="payment-queue")
+        self._waiting = []  # (row, future) not yet committed
+        self._committer = None  # task draining _waiting, while there is one
+        self.arrived = asyncio.Event()  # set whenever new events were committed
+
+    def _insert(self, rows):
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            return [
+                self._db.execute(
+                    "INSERT OR IGNORE INTO payment_events (event_id, type, payload, received_at) VALUES (?, ?, ?, ?)",
+                    row,
+                ).rowcount == 1
+                for row in rows
+            ]
+
+    async def enqueue(self, event_id, event_type, payload):
+        """Store an event; True if it is new, False for a duplicate."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append(((event_id, event_type, json.dumps(payload), time.time()), future))
+        if self._committer is None:
+            self._committer = asyncio.create_task(self._commit())
+        return await future
+
+    async def _commit(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self._waiting:
+                batch, self._waiting = self._waiting, []
+                try:
+                    inserted = await loop.run_in_executor(self._thread, self._insert, [row for row, _ in batch])
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, future), new in zip(batch, inserted):
+                    if not future.done():
+                        future.set_result(new)
+                if any(inserted):
+                    self.arrived.set()
+        finally:
+            self._committer = None
+
+    def _claim(self, limit):
+        now = time.time()
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            rows = self._db.execute(
+                "SELECT seq, type, payload FROM payment_events "
+                "WHERE status = 'pending' OR (status = 'processing' AND claimed_at < ?) ORDER BY seq LIMIT ?",
+                (now - CLAIM_TIMEOUT, limit),
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE payment_events SET status = 'processing', claimed_at = ? WHERE seq = ?",
+                [(now, seq) for seq, _, _ in rows],
+            )
+        return [(seq, event_type, json.loads(payload)) for seq, event_type, payload in rows]
+
+    def _finish(self, results):
+        now = time.time()
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany(
+                "UPDATE payment_events SET status = ?, processed_at = ? WHERE seq = ?",
+                [(status, now, seq) for seq, status in results],
+            )
+
+    def _requeue_unmatched(self, email):
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            return self._db.execute(
+                "UPDATE payment_events SET status = 'pending', claimed_at = NULL "
+                f"WHERE status = 'unmatched' AND {_UNMATCHED_EMAIL} = ?",
+                (email.strip().lower(),),
+            ).rowcount
+
+    async def requeue_unmatched(self, email):
+        """Give the events no user matched another try once someone registered their `email`."""
+        count = await asyncio.get_running_loop().run_in_executor(self._thread, self._requeue_unmatched, email)
+        if count:
+            self.arrived.set()
+        return count
+
+    async def claim(self, limit):
+        """The oldest unhandled events, marked as taken: [(seq, type, payload)]."""
+        return await asyncio.get_running_loop().run_in_executor(self._thread, self._claim, limit)
+
+    async def finish(self, results):
+        """Record the outcome of claimed events: [(seq, status)]."""
+        await asyncio.get_running_loop().run_in_executor(self._thread, self._finish, results)
+
+    def close(self):
+        self._thread.submit(self._db.close).result()
+        self._thread.shutdown()
+
+
+class PaymentWorker:
+    """Turns queued payment events into premium grants and revocations.
+
+    Events are claimed in batches; within a batch the last event per user
+    wins, and grants sharing an expiry go to the entitlement service in one
+    write. `find_user(email)` maps a supporter to a Telegram user id and
+    `notify(user_id, granted)` tells them. Events whose email no user has
+    registered are kept as "unmatched".
+    """
+
+    def __init__(self, queue, entitlements, find_user, notify, batch_size=100, poll_interval=5.0):
+        self.queue = queue
+        self.entitlements = entitlements
+        self.find_user = find_user
+        self.notify = notify
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._task = None
+
+    async def process_batch(self):
+        """Handle one batch; returns how many events it took."""
+        events = await self.queue.claim(self.batch_size)
+        if not events:
+            return 0
+
+        changes = {}  # user id -> (action, expires_at), in event order
+        results = []
+        for seq, event_type, payload in events:
+            change = membership_change(event_type, payload)
+            if change is None:
+                results.append((seq, "ignored"))
+                continue
+            action, email, expires_at = change
+            user_id = self.find_user(email)
+            if user_id is None:
+                results.append((seq, "unmatched"))
+                continue
+            changes.pop(user_id, None)
+            changes[user_id] = (action, expires_at)
+            results.append((seq, "done"))
+
+        grants = {}  # expires_at -> user ids
+        revokes = []
+        for user_id, (action, expires_at) in changes.items():
+            if action == "grant":
+                grants.setdefault(expires_at, []).append(user_id)
+            else:
+                revokes.append(user_id)
+        for expires_at, user_ids in grants.items():
+            await self.entitlements.grant(user_ids, expires_at=expires_at, source="bmc")
+        if revokes:
+            await self.entitlements.revoke(revokes, source="bmc")
+
+        await self.queue.finish(results)
+        for _, status in results:
+            registry.counter("payment_events_processed", status=status).inc()
+        for user_id, (action, _) in changes.items():
+            try:
+                await self.notify(user_id, action == "grant")
+            except Exception as e:
+                logger.warning(f"Could not tell user {user_id} about their premium change: {e}")
+        return len(events)
+
+    async def _run(self):
+        while True:
+            # cleared before the batch, so events committed meanwhile wake the wait below
+            self.queue.arrived.clear()
+            try:
+                while await self.process_batch() == self.batch_size:
+                    pass
+            except Exception as e:
+                logger.error(f"Payment worker failed, retrying: {e}")
+            # woken by our own webhook, polls for events other processes received
+            try:
+                await asyncio.wait_for(self.queue.arrived.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,278 @@
+import bisect
+import functools
+import math
+import random
+from collections import namedtuple
+
+from utils.quiz_engine import Question
+
+DIFFICULTIES = (1, 2, 3)
+OPTIONS = 4
+SESSION_LENGTH = 10
+
+# Spelled notes: (letter index, accidental), so C-Eb is a minor third and C-D# an augmented second
+LETTERS = "CDEFGAB"
+NATURAL_SEMITONES = (0, 2, 4, 5, 7, 9, 11)
+NATURAL_ROOTS = tuple((letter, 0) for letter in range(7))
+ROOTS = NATURAL_ROOTS + ((1, -1), (2, -1), (5, -1), (6, -1), (0, 1), (3, 1), (4, 1))  # Db Eb Ab Bb C# F# G#
+
+# name -> (letter steps, semitones)
+INTERVALS = {
+    "m2": (1, 1), "M2": (1, 2), "m3": (2, 3), "M3": (2, 4), "P4": (3, 5), "A4": (3, 6), "d5": (4, 6),
+    "P5": (4, 7), "A5": (4, 8), "m6": (5, 8), "M6": (5, 9), "m7": (6, 10), "M7": (6, 11), "P8": (7, 12),
+}
+EASY_INTERVALS = ("M2", "M3", "P4", "P5", "P8")
+ASKED_INTERVALS = tuple(name for name in INTERVALS if name != "A5")
+
+# symbol -> intervals above the root
+CHORDS = {
+    "": ("M3", "P5"), "m": ("m3", "P5"), "°": ("m3", "d5"), "+": ("M3", "A5"),
+    "maj7": ("M3", "P5", "M7"), "7": ("M3", "P5", "m7"), "m7": ("m3", "P5", "m7"),
+}
+
+# major keys by position on the circle of fifths (sharps positive, flats negative)
+MAJOR_KEYS = {
+    0: (0, 0), 1: (4, 0), 2: (1, 0), 3: (5, 0), 4: (2, 0), 5: (6, 0), 6: (3, 1), 7: (0, 1),
+    -1: (3, 0), -2: (6, -1), -3: (2, -1), -4: (5, -1), -5: (1, -1), -6: (4, -1), -7: (0, -1),
+}
+
+# note values in sixteenths
+DURATIONS = {"whole": 16, "half": 8, "quarter": 4, "eighth": 2, "sixteenth": 1}
+
+# top number -> meter, for the usual signatures
+METERS = {2: "simple_duple", 3: "simple_triple", 4: "simple_quadruple",
+          6: "compound_duple", 9: "compound_triple", 12: "compound_quadruple"}
+TIME_SIGNATURES = {
+    1: ((2, 4), (3, 4), (4, 4)),
+    2: ((2, 4), (3, 4), (4, 4), (2, 2), (3, 8), (6, 8), (9, 8), (12, 8)),
+    3: ((2, 4), (3, 4), (4, 4), (2, 2), (3, 2), (3, 8), (6, 8), (9, 8), (12, 8), (6, 4), (9, 16), (12, 16)),
+}
+
+
+class Text(namedtuple("Text", "key args")):
+    """A catalog key plus format arguments, localized when a question is built."""
+
+    __slots__ = ()
+
+    def __new__(cls, key, /, **args):
+        return super().__new__(cls, key, args)
+
+
+def localize(value, catalog, locale):
+    if not isinstance(value, Text):
+        return value
+    args = {name: localize(arg, catalog, locale) for name, arg in value.args.items()}
+    return catalog.get(locale, value.key).format(**args)
+
+
+def note_name(note):
+    letter, accidental = note
+    return LETTERS[letter] + ("#" * accidental if accidental > 0 else "b" * -accidental)
+
+
+def transpose(note, interval):
+    """The note `interval` above `note`, spelled on the right letter."""
+    letter, accidental = note
+    steps, semitones = INTERVALS[interval]
+    target = NATURAL_SEMITONES[letter] + accidental + semitones
+    new_letter = letter + steps
+    natural = NATURAL_SEMITONES[new_letter % 7] + 12 * (new_letter // 7)
+    return new_letter % 7, target - natural
+
+
+def _options(rng, answer, candidates):
+    """`answer` plus distinct distractors from `candidates`, shuffled; returns (options, correct index)."""
+    others = [candidate for candidate in dict.fromkeys(candidates) if candidate != answer]
+    options = [answer, *rng.sample(others, min(OPTIONS - 1, len(others)))]
+    rng.shuffle(options)
+    return options, options.index(answer)
+
+
+# Every topic maps (index, difficulty) to a question without listing the others:
+# size() says how many questions a difficulty has, make() builds number `index`.
+
+class Intervals:
+    name = "intervals"
+
+    def _space(self, difficulty):
+        if difficulty == 1:
+            return NATURAL_ROOTS, EASY_INTERVALS
+        return (NATURAL_ROOTS if difficulty == 2 else ROOTS), ASKED_INTERVALS
+
+    def size(self, difficulty):
+        roots, intervals = self._space(difficulty)
+        return len(roots) * len(intervals)
+
+    def make(self, index, difficulty, rng):
+        roots, intervals = self._space(difficulty)
+        root, interval = roots[index // len(intervals)], intervals[index % len(intervals)]
+        text = Text("bank_interval", low=note_name(root), high=note_name(transpose(root, interval)))
+        options, correct = _options(rng, interval, intervals)
+        return text, options, correct
+
+
+class KeySignatures:
+    name = "key_signatures"
+
+    def _keys(self, difficulty):
+        limit = 2 if difficulty == 1 else 7
+        majors = [count for count in MAJOR_KEYS if abs(count) <= limit]
+        keys = [(count, "major") for count in majors]
+        if difficulty == 3:
+            keys += [(count, "minor") for count in majors]
+        return keys
+
+    def size(self, difficulty):
+        return len(self._keys(difficulty))
+
+    def make(self, index, difficulty, rng):
+        count, mode = self._keys(difficulty)[index]
+        tonic = MAJOR_KEYS[count]
+        if mode == "minor":
+            tonic = transpose(tonic, "M6")  # the relative minor
+        text = Text("bank_key_signature", key=Text(f"key_{mode}", tonic=note_name(tonic)))
+
+        def label(n):
+            return "0" if n == 0 else f"{abs(n)}{'♯' if n > 0 else '♭'}"
+
+        options, correct = _options(rng, label(count), [label(n) for n in range(-7, 8) if abs(n - count) <= 3 or n == -count])
+        return text, options, correct
+
+
+@functools.lru_cache(maxsize=len(DIFFICULTIES))
+def _duration_pairs(difficulty):
+    """(bigger value, smaller value, ratio) for every whole ratio asked at `difficulty`."""
+    values = [(name, length, False) for name, length in DURATIONS.items()]
+    if difficulty >= 2:
+        values += [(name, length * 1.5, True) for name, length in DURATIONS.items() if length > 1]
+    pairs = []
+    for big in values:
+        for small in values:
+            ratio = big[1] / small[1]
+            # the easy level only uses plain notes as the smaller value
+            if ratio > 1 and ratio == int(ratio) and (difficulty == 3 or not small[2]):
+                pairs.append((big, small, int(ratio)))
+    return tuple(pairs)
+
+
+class NoteDurations:
+    name = "note_durations"
+
+    def size(self, difficulty):
+        return len(_duration_pairs(difficulty))
+
+    def make(self, index, difficulty, rng):
+        big, small, ratio = _duration_pairs(difficulty)[index]
+
+        def value(note, many):
+            # "_many" keys are the plural forms, for languages whose templates need them
+            name, _, dotted = note
+            suffix = "_many" if many else ""
+            plain = Text(f"duration_{name}{suffix}")
+            return Text(f"duration_dotted{suffix}", name=plain) if dotted else plain
+
+        text = Text("bank_duration", small=value(small, True), big=value(big, False))
+        options, correct = _options(rng, str(ratio), [str(n) for n in (1, 2, 3, 4, 6, 8, 12, 16, 24, 32)])
+        return text, options, correct
+
+
+class ChordSpelling:
+    name = "chord_spelling"
+
+    def _space(self, difficulty):
+        if difficulty == 1:
+            return NATURAL_ROOTS, ("", "m")
+        if difficulty == 2:
+            return NATURAL_ROOTS, ("", "m", "°", "+")
+        return ROOTS, tuple(CHORDS)
+
+    def size(self, difficulty):
+        roots, symbols = self._space(difficulty)
+        return len(roots) * len(symbols)
+
+    def make(self, index, difficulty, rng):
+        roots, symbols = self._space(difficulty)
+        root, symbol = roots[index // len(symbols)], symbols[index % len(symbols)]
+
+        def spelling(chord_symbol):
+            notes = [root] + [transpose(root, interval) for interval in CHORDS[chord_symbol]]
+            return " - ".join(note_name(note) for note in notes)
+
+        # distractors have the same number of notes, so the count doesn't give the answer away
+        same_size = [other for other in CHORDS if len(CHORDS[other]) == len(CHORDS[symbol])]
+        text = Text("bank_chord", chord=note_name(root) + symbol)
+        options, correct = _options(rng, spelling(symbol), [spelling(other) for other in same_size])
+        return text, options, correct
+
+
+class TimeSignatures:
+    name = "time_signatures"
+
+    def size(self, difficulty):
+        return len(TIME_SIGNATURES[difficulty])
+
+    def make(self, index, difficulty, rng):
+        top, bottom = TIME_SIGNATURES[difficulty][index]
+        meter = METERS[top]
+        text = Text("bank_meter", signature=f"{top}/{bottom}")
+        options, correct = _options(rng, meter, METERS.values())
+        return text, [Text(f"meter_{option}") for option in options], correct
+
+
+TOPICS = {topic.name: topic for topic in (Intervals(), KeySignatures(), NoteDurations(), ChordSpelling(), TimeSignatures())}
+
+
+class BankSet:
+    """Generated questions of some topics at one difficulty, as a sequence for QuizEngine.
+
+    Position i maps to a question through an affine permutation
+    (a * i + b) mod size over all the topics' questions, so consecutive
+    positions never repeat a question and nothing is materialized: a session
+    of N questions costs N index computations. Question and option order are
+    derived from the set's seed and the index alone, so any worker can check
+    an answer.
+    """
+
+    def __init__(self, catalog, locale, topics, difficulty, seed=0):
+        self.catalog = catalog
+        self.locale = locale
+        self.difficulty = difficulty
+        self.seed = seed
+        self.topics = [TOPICS[name] for name in topics]
+        self._offsets = []  # index of each topic's first question
+        size = 0
+        for topic in self.topics:
+            self._offsets.append(size)
+            size += topic.size(difficulty)
+        self.size = size
+        # per set, so the cache goes away with it
+        self._questions = functools.lru_cache(maxsize=1024)(self._question)
+
+        rng = random.Random(f"{seed}:{'+'.join(topics)}:{difficulty}")
+        self._b = rng.randrange(size)
+        self._a = rng.randrange(1, size) if size > 1 else 1
+        while math.gcd(self._a, size) != 1:
+            self._a += 1
+
+    def __len__(self):
+        return self.size
+
+    def bank_index(self, position):
+        return (self._a * position + self._b) % self.size
+
+    def __getitem__(self, position):
+        return self._questions(position)
+
+    def _question(self, position):
+        if not 0 <= position < self.size:
+            raise IndexError(position)
+        index = self.bank_index(position)
+        slot = bisect.bisect_right(self._offsets, index) - 1
+        topic = self.topics[slot]
+        rng = random.Random(f"{self.seed}:{index}")
+        text, options, correct = topic.make(index - self._offsets[slot], self.difficulty, rng)
+        return Question(
+            localize(text, self.catalog, self.locale),
+            [localize(option, self.catalog, self.locale) for option in options],
+            correct,
+        )
@@ -0,0 +1,155 @@
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+CALLBACK_PREFIX = "quiz"
+
+
+class Question:
+    __slots__ = ("text", "options", "correct", "audio")
+
+    def __init__(self, text, options, correct, audio=None):
+        self.text = text
+        self.options = tuple(options)
+        self.correct = correct  # index into options
+        self.audio = audio
+
+    @property
+    def correct_text(self):
+        return self.options[self.correct]
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build from a quiz_questions entry, matching the answer to an option."""
+        options = [option.strip().lower() for option in data["options"]]
+        try:
+            correct = options.index(data["correct"].strip().lower())
+        except ValueError:
+            raise ValueError(f"Answer {data['correct']!r} of {data['question']!r} is not one of its options")
+        return cls(data["question"], data["options"], correct, data.get("audio"))
+
+
+class QuizSession:
+    """Where a user is in a quiz: a few ints, not a copy of the questions.
+
+    The session covers questions first..end-1 of its set, unless a
+    scheduler moves it around with QuizEngine.jump.
+    """
+
+    __slots__ = ("set_id", "index", "score", "started_at", "first", "end", "answered")
+
+    def __init__(self, set_id, index=0, score=0, started_at=None, first=None, end=None, answered=0):
+        self.set_id = set_id
+        self.index = index
+        self.score = score
+        self.started_at = int(time.time()) if started_at is None else started_at
+        self.first = index if first is None else first
+        self.end = end
+        self.answered = answered
+
+
+class QuizEngine:
+    """Question sets plus the answer callback format.
+
+    An answer button carries "quiz:<set>:<question>:<option>", so any worker
+    can check it against the question set without shared state. Taps on a
+    question the session already moved past are ignored.
+    """
+
+    def __init__(self, question_sets):
+        # set id -> sequence of Question
+        self.sets = {
+            set_id: tuple(Question.from_dict(question) for question in questions)
+            for set_id, questions in question_sets.items()
+        }
+        self._session_lengths = {}
+
+    def add_set(self, set_id, questions, session_length=None):
+        """Add a set of Question objects, e.g. a generated one.
+
+        With `session_length`, a session covers that many questions from a
+        random starting point instead of the whole set.
+        """
+        self.sets[set_id] = questions
+        if session_length:
+            self._session_lengths[set_id] = session_length
+
+    def questions(self, set_id):
+        return self.sets[set_id]
+
+    def _end(self, set_id, first):
+        length = self._session_lengths.get(set_id)
+        questions = self.sets[set_id]
+        return min(len(questions), first + length) if length else len(questions)
+
+    def _session_end(self, session):
+        return session.end if session.end is not None else len(self.sets[session.set_id])
+
+    def length(self, session):
+        """How many questions the session has in total."""
+        return self._session_end(session) - session.first
+
+    def question(self, session):
+        """The session's current question, or None when the quiz is over."""
+        questions = self.sets[session.set_id]
+        return questions[session.index] if session.index < self._session_end(session) else None
+
+    @staticmethod
+    def encode(set_id, question_id, option):
+        return f"{CALLBACK_PREFIX}:{set_id}:{question_id}:{option}"
+
+    def is_valid(self, set_id, question_id, option):
+        questions = self.sets.get(set_id)
+        return (
+            questions is not None
+            and 0 <= question_id < len(questions)
+            and 0 <= option < len(questions[question_id].options)
+        )
+
+    def start(self, user_data, set_id, first=None):
+        """Start a session, at question `first` if given (e.g. picked by a scheduler)."""
+        if first is None:
+            first = 0
+            if set_id in self._session_lengths:
+                first = random.randrange(max(1, len(self.sets[set_id]) - self._session_lengths[set_id] + 1))
+        session = user_data["quiz"] = QuizSession(set_id, index=first, end=self._end(set_id, first))
+        return session
+
+    def session(self, user_data):
+        session = user_data.get("quiz")
+        return session if isinstance(session, QuizSession) else None
+
+    def answer(self, user_data, set_id, question_id, option):
+        """Check an answer callback.
+
+        Returns (session, question, is_correct), or None for invalid, stale or
+        repeated taps. A user without a session (restart, another worker)
+        continues from the question they answered; a button of another set
+        than the current session's is stale, it never replaces the session.
+        """
+        if not self.is_valid(set_id, question_id, option):
+            return None
+
+        session = self.session(user_data)
+        if session is None:
+            session = user_data["quiz"] = QuizSession(set_id, index=question_id, end=self._end(set_id, question_id))
+        elif session.set_id != set_id or session.index != question_id:
+            return None
+
+        question = self.sets[set_id][question_id]
+        is_correct = option == question.correct
+        if is_correct:
+            session.score += 1
+        session.index += 1
+        session.answered += 1
+        return session, question, is_correct
+
+    def jump(self, session, question_id):
+        """Continue at `question_id` instead of the next question; None ends the session."""
+        if question_id is None:
+            session.end = session.index
+        else:
+            session.index = question_id
+            session.end = None
@@ -0,0 +1,250 @@
+import asyncio
+import contextlib
+import contextvars
+import datetime as dt
+import heapq
+import itertools
+import logging
+import random
+import time
+from collections import OrderedDict
+
+from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
+from telegram.ext import BaseRateLimiter
+
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# lower goes first when the limiter has a queue
+PRIORITY_INTERACTIVE = 0  # answers to what the user just did (quiz feedback)
+PRIORITY_DEFAULT = 1
+PRIORITY_BULK = 2  # ads, broadcasts
+
+# Telegram: ~30 messages/s overall, ~1/s per chat, 20/min in groups
+GLOBAL_RATE = 30
+CHAT_RATE = 1.0
+GROUP_RATE = 20 / 60
+
+# only these endpoints count against the flood limits, the rest go straight through
+LIMITED_PREFIXES = ("send", "edit", "copy", "forward")
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        """Take a token and return how long the caller has to wait for it."""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    async def acquire(self):
+        wait = self.delay()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds):
+        """Hand out no tokens for `seconds` (flood control told us to wait)."""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class PriorityTokenBucket(TokenBucket):
+    """Token bucket whose waiters are served by priority, then first come first served."""
+
+    def __init__(self, rate, capacity):
+        super().__init__(rate, capacity)
+        self._waiters = []  # heap of (priority, sequence, future)
+        self._sequence = itertools.count()
+        self._drain_task = None
+
+    @property
+    def busy(self):
+        return bool(self._waiters)
+
+    def _take(self):
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self, priority=PRIORITY_DEFAULT):
+        if not self._waiters and self._take():
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = asyncio.create_task(self._drain())
+        await future
+
+    async def _drain(self):
+        while self._waiters:
+            if not self._take():
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():  # the caller was cancelled, give the token to the next one
+                self.tokens += 1
+                continue
+            future.set_result(None)
+
+
+class ChatRateLimiter:
+    """One token bucket per chat, so a user can't trip Telegram's per-chat flood limit.
+
+    Groups (negative chat ids) get `group_rate`, private chats `rate`. Buckets
+    are kept least recently used first; past `max_chats`, idle ones are
+    dropped from the front, so eviction never scans the whole map.
+    """
+
+    def __init__(self, rate=CHAT_RATE, burst=3, max_idle=300, group_rate=GROUP_RATE, max_chats=10_000):
+        self.rate = rate
+        self.group_rate = group_rate
+        self.burst = burst
+        self.max_idle = max_idle
+        self.max_chats = max_chats
+        self._buckets = OrderedDict()
+
+    def bucket(self, chat_id):
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            if len(self._buckets) >= self.max_chats:
+                self._evict_idle()
+            rate = self.group_rate if chat_id < 0 else self.rate
+            bucket = self._buckets[chat_id] = PriorityTokenBucket(rate, self.burst)
+        else:
+            self._buckets.move_to_end(chat_id)
+        return bucket
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.max_idle
+        while self._buckets:
+            chat_id, bucket = next(iter(self._buckets.items()))
+            # the front is the least recently used; if it is still in use, so is everything after it
+            if bucket.updated >= cutoff or bucket.busy:
+                return
+            del self._buckets[chat_id]
+
+    async def acquire(self, chat_id, priority=PRIORITY_DEFAULT):
+        await self.bucket(chat_id).acquire(priority)
+
+
+# priority of the Bot API calls made in the current task, see send_priority()
+_priority = contextvars.ContextVar("send_priority", default=PRIORITY_DEFAULT)
+
+
+@contextlib.contextmanager
+def send_priority(priority):
+    """Run the Bot API calls made inside the block (and tasks started there) at `priority`.
+
+    Works with shortcuts like message.reply_text, which can't pass rate_limit_args.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def _seconds(retry_after):
+    # PTB reports retry_after as int seconds or as a timedelta, depending on version and settings
+    return retry_after.total_seconds() if isinstance(retry_after, dt.timedelta) else float(retry_after)
+
+
+class FloodControlLimiter(BaseRateLimiter):
+    """Outbound scheduler for every Bot API call the Application makes.
+
+    Message-sending calls wait for a token from their chat's bucket, then
+    from the global one; waiters are served by priority. A 429 pauses the
+    chat (or everything, for calls without a chat) for Telegram's retry_after
+    plus jitter and retries; network errors are retried with exponential
+    backoff. Timeouts are not retried, the message may already have been
+    sent.
+
+    rate_limit_args, where a bot method is called with it, is a dict with
+    optional "priority" and "max_retries".
+    """
+
+    def __init__(self, rate=GLOBAL_RATE, burst=GLOBAL_RATE, chats=None, max_retries=3, backoff=0.5):
+        self.global_bucket = PriorityTokenBucket(rate, burst)
+        self.chats = chats or ChatRateLimiter()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._flood_retries = registry.counter("bot_api_retries", reason="flood")
+        self._network_retries = registry.counter("bot_api_retries", reason="network")
+        self._gave_up = registry.counter("bot_api_retries_exhausted")
+        self._waits = {}
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def _wait_metric(self, priority):
+        histogram = self._waits.get(priority)
+        if histogram is None:
+            histogram = self._waits[priority] = registry.histogram("rate_limiter_wait_seconds", priority=str(priority))
+        return histogram
+
+    async def _acquire(self, chat_id, priority):
+        start = time.perf_counter()
+        if chat_id is not None:
+            await self.chats.acquire(chat_id, priority)
+        await self.global_bucket.acquire(priority)
+        self._wait_metric(priority).observe(time.perf_counter() - start)
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        options = rate_limit_args or {}
+        priority = options.get("priority", _priority.get())
+        max_retries = options.get("max_retries", self.max_retries)
+
+        limited = endpoint.startswith(LIMITED_PREFIXES)
+        chat_id = data.get("chat_id")
+        # only numeric ids have their own bucket, "@channel" names share the global one
+        chat_id = chat_id if isinstance(chat_id, int) else None
+
+        for attempt in itertools.count():
+            if limited:
+                await self._acquire(chat_id, priority)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt >= max_retries:
+                    self._gave_up.inc()
+                    raise
+                self._flood_retries.inc()
+                delay = _seconds(e.retry_after) + random.uniform(0, 1)
+                logger.warning(f"Flood control on {endpoint} (chat {chat_id}), retrying in {delay:.1f}s")
+                if chat_id is not None:
+                    self.chats.bucket(chat_id).pause(delay)
+                else:
+                    self.global_bucket.pause(delay)
+                if not limited:
+                    await asyncio.sleep(delay)
+            except (BadRequest, TimedOut):
+                # BadRequest is a NetworkError in PTB but retrying won't fix it
+                raise
+            except NetworkError as e:
+                if attempt >= max_retries:
+                    self._gave_up.inc()
+                    raise
+                self._network_retries.inc()
+                delay = random.uniform(0, self.backoff * 2 ** attempt)  # full jitter
+                logger.warning(f"{endpoint} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import os
+
+import httpx
+from telegram.error import TimedOut
+from telegram.request import BaseRequest, HTTPXRequest
+
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv("BOT_API_POOL_SIZE", 64))
+UPLOAD_POOL_SIZE = int(os.getenv("BOT_API_UPLOAD_POOL_SIZE", 8))
+# seconds an idle connection is kept open for the next call
+KEEPALIVE_EXPIRY = float(os.getenv("BOT_API_KEEPALIVE", 60))
+# seconds a call may wait for a free connection before failing with TimedOut
+POOL_TIMEOUT = float(os.getenv("BOT_API_POOL_TIMEOUT", 10))
+# "1" multiplexes calls over HTTP/2 connections, needs the h2 package (httpx[http2])
+HTTP2 = os.getenv("BOT_API_HTTP2") == "1"
+
+
+def tuned_request(pool_size, http2=HTTP2, keepalive_expiry=KEEPALIVE_EXPIRY, **timeouts):
+    """An HTTPXRequest with `pool_size` connections that all stay alive between calls."""
+    http_version = "1.1"
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("BOT_API_HTTP2 is set but h2 is not installed, using HTTP/1.1")
+        else:
+            http_version = "2"
+    limits = httpx.Limits(
+        max_connections=pool_size, max_keepalive_connections=pool_size, keepalive_expiry=keepalive_expiry
+    )
+    timeouts.setdefault("pool_timeout", POOL_TIMEOUT)
+    return HTTPXRequest(
+        connection_pool_size=pool_size, http_version=http_version, httpx_kwargs={"limits": limits}, **timeouts
+    )
+
+
+class PooledRequest(BaseRequest):
+    """Routes Bot API calls to separate connection pools.
+
+    Calls that upload files go to the "upload" pool, everything else to
+    "default", so a few large uploads can't hold every connection while
+    quiz answers wait. `pools` maps a name to (request, pool size). Per
+    pool: calls in flight, pool size and the number of calls that gave up
+    waiting for a connection.
+    """
+
+    def __init__(self, pools):
+        self._pools = {name: request for name, (request, _) in pools.items()}
+        self._metrics = {}
+        for name, (_, size) in pools.items():
+            registry.gauge("bot_api_pool_size", pool=name).set(size)
+            self._metrics[name] = (
+                registry.gauge("bot_api_pool_in_flight", pool=name),
+                registry.counter("bot_api_pool_timeouts", pool=name),
+            )
+
+    @property
+    def read_timeout(self):
+        return self._pools["default"].read_timeout
+
+    async def initialize(self):
+        await asyncio.gather(*(request.initialize() for request in self._pools.values()))
+
+    async def shutdown(self):
+        await asyncio.gather(*(request.shutdown() for request in self._pools.values()))
+
+    def _pool_name(self, request_data):
+        if request_data is not None and request_data.contains_files and "upload" in self._pools:
+            return "upload"
+        return "default"
+
+    async def do_request(self, url, method, request_data=None, **timeouts):
+        name = self._pool_name(request_data)
+        in_flight, pool_timeouts = self._metrics[name]
+        in_flight.inc()
+        try:
+            return await self._pools[name].do_request(url, method, request_data, **timeouts)
+        except TimedOut as e:
+            if isinstance(e.__cause__, httpx.PoolTimeout):
+                pool_timeouts.inc()
+            raise
+        finally:
+            in_flight.dec()
+
+
+def build_request():
+    """Request object for the bot's regular calls: a default pool and an upload pool."""
+    return PooledRequest({
+        "default": (tuned_request(POOL_SIZE, read_timeout=20, write_timeout=20), POOL_SIZE),
+        "upload": (
+            tuned_request(UPLOAD_POOL_SIZE, read_timeout=20, write_timeout=60, media_write_timeout=60),
+            UPLOAD_POOL_SIZE,
+        ),
+    })
+
+
+def build_get_updates_request():
+    """Long polling holds its connection for the whole timeout, so it gets its own."""
+    return tuned_request(1, read_timeout=30)
@@ -0,0 +1,83 @@
+import logging
+import time
+
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+SEPARATOR = ":"
+
+
+class Codec:
+    """Turns the payload after "namespace:" into typed handler arguments.
+
+    Codec(str, int, int) accepts "en:3:1" and produces ("en", 3, 1).
+    """
+
+    def __init__(self, *types):
+        self.types = types
+
+    def decode(self, payload):
+        if not self.types:
+            return ()
+        parts = payload.split(SEPARATOR)
+        if len(parts) != len(self.types):
+            raise ValueError(f"expected {len(self.types)} fields, got {len(parts)}")
+        return tuple(kind(part) for kind, part in zip(self.types, parts))
+
+
+class Route:
+    __slots__ = ("handler", "codec", "calls", "errors", "latency")
+
+    def __init__(self, namespace, handler, codec):
+        self.handler = handler
+        self.codec = codec
+        self.calls = registry.counter("callback_route_calls", route=namespace)
+        self.errors = registry.counter("callback_route_errors", route=namespace)
+        self.latency = registry.histogram("callback_route_seconds", route=namespace)
+
+
+class CallbackRouter:
+    """Dispatches callback queries on the "namespace:" prefix of their data.
+
+    The prefix is one dict lookup, the rest of the data is decoded by the
+    route's codec and passed to the handler as arguments. The router answers
+    every callback query exactly once, handlers must not answer again.
+    """
+
+    def __init__(self):
+        self._routes = {}
+        self.unknown = registry.counter("callback_route_unknown")
+        self.bad_payload = registry.counter("callback_route_bad_payload")
+
+    def add(self, namespace, handler, codec=None):
+        if namespace in self._routes:
+            raise ValueError(f"Callback namespace {namespace!r} is already registered")
+        self._routes[namespace] = Route(namespace, handler, codec or Codec(str))
+
+    async def dispatch(self, update, context):
+        query = update.callback_query
+        await query.answer()
+
+        namespace, _, payload = (query.data or "").partition(SEPARATOR)
+        route = self._routes.get(namespace)
+        if route is None:
+            self.unknown.inc()
+            logger.debug(f"No route for callback data {query.data!r}")
+            return
+        try:
+            args = route.codec.decode(payload)
+        except ValueError as e:
+            self.bad_payload.inc()
+            logger.debug(f"Bad payload for {namespace!r}: {query.data!r} ({e})")
+            return
+
+        route.calls.inc()
+        start = time.perf_counter()
+        try:
+            await route.handler(update, context, *args)
+        except Exception:
+            route.errors.inc()
+            raise
+        finally:
+            route.latency.observe(time.perf_counter() - start)
@@ -0,0 +1,408 @@
+import asyncio
+import heapq
+import logging
+import os
+import sqlite3
+import time
+from collections import Counter, namedtuple
+
+logger = logging.getLogger(__name__)
+
+BOT_DB_PATH = os.getenv("BOT_DB_PATH", "bot.db")
+SCORE_BACKEND = os.getenv("SCORE_BACKEND", "sqlite")
+
+
+def connect(path):
+    """SQLite connection set up for several bot processes sharing one file."""
+    db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("PRAGMA busy_timeout=30000")
+    return db
+
+
+Leader = namedtuple("Leader", "user_id points name")
+Streak = namedtuple("Streak", "current best")
+
+
+def today():
+    """Day number for streaks (UTC days since the epoch)."""
+    return int(time.time() // 86400)
+
+
+def extend_streak(streak, last_day, day):
+    """The streak after scoring on `day`, when it was last extended on `last_day`."""
+    if last_day >= day:
+        return streak
+    return streak + 1 if last_day == day - 1 else 1
+
+
+def current_streak(streak, last_day, day=None):
+    """A streak counts while its last day is today or yesterday."""
+    day = today() if day is None else day
+    return streak if last_day >= day - 1 else 0
+
+
+class FenwickTree:
+    """Number of users per score, with O(log n) prefix sums and k-th lookups.
+
+    Index i counts the users holding exactly i points; the tree doubles in
+    size when a score outgrows it.
+    """
+
+    def __init__(self, size=1024):
+        self._tree = [0] * (size + 1)
+        self.total = 0
+
+    def __len__(self):
+        return len(self._tree) - 1
+
+    def _grow(self, index):
+        counts = [self.count(i) for i in range(len(self))]
+        size = len(self)
+        while size <= index:
+            size *= 2
+        self._tree = [0] * (size + 1)
+        self.total = 0
+        for i, count in enumerate(counts):
+            if count:
+                self.add(i, count)
+
+    def add(self, index, delta):
+        if index >= len(self):
+            self._grow(index)
+        self.total += delta
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index):
+        """Users with at most `index` points."""
+        i = min(index + 1, len(self))
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def count(self, index):
+        return self.prefix(index) - (self.prefix(index - 1) if index else 0)
+
+    def find(self, k):
+        """The smallest score with at least k users at or below it (1 <= k <= total)."""
+        position = 0
+        step = 1 << (len(self).bit_length() - 1)
+        while step:
+            nxt = position + step
+            if nxt < len(self._tree) and self._tree[nxt] < k:
+                position = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return position
+
+
+class ScoreStore:
+    """Quiz points and daily streaks per user.
+
+    add() only bumps an in-memory counter, the backend decides when points
+    reach durable storage. Every backend answers the same leaderboard
+    queries, kept up to date on each add instead of sorting all users.
+    """
+
+    def add(self, user_id, points=1, name=None):
+        """Give points (and extend today's streak); `name` is shown on the leaderboard."""
+        raise NotImplementedError
+
+    def get(self, user_id):
+        raise NotImplementedError
+
+    def top(self, n=10):
+        """[Leader] of the n best users, best first."""
+        raise NotImplementedError
+
+    def rank(self, user_id):
+        """1-based position of the user on the leaderboard (ties share a rank)."""
+        raise NotImplementedError
+
+    def count(self):
+        """How many users are on the leaderboard."""
+        raise NotImplementedError
+
+    def streak(self, user_id):
+        """Streak(current, best) in days with at least one point."""
+        raise NotImplementedError
+
+    def start(self):
+        pass
+
+    async def flush(self):
+        pass
+
+    async def stop(self):
+        await self.flush()
+
+
+class MemoryScoreStore(ScoreStore):
+    """Process-local scores, lost on restart. Meant for development and tests.
+
+    A Fenwick tree over scores answers rank and top-N in O(log n); users
+    sharing a score sit in one set, so ties never need sorting beyond top-N.
+    """
+
+    def __init__(self):
+        self._points = {}
+        self._by_points = {}  # points -> user ids
+        self._tree = FenwickTree()
+        self._names = {}
+        self._streaks = {}  # user id -> (streak, best, last day)
+
+    def add(self, user_id, points=1, name=None):
+        user_id = int(user_id)
+        old = self._points.get(user_id)
+        if old is not None:
+            self._tree.add(old, -1)
+            users = self._by_points[old]
+            users.discard(user_id)
+            if not users:
+                del self._by_points[old]
+        new = max(0, (old or 0) + points)
+        self._points[user_id] = new
+        self._tree.add(new, 1)
+        self._by_points.setdefault(new, set()).add(user_id)
+        if name:
+            self._names[user_id] = name
+
+        day = today()
+        streak, best, last_day = self._streaks.get(user_id, (0, 0, 0))
+        streak = extend_streak(streak, last_day, day)
+        self._streaks[user_id] = (streak, max(best, streak), max(last_day, day))
+
+    def get(self, user_id):
+        return self._points.get(int(user_id), 0)
+
+    def top(self, n=10):
+        leaders = []
+        total = self._tree.total
+        k = 1  # position of the next user to list, best first
+        while len(leaders) < n and k <= total:
+            points = self._tree.find(total - k + 1)
+            users = self._by_points[points]
+            # only the lowest ids of a tie are listed, however many users share the score
+            leaders.extend(
+                Leader(user_id, points, self._names.get(user_id)) for user_id in heapq.nsmallest(n - len(leaders), users)
+            )
+            k += len(users)
+        return leaders
+
+    def rank(self, user_id):
+        return self._tree.total - self._tree.prefix(self.get(user_id)) + 1
+
+    def count(self):
+        return self._tree.total
+
+    def streak(self, user_id):
+        streak, best, last_day = self._streaks.get(int(user_id), (0, 0, 0))
+        return Streak(current_streak(streak, last_day), best)
+
+
+class SQLiteScoreStore(ScoreStore):
+    """Scores in an SQLite file (WAL mode).
+
+    Increments are collected in a dict on the event loop and written in one
+    transaction every `flush_interval` seconds. The upsert adds to the stored
+    value, so a write never overwrites points saved meanwhile. Top-N walks
+    the (points, user_id) index. score_counts keeps how many users hold each
+    score, moved in the same transaction as the points; it is loaded into a
+    Fenwick tree at start, and add() moves the tree right away, so count is
+    an O(log n) read and rank adds one primary key lookup, both including
+    pending points. The tree only sees this process's adds, so rank and
+    count assume a single bot process.
+    """
+
+    def __init__(self, path=BOT_DB_PATH, flush_interval=2.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._pending = {}  # user id -> [points, day, name, score before them (None: not on the board)]
+        self._flushing = {}  # the batch being written
+        self._task = None
+        self._flush_lock = asyncio.Lock()
+        self._reader = connect(path)  # used on the event loop thread
+        self._writer = connect(path)  # used by the flush thread
+        self._create_schema()
+        self._tree = FenwickTree()  # score_counts plus pending points
+        for points, users in self._reader.execute("SELECT points, users FROM score_counts"):
+            self._tree.add(max(0, points), users)
+
+    def _create_schema(self):
+        db = self._reader
+        with db:
+            # one transaction, so two processes starting together don't both migrate
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS scores (
+                    user_id INTEGER PRIMARY KEY,
+                    points INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS scores_by_points ON scores (points DESC, user_id)")
+            columns = {row[1] for row in db.execute("PRAGMA table_info(scores)")}
+            for column, definition in (
+                ("name", "TEXT"),
+                ("streak", "INTEGER NOT NULL DEFAULT 0"),
+                ("best_streak", "INTEGER NOT NULL DEFAULT 0"),
+                ("last_day", "INTEGER NOT NULL DEFAULT 0"),
+            ):
+                if column not in columns:
+                    db.execute(f"ALTER TABLE scores ADD COLUMN {column} {definition}")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS score_counts (
+                    points INTEGER PRIMARY KEY,
+                    users INTEGER NOT NULL
+                ) WITHOUT ROWID
+            """)
+            if db.execute("SELECT 1 FROM score_counts LIMIT 1").fetchone() is None:
+                # first start with this table: count the scores saved so far
+                db.execute("INSERT INTO score_counts SELECT points, COUNT(*) FROM scores GROUP BY points")
+
+    def _base(self, user_id):
+        """The user's score as the tree has it without pending points, None if not on the board."""
+        flushing = self._flushing.get(user_id)
+        if flushing is not None:
+            return (flushing[3] or 0) + flushing[0]
+        row = self._reader.execute("SELECT points FROM scores WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else None
+
+    def add(self, user_id, points=1, name=None):
+        user_id = int(user_id)
+        pending = self._pending.get(user_id)
+        if pending is None:
+            base = self._base(user_id)
+            pending = self._pending[user_id] = [0, today(), name, base]
+            old = base
+        else:
+            old = (pending[3] or 0) + pending[0]
+        if old is not None:
+            self._tree.add(max(0, old), -1)
+        pending[0] += points
+        pending[1] = today()
+        pending[2] = name or pending[2]
+        self._tree.add(max(0, (pending[3] or 0) + pending[0]), 1)
+
+    def get(self, user_id):
+        user_id = int(user_id)
+        pending = self._pending.get(user_id)
+        if pending is not None:
+            return (pending[3] or 0) + pending[0]
+        return self._base(user_id) or 0
+
+    def top(self, n=10):
+        rows = self._reader.execute(
+            "SELECT user_id, points, name FROM scores ORDER BY points DESC, user_id LIMIT ?", (n,)
+        ).fetchall()
+        return [Leader(*row) for row in rows]
+
+    def rank(self, user_id):
+        return self._tree.total - self._tree.prefix(self.get(user_id)) + 1
+
+    def count(self):
+        return self._tree.total
+
+    def streak(self, user_id):
+        user_id = int(user_id)
+        row = self._reader.execute(
+            "SELECT streak, best_streak, last_day FROM scores WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        streak, best, last_day = row or (0, 0, 0)
+        pending = self._pending.get(user_id)
+        if pending is not None:
+            streak = extend_streak(streak, last_day, pending[1])
+            best = max(best, streak)
+            last_day = max(last_day, pending[1])
+        return Streak(current_streak(streak, last_day), best)
+
+    def _write(self, batch):
+        now = time.time()
+        with self._writer:
+            self._writer.execute("BEGIN IMMEDIATE")
+            moves = Counter()  # score -> change in users holding it
+            for user_id, (points, _, _, _) in batch.items():
+                row = self._writer.execute("SELECT points FROM scores WHERE user_id = ?", (user_id,)).fetchone()
+                old = row[0] if row else 0
+                if row:
+                    moves[old] -= 1
+                moves[old + points] += 1
+            # SET expressions see the old row, so the streak CASE is repeated for best_streak
+            streak = (
+                "CASE WHEN last_day >= excluded.last_day THEN streak "
+                "WHEN last_day = excluded.last_day - 1 THEN streak + 1 ELSE 1 END"
+            )
+            self._writer.executemany(
+                "INSERT INTO scores (user_id, points, updated_at, name, streak, best_streak, last_day) "
+                "VALUES (?, ?, ?, ?, 1, 1, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET points = points + excluded.points, "
+                "updated_at = excluded.updated_at, name = COALESCE(excluded.name, name), "
+                f"streak = {streak}, best_streak = MAX(best_streak, {streak}), "
+                "last_day = MAX(last_day, excluded.last_day)",
+                [(user_id, points, now, name, day) for user_id, (points, day, name, _) in batch.items()],
+            )
+            self._writer.executemany(
+                "INSERT INTO score_counts (points, users) VALUES (?, ?) "
+                "ON CONFLICT(points) DO UPDATE SET users = users + excluded.users",
+                [(points, change) for points, change in moves.items() if change],
+            )
+            self._writer.execute("DELETE FROM score_counts WHERE users <= 0")
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            # adds meanwhile start from the batch's scores, which the tree already has
+            self._flushing = batch
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except sqlite3.Error as e:
+                logger.error(f"Could not save {len(batch)} score updates, retrying later: {e}")
+                # the tree already counts these points, only the rows are put back
+                for user_id, (points, day, name, base) in batch.items():
+                    pending = self._pending.get(user_id)
+                    if pending is None:
+                        self._pending[user_id] = [points, day, name, base]
+                    else:
+                        pending[0] += points
+                        pending[1] = max(pending[1], day)
+                        pending[2] = pending[2] or name
+                        pending[3] = base
+            finally:
+                self._flushing = {}
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        self._reader.close()
+        self._writer.close()
+
+
+def create_score_store(backend=SCORE_BACKEND, path=BOT_DB_PATH):
+    if backend == "memory":
+        return MemoryScoreStore()
+    if backend == "sqlite":
+        return SQLiteScoreStore(path)
+    raise ValueError(f"Unknown SCORE_BACKEND: {backend!r}")
@@ -0,0 +1,227 @@
+import array
+import asyncio
+import heapq
+import logging
+import struct
+import sys
+import time
+
+from utils.score_store import BOT_DB_PATH, connect
+
+logger = logging.getLogger(__name__)
+
+# SM-2 constants: ease is stored in hundredths, intervals in minutes
+DEFAULT_EASE = 250
+MIN_EASE = 130
+RELEARN_MINUTES = 10
+DAY_MINUTES = 24 * 60
+MAX_INTERVAL_MINUTES = 365 * DAY_MINUTES
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 1
+
+_HEADER = struct.Struct("<BH")  # format version, number of items
+_VERSION = 1
+
+
+class ReviewState:
+    """One user's SM-2 state for one question set, in packed arrays.
+
+    Per question: due time (unix seconds, 0 = never seen), interval
+    (minutes), ease (hundredths) and repetitions, 11 bytes in all. A heap of
+    (due, question) gives the next due question; entries made stale by a
+    later answer are skipped when they surface, so an answer is O(log n).
+    """
+
+    __slots__ = ("due", "interval", "ease", "reps", "_heap")
+
+    def __init__(self, size):
+        self.due = array.array("I", bytes(4 * size))
+        self.interval = array.array("I", bytes(4 * size))
+        self.ease = array.array("H", [DEFAULT_EASE]) * size
+        self.reps = array.array("B", bytes(size))
+        self._heap = None
+
+    def __len__(self):
+        return len(self.due)
+
+    def _build_heap(self):
+        self._heap = [(due, item) for item, due in enumerate(self.due)]
+        heapq.heapify(self._heap)
+
+    def record(self, item, quality, now=None):
+        """SM-2 update after an answer graded 0-5 (3 and up counts as remembered)."""
+        now = int(time.time() if now is None else now)
+        if quality < 3:
+            self.reps[item] = 0
+            self.interval[item] = RELEARN_MINUTES
+        else:
+            reps = self.reps[item]
+            if reps == 0:
+                self.interval[item] = DAY_MINUTES
+            elif reps == 1:
+                self.interval[item] = 6 * DAY_MINUTES
+            else:
+                self.interval[item] = min(MAX_INTERVAL_MINUTES, self.interval[item] * self.ease[item] // 100)
+            self.reps[item] = min(reps + 1, 255)
+        penalty = 5 - quality
+        ease = self.ease[item] + 10 - penalty * (8 + penalty * 2)
+        self.ease[item] = max(MIN_EASE, ease)
+
+        self.due[item] = now + self.interval[item] * 60
+        if self._heap is not None:
+            heapq.heappush(self._heap, (self.due[item], item))
+
+    def next_due(self, now=None):
+        """The question due the longest (unseen ones first), or None when nothing is due."""
+        now = int(time.time() if now is None else now)
+        if self._heap is None:
+            self._build_heap()
+        heap = self._heap
+        while heap:
+            due, item = heap[0]
+            if due != self.due[item]:
+                heapq.heappop(heap)  # superseded by a later answer
+                continue
+            return item if due <= now else None
+        return None
+
+    def next_review(self):
+        """When the next question becomes due (unix seconds)."""
+        return min(self.due, default=0)
+
+    def to_bytes(self):
+        parts = [self.due, self.interval, self.ease]
+        if sys.byteorder == "big":
+            parts = [array.array(part.typecode, part) for part in parts]
+            for part in parts:
+                part.byteswap()
+        return _HEADER.pack(_VERSION, len(self)) + b"".join(part.tobytes() for part in parts) + self.reps.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data, size):
+        """Unpack a stored state; questions added to the set since then start unseen."""
+        version, count = _HEADER.unpack_from(data)
+        if version != _VERSION:
+            raise ValueError(f"Unknown review state version {version}")
+        state = cls(0)
+        offset = _HEADER.size
+        for name, itemsize in (("due", 4), ("interval", 4), ("ease", 2), ("reps", 1)):
+            part = getattr(state, name)
+            part.frombytes(data[offset:offset + count * itemsize])
+            if sys.byteorder == "big" and itemsize > 1:
+                part.byteswap()
+            offset += count * itemsize
+        if size > count:
+            extra = cls(size - count)
+            for name in ("due", "interval", "ease", "reps"):
+                getattr(state, name).extend(getattr(extra, name))
+        elif size < count:
+            for name in ("due", "interval", "ease", "reps"):
+                del getattr(state, name)[size:]
+        return state
+
+
+class SpacedRepetition:
+    """Review states of all users, kept in bot.db.
+
+    A state is loaded on a user's first answer and stays in memory; changed
+    states are written as blobs every `flush_interval` seconds, on a thread.
+    `set_sizes` maps each scheduled set to its number of questions. Past
+    `max_cached` states, saved ones are dropped from memory oldest first.
+    """
+
+    def __init__(self, set_sizes, path=BOT_DB_PATH, flush_interval=5.0, max_cached=100_000):
+        self.set_sizes = set_sizes
+        self.flush_interval = flush_interval
+        self.max_cached = max_cached
+        self._states = {}  # (user_id, set_id) -> ReviewState
+        self._dirty = set()
+        self._task = None
+        self._flush_lock = asyncio.Lock()
+        self._reader = connect(path)
+        self._writer = connect(path)
+        self._reader.executescript("""
+            CREATE TABLE IF NOT EXISTS review_states (
+                user_id INTEGER NOT NULL,
+                set_id TEXT NOT NULL,
+                state BLOB NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (user_id, set_id)
+            ) WITHOUT ROWID;
+        """)
+
+    def state(self, user_id, set_id):
+        key = (int(user_id), set_id)
+        state = self._states.get(key)
+        if state is None:
+            row = self._reader.execute(
+                "SELECT state FROM review_states WHERE user_id = ? AND set_id = ?", key
+            ).fetchone()
+            size = self.set_sizes[set_id]
+            try:
+                state = ReviewState.from_bytes(row[0], size) if row else ReviewState(size)
+            except (ValueError, struct.error) as e:
+                logger.warning(f"Resetting unreadable review state of {key}: {e}")
+                state = ReviewState(size)
+            if len(self._states) >= self.max_cached:
+                self._evict()
+            self._states[key] = state
+        return state
+
+    def _evict(self):
+        # dicts keep insertion order, so this drops the states loaded longest ago
+        clean = [key for key in self._states if key not in self._dirty]
+        for key in clean[:max(1, len(clean) // 2)]:
+            del self._states[key]
+
+    def record(self, user_id, set_id, item, correct):
+        self.state(user_id, set_id).record(item, QUALITY_CORRECT if correct else QUALITY_WRONG)
+        self._dirty.add((int(user_id), set_id))
+
+    def next_due(self, user_id, set_id):
+        return self.state(user_id, set_id).next_due()
+
+    def next_review(self, user_id, set_id):
+        return self.state(user_id, set_id).next_review()
+
+    def _write(self, rows):
+        with self._writer:
+            self._writer.execute("BEGIN IMMEDIATE")
+            self._writer.executemany(
+                "INSERT OR REPLACE INTO review_states (user_id, set_id, state, updated_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            now = time.time()
+            rows = [(user_id, set_id, self._states[user_id, set_id].to_bytes(), now) for user_id, set_id in dirty]
+            try:
+                await asyncio.to_thread(self._write, rows)
+            except Exception as e:
+                logger.error(f"Could not save {len(rows)} review states, retrying later: {e}")
+                self._dirty |= dirty
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        self._reader.close()
+        self._writer.close()
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import os
+import subprocess
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 48_000  # Opus' native rate, ffmpeg doesn't have to resample
+OPUS_BITRATE = os.getenv("SYNTH_OPUS_BITRATE", "48k")
+# encoded clips kept in memory, a two second clip is about 12 KiB
+SYNTH_CACHE_BYTES = int(os.getenv("SYNTH_CACHE_BYTES", 16 * 1024 * 1024))
+
+NOTE_NAMES = ("C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B")
+INTERVALS = {
+    "m2": 1, "M2": 2, "m3": 3, "M3": 4, "P4": 5, "TT": 6,
+    "P5": 7, "m6": 8, "M6": 9, "m7": 10, "M7": 11, "P8": 12,
+}
+SCALES = {
+    "major": (0, 2, 4, 5, 7, 9, 11, 12),
+    "natural_minor": (0, 2, 3, 5, 7, 8, 10, 12),
+    "harmonic_minor": (0, 2, 3, 5, 7, 8, 11, 12),
+    "melodic_minor": (0, 2, 3, 5, 7, 9, 11, 12),
+    "major_pentatonic": (0, 2, 4, 7, 9, 12),
+    "minor_pentatonic": (0, 3, 5, 7, 10, 12),
+}
+TRIADS = {"major": (0, 4, 7), "minor": (0, 3, 7), "diminished": (0, 3, 6), "augmented": (0, 4, 8)}
+
+# gains of the first four partials, a soft piano-like tone
+HARMONIC_GAINS = (1.0, 0.5, 0.25, 0.125)
+ATTACK = 0.01  # seconds
+RELEASE = 0.02
+TAIL = 0.2  # silence after the last note
+
+
+class Clip(namedtuple("Clip", "kind name root voicing tempo")):
+    """One renderable example, e.g. Clip("interval", "P5", "C4", "both", 90).
+
+    kind is "interval", "scale" or "triad"; voicing is "melodic" (one note
+    after another), "harmonic" (all at once) or "both"; tempo is in beats per
+    minute, one note per beat.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, kind, name, root="C4", voicing="melodic", tempo=90):
+        return super().__new__(cls, kind, name, root, voicing, tempo)
+
+
+def note_number(note):
+    """MIDI number of a note name like "C4", "F#3" or "Bb2"."""
+    name, octave = note[:-1], int(note[-1])
+    offset = 0
+    if len(name) == 2 and name[1] == "b":
+        name, offset = name[0], -1
+    return 12 * (octave + 1) + NOTE_NAMES.index(name) + offset
+
+
+def semitones(kind, name):
+    if kind == "interval":
+        return (0, INTERVALS[name])
+    if kind == "scale":
+        return SCALES[name]
+    if kind == "triad":
+        return TRIADS[name]
+    raise ValueError(f"Unknown clip kind {kind!r}")
+
+
+def _tones(frequencies, seconds):
+    """One row of samples per frequency, all notes rendered in single array operations."""
+    t = np.arange(int(seconds * SAMPLE_RATE), dtype=np.float32) / SAMPLE_RATE
+    phase = (2 * np.pi * frequencies.astype(np.float32))[:, None] * t
+    # partials 2-4 from sin/cos of the fundamental, two transcendental calls instead of four
+    s, c = np.sin(phase), np.cos(phase)
+    s2 = s * s
+    g1, g2, g3, g4 = HARMONIC_GAINS
+    tones = s * (g1 + 2 * g2 * c + g3 * (3 - 4 * s2) + 4 * g4 * c * (1 - 2 * s2))
+
+    envelope = np.exp(-3.0 * t / seconds)
+    envelope *= np.minimum(1.0, t / ATTACK)
+    envelope *= np.minimum(1.0, (seconds - t) / RELEASE)
+    return tones * envelope
+
+
+def render(clip):
+    """Mono 16-bit PCM of a clip at SAMPLE_RATE."""
+    midi = note_number(clip.root) + np.array(semitones(clip.kind, clip.name))
+    frequencies = 440.0 * 2 ** ((midi - 69) / 12)
+    beat = 60 / clip.tempo
+
+    parts = []
+    if clip.voicing in ("melodic", "both") or clip.kind == "scale":
+        parts.append(_tones(frequencies, beat).reshape(-1))
+    if clip.voicing in ("harmonic", "both") and clip.kind != "scale":
+        parts.append(_tones(frequencies, 2 * beat).sum(axis=0))
+    parts.append(np.zeros(int(TAIL * SAMPLE_RATE), dtype=np.float32))
+
+    samples = np.concatenate(parts)
+    samples *= 0.8 * 32767 / np.abs(samples).max()
+    return samples.astype(np.int16)
+
+
+def duration(clip):
+    """Length of a rendered clip in whole seconds, without rendering it."""
+    beat = 60 / clip.tempo
+    notes = len(semitones(clip.kind, clip.name))
+    seconds = TAIL
+    if clip.voicing in ("melodic", "both") or clip.kind == "scale":
+        seconds += notes * beat
+    if clip.voicing in ("harmonic", "both") and clip.kind != "scale":
+        seconds += 2 * beat
+    return max(1, round(seconds))
+
+
+def encode_opus(pcm, bitrate=OPUS_BITRATE):
+    """Ogg/Opus bytes of mono PCM, through an ffmpeg pipe (no temp files)."""
+    result = subprocess.run(
+        [
+            "ffmpeg", "-v", "error", "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1", "-i", "pipe:0",
+            "-c:a", "libopus", "-b:a", bitrate, "-application", "audio", "-f", "ogg", "pipe:1",
+        ],
+        input=pcm.tobytes(), capture_output=True, check=True,
+    )
+    return result.stdout
+
+
+class SynthEngine:
+    """Renders clips to Ogg/Opus on a worker thread and keeps them in an LRU.
+
+    Concurrent requests for the same clip share one render. The file_id
+    Telegram returns for an uploaded clip is kept too, so a clip is usually
+    uploaded once per process.
+    """
+
+    def __init__(self, max_bytes=SYNTH_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._clips = OrderedDict()  # Clip -> bytes, oldest first
+        self._bytes = 0
+        self._rendering = {}  # Clip -> future of the render in progress
+        self._file_ids = {}
+        self._hits = registry.counter("synth_cache_hits")
+        self._misses = registry.counter("synth_cache_misses")
+        self._render_seconds = registry.histogram("synth_render_seconds")
+
+    async def get(self, clip):
+        data = self._clips.get(clip)
+        if data is not None:
+            self._clips.move_to_end(clip)
+            self._hits.inc()
+            return data
+
+        future = self._rendering.get(clip)
+        if future is None:
+            self._misses.inc()
+            future = self._rendering[clip] = asyncio.ensure_future(self._render(clip))
+            future.add_done_callback(lambda _: self._rendering.pop(clip, None))
+        return await asyncio.shield(future)
+
+    async def _render(self, clip):
+        start = time.perf_counter()
+        data = await asyncio.to_thread(lambda: encode_opus(render(clip)))
+        self._render_seconds.observe(time.perf_counter() - start)
+        self._store(clip, data)
+        return data
+
+    def _store(self, clip, data):
+        self._clips[clip] = data
+        self._bytes += len(data)
+        while self._bytes > self.max_bytes and len(self._clips) > 1:
+            _, evicted = self._clips.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    async def prerender(self, clips):
+        for clip in clips:
+            try:
+                await self.get(clip)
+            except (OSError, subprocess.CalledProcessError) as e:
+                logger.warning(f"Could not prerender {clip}: {e}")
+                return
+
+    def file_id(self, clip):
+        return self._file_ids.get(clip)
+
+    def remember(self, clip, file_id):
+        self._file_ids[clip] = file_id
+
+    def forget(self, clip):
+        self._file_ids.pop(clip, None)
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import os
+from collections import deque
+
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_UPDATES = int(os.getenv("MAX_CONCURRENT_UPDATES", 256))
+MAX_PENDING_UPDATES = int(os.getenv("MAX_PENDING_UPDATES", 10_000))
+
+
+def chat_key(update):
+    """What an update must be ordered by: its chat, else its user, else nothing."""
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    if update.effective_user is not None:
+        return update.effective_user.id
+    return None
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates concurrently, but one at a time per chat.
+
+    Up to `max_concurrent_updates` chats are served at once. An update for a
+    chat that is already busy is queued behind it and gives its slot back, so
+    one chatty user can't hold more than one slot. Ingestion calls admit(),
+    which waits while `max_pending` updates are in flight.
+    """
+
+    def __init__(self, max_concurrent_updates=MAX_CONCURRENT_UPDATES, max_pending=MAX_PENDING_UPDATES):
+        super().__init__(max_concurrent_updates)
+        self.max_pending = max_pending
+        self.pending = 0
+        self._capacity = asyncio.Event()
+        self._capacity.set()
+        self._chats = {}  # chat id -> deque of coroutines waiting behind the running one
+
+    async def admit(self):
+        """Wait for room in the pipeline, then count one more update in flight."""
+        while self.pending >= self.max_pending:
+            self._capacity.clear()
+            await self._capacity.wait()
+        self.pending += 1
+
+    def _finished(self):
+        self.pending = max(0, self.pending - 1)
+        if self.pending < self.max_pending:
+            self._capacity.set()
+
+    async def _run(self, coroutine):
+        try:
+            await coroutine
+        except Exception:
+            # PTB already routes handler errors to error handlers, this is a last resort
+            logger.exception("Unhandled error while processing an update")
+        finally:
+            self._finished()
+
+    async def do_process_update(self, update, coroutine):
+        key = chat_key(update)
+        if key is None:
+            await self._run(coroutine)
+            return
+
+        waiting = self._chats.get(key)
+        if waiting is not None:
+            # the chat is busy, the running task will pick this one up in order
+            waiting.append(coroutine)
+            return
+
+        self._chats[key] = waiting = deque()
+        try:
+            await self._run(coroutine)
+            while waiting:
+                await self._run(waiting.popleft())
+        finally:
+            del self._chats[key]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        for waiting in self._chats.values():
+            for coroutine in waiting:
+                coroutine.close()
+            waiting.clear()
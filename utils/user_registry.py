@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.score_store import BOT_DB_PATH, connect
+
+logger = logging.getLogger(__name__)
+
+
+class UserRegistry:
+    """Everyone who has talked to the bot, in the users table of bot.db.
+
+    seen() is called for every update and only touches a dict; the latest
+    language and time per user are upserted in one transaction every
+    `flush_interval` seconds. Users who blocked the bot are marked, not
+    deleted, and count again once they write to it. page() walks the
+    table by user id (keyset pagination), so a broadcast reads it in
+    constant memory and can resume from the last id it reached. Every
+    write runs on one writer thread, so a flush and a broadcast marking
+    blocked users never interleave their transactions.
+    """
+
+    def __init__(self, path=BOT_DB_PATH, flush_interval=10.0):
+        self.flush_interval = flush_interval
+        self._pending = {}  # user id -> (language, last seen)
+        self._task = None
+        self._flush_lock = asyncio.Lock()
+        self._reader = connect(path)
+        self._writer = connect(path)  # only used on the writer thread after setup
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="user-registry")
+        self._reader.executescript("""
+            CREATE TABLE IF NOT EXISTS users (
+                user_id INTEGER PRIMARY KEY,
+                language TEXT,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                blocked_at REAL
+            );
+        """)
+
+    def seen(self, user_id, language=None):
+        self._pending[int(user_id)] = (language, time.time())
+
+    def count(self):
+        (users,) = self._reader.execute("SELECT COUNT(*) FROM users WHERE blocked_at IS NULL").fetchone()
+        return users
+
+    def seed(self, users):
+        """Add [(user_id, language)] known from older stores, keeping existing rows."""
+        self._thread.submit(self._seed, list(users)).result()
+
+    def _seed(self, users):
+        now = time.time()
+        with self._writer:
+            self._writer.execute("BEGIN IMMEDIATE")
+            self._writer.executemany(
+                "INSERT OR IGNORE INTO users (user_id, language, first_seen, last_seen) VALUES (?, ?, ?, ?)",
+                [(int(user_id), language, now, now) for user_id, language in users],
+            )
+            if self._writer.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'scores'").fetchone():
+                self._writer.execute(
+                    "INSERT OR IGNORE INTO users (user_id, first_seen, last_seen) "
+                    "SELECT user_id, updated_at, updated_at FROM scores"
+                )
+
+    def page(self, after, limit):
+        """[(user_id, language)] of reachable users with ids above `after`, in id order."""
+        return self._reader.execute(
+            "SELECT user_id, language FROM users WHERE user_id > ? AND blocked_at IS NULL ORDER BY user_id LIMIT ?",
+            (after, limit),
+        ).fetchall()
+
+    def _block(self, user_ids):
+        now = time.time()
+        with self._writer:
+            self._writer.execute("BEGIN IMMEDIATE")
+            self._writer.executemany(
+                "UPDATE users SET blocked_at = ? WHERE user_id = ?", [(now, int(user_id)) for user_id in user_ids]
+            )
+
+    async def block(self, user_ids):
+        """Mark users who blocked the bot or deleted their account; they get no more broadcasts."""
+        if user_ids:
+            await asyncio.get_running_loop().run_in_executor(self._thread, self._block, user_ids)
+
+    def _write(self, batch):
+        with self._writer:
+            self._writer.execute("BEGIN IMMEDIATE")
+            self._writer.executemany(
+                "INSERT INTO users (user_id, language, first_seen, last_seen) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET language = COALESCE(excluded.language, language), "
+                "last_seen = excluded.last_seen, blocked_at = NULL",
+                [(user_id, language, seen, seen) for user_id, (language, seen) in batch.items()],
+            )
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            try:
+                await asyncio.get_running_loop().run_in_executor(self._thread, self._write, batch)
+            except Exception as e:
+                logger.error(f"Could not save {len(batch)} users, retrying later: {e}")
+                for user_id, entry in batch.items():
+                    self._pending.setdefault(user_id, entry)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        self._reader.close()
+        self._thread.submit(self._writer.close).result()
+        self._thread.shutdown()
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+from utils.score_store import BOT_DB_PATH, connect
+
+logger = logging.getLogger(__name__)
+
+LANGUAGES_PATH = os.getenv("LANGUAGES_PATH", "languages.json")
+
+
+class UserPreferenceStore:
+    """User -> language, kept in the preferences table of bot.db and mirrored in a dict.
+
+    The table is read once at startup. Lookups and updates only touch the
+    dict; a background task upserts the rows that changed since the last
+    flush (never the whole table, so nobody else's writes are lost), and
+    flush() is called once more on shutdown. languages.json, which predates
+    the table, is imported on first start.
+    """
+
+    def __init__(self, path=BOT_DB_PATH, flush_interval=5.0, legacy_path=LANGUAGES_PATH):
+        self.flush_interval = flush_interval
+        self._prefs = {}
+        self._pending = {}  # user id -> language, not saved yet
+        self._task = None
+        self._flush_lock = asyncio.Lock()
+        self._db = connect(path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS preferences (
+                user_id INTEGER PRIMARY KEY,
+                language TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+        """)
+        self._import_legacy(legacy_path)
+        self.load()
+
+    def _import_legacy(self, legacy_path):
+        if not legacy_path or not os.path.exists(legacy_path):
+            return
+        if self._db.execute("SELECT 1 FROM preferences LIMIT 1").fetchone():
+            return
+        try:
+            with open(legacy_path, "r") as f:
+                prefs = {int(user_id): language for user_id, language in json.load(f).items()}
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.error(f"Could not import {legacy_path}: {e}")
+            return
+        self._write(prefs)
+        logger.info(f"Imported {len(prefs)} language preferences from {legacy_path}")
+
+    def __len__(self):
+        return len(self._prefs)
+
+    def load(self):
+        self._prefs = dict(self._db.execute("SELECT user_id, language FROM preferences"))
+
+    def get(self, user_id, default=None):
+        return self._prefs.get(int(user_id), default)
+
+    def items(self):
+        """(user_id, language) for every user with a saved language."""
+        return list(self._prefs.items())
+
+    def set(self, user_id, language):
+        user_id = int(user_id)
+        if self._prefs.get(user_id) != language:
+            self._prefs[user_id] = language
+            self._pending[user_id] = language
+
+    def _write(self, batch):
+        now = time.time()
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany(
+                "INSERT INTO preferences (user_id, language, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET language = excluded.language, updated_at = excluded.updated_at",
+                [(user_id, language, now) for user_id, language in batch.items()],
+            )
+
+    async def flush(self):
+        """Save the preferences changed since the last flush."""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except Exception as e:
+                logger.error(f"Could not save {len(batch)} language preferences, retrying later: {e}")
+                for user_id, language in batch.items():
+                    self._pending.setdefault(user_id, language)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        self._db.close()